@@ -0,0 +1,189 @@
+"""API JSON de requêtes sur les ventes, servie par serve.py.
+
+Les données sont chargées une fois au démarrage ; chaque appel exécute une
+requête nommée (celles de `requetes.py`) ou une requête SQL libre avec le
+moteur de `moteur_sql`, et les résultats sont conservés dans un cache LRU
+indexé par le plan de la requête, une fois ses paramètres liés : deux
+écritures d'une même requête partagent leur entrée.
+
+    GET /api/requetes                              catalogue des requêtes
+    GET /api/requetes/produits_par_region?region=Nord
+    GET /api/sql?q=SELECT region, SUM(qte) AS q FROM ventes GROUP BY region
+    GET /api/classement?dimension=produit&mesure=chiffre_affaires&n=10
+
+Les valeurs des paramètres :nom sont lues dans l'URL et converties selon
+ce à quoi la requête les compare : un nombre face à une colonne numérique,
+un agrégat ou un calcul, du texte sinon (un produit « 001 » reste
+« 001 »). Une requête SQL libre non agrégée doit porter un LIMIT d'au plus
+`LIGNES_MAX` lignes : sans cela, un `SELECT *` renverrait (et garderait en
+cache) toute la table. Une requête qui échoue à l'évaluation (types
+incompatibles...) lève ErreurSQL comme une requête invalide. Avec un cube
+produit × région (`cube.CubeVentes`), les requêtes qu'il couvre sont
+calculées à partir de ses cellules au lieu des lignes de ventes.
+"""
+import json
+from functools import lru_cache
+
+import pandas as pd
+
+from classement import classer
+from moteur_sql import (
+    Agregat, Binaire, Colonne, DansListe, ErreurSQL, Litteral, Parametre, Unaire,
+    analyser_requete, executer_plan, lier_parametres, parametres_de,
+)
+
+TAILLE_CACHE = 256
+LIGNES_MAX = 10_000
+DIMENSIONS_CLASSEMENT = ('produit', 'region')
+MESURES_CLASSEMENT = {'chiffre_affaires': 'SUM(prix * qte)', 'quantite_vendue': 'SUM(qte)'}
+OPERATEURS_ARITHMETIQUES = ('+', '-', '*', '/')
+
+
+class RequeteInconnue(KeyError):
+    pass
+
+
+def normaliser(requete_sql):
+    """Requête sur une ligne, pour l'affichage (catalogue, réponses)."""
+    return ' '.join(requete_sql.split())
+
+
+def _numerique(expr, colonnes_numeriques):
+    """Indique si l'expression produit une valeur numérique."""
+    if isinstance(expr, Colonne):
+        return expr.nom in colonnes_numeriques
+    if isinstance(expr, Litteral):
+        return isinstance(expr.valeur, (int, float)) and not isinstance(expr.valeur, bool)
+    if isinstance(expr, Agregat):
+        return expr.fonction in ('COUNT', 'SUM', 'AVG') or _numerique(expr.argument, colonnes_numeriques)
+    if isinstance(expr, Unaire):
+        return expr.operateur == '-'
+    if isinstance(expr, Binaire):
+        return expr.operateur in OPERATEURS_ARITHMETIQUES
+    return False
+
+
+def _comparaisons(expr, colonnes_numeriques, numeriques):
+    """Complète `numeriques` : paramètre -> comparé (ou combiné) à une valeur numérique."""
+    if isinstance(expr, Binaire):
+        for parametre, autre in ((expr.gauche, expr.droite), (expr.droite, expr.gauche)):
+            if isinstance(parametre, Parametre):
+                numeriques[parametre.nom] = (numeriques.get(parametre.nom, False)
+                                             or _numerique(autre, colonnes_numeriques)
+                                             or expr.operateur in OPERATEURS_ARITHMETIQUES)
+        _comparaisons(expr.gauche, colonnes_numeriques, numeriques)
+        _comparaisons(expr.droite, colonnes_numeriques, numeriques)
+    elif isinstance(expr, DansListe):
+        for valeur in expr.valeurs:
+            if isinstance(valeur, Parametre):
+                numeriques[valeur.nom] = numeriques.get(valeur.nom, False) or _numerique(expr.expression, colonnes_numeriques)
+        _comparaisons(expr.expression, colonnes_numeriques, numeriques)
+    elif isinstance(expr, Unaire):
+        if isinstance(expr.operande, Parametre) and expr.operateur == '-':
+            numeriques[expr.operande.nom] = True
+        _comparaisons(expr.operande, colonnes_numeriques, numeriques)
+    elif isinstance(expr, Agregat) and expr.argument is not None:
+        _comparaisons(expr.argument, colonnes_numeriques, numeriques)
+
+
+def parametres_numeriques(plan, colonnes_numeriques):
+    """Paramètres du plan à convertir en nombre, d'après ce à quoi ils sont comparés."""
+    numeriques = {}
+    for expr in [expr for _, expr in plan.selection] + [plan.filtre, plan.having] + [expr for expr, _ in plan.tri]:
+        if expr is not None:
+            _comparaisons(expr, colonnes_numeriques, numeriques)
+    return {nom for nom, numerique in numeriques.items() if numerique}
+
+
+def convertir_nombre(nom, texte):
+    """Valeur numérique d'un paramètre d'URL : entier, sinon réel."""
+    for type_ in (int, float):
+        try:
+            return type_(texte)
+        except ValueError:
+            pass
+    raise ErreurSQL(f"Paramètre :{nom} : nombre attendu, {texte!r} reçu")
+
+
+class ApiVentes:
+    """Exécute des requêtes SQL sur un DataFrame chargé une fois."""
+
+    def __init__(self, donnees, requetes, taille_cache=TAILLE_CACHE, cube=None):
+        self.donnees = donnees
+        self.cube = cube
+        self.requetes = {nom: requete_sql.strip() for nom, requete_sql in requetes.items()}
+        self.colonnes_numeriques = {nom for nom, type_ in donnees.dtypes.items() if pd.api.types.is_numeric_dtype(type_)}
+        self._calculer = lru_cache(maxsize=taille_cache)(self._calculer)
+        self._classer = lru_cache(maxsize=taille_cache)(self._classer)
+
+    def catalogue(self):
+        """Requêtes disponibles avec leurs paramètres, en JSON."""
+        catalogue = {
+            nom: {'sql': normaliser(requete_sql), 'parametres': parametres_de(analyser_requete(requete_sql))}
+            for nom, requete_sql in self.requetes.items()
+        }
+        return json.dumps({'requetes': catalogue}, ensure_ascii=False).encode()
+
+    def executer(self, nom, parametres=None):
+        """Résultat JSON de la requête nommée `nom`."""
+        if nom not in self.requetes:
+            raise RequeteInconnue(nom)
+        requete_sql = self.requetes[nom]
+        return self._executer(requete_sql, analyser_requete(requete_sql), parametres)
+
+    def executer_sql(self, requete_sql, parametres=None):
+        """Résultat JSON d'une requête SQL ; lève ErreurSQL si elle est invalide."""
+        requete_sql = requete_sql.strip()
+        plan = analyser_requete(requete_sql)
+        if not plan.est_agregee and (plan.limite is None or plan.limite > LIGNES_MAX):
+            raise ErreurSQL(f"Requête non agrégée : LIMIT {LIGNES_MAX} au plus est requis")
+        return self._executer(requete_sql, plan, parametres)
+
+    def _executer(self, requete_sql, plan, parametres):
+        attendus = parametres_de(plan)
+        numeriques = parametres_numeriques(plan, self.colonnes_numeriques)
+        valeurs = {
+            nom: convertir_nombre(nom, valeur) if nom in numeriques else valeur
+            for nom, valeur in (parametres or {}).items() if nom in attendus
+        }
+        manquants = [nom for nom in attendus if nom not in valeurs]
+        if manquants:
+            raise ErreurSQL(f"Paramètre(s) manquant(s): {', '.join(manquants)}")
+        resultat = self._calculer(lier_parametres(plan, valeurs))
+        return self._json({'sql': normaliser(requete_sql), 'parametres': valeurs}, resultat)
+
+    def classement(self, dimension, mesure='chiffre_affaires', n=10):
+        """Les `n` meilleurs produits ou régions pour une mesure, en JSON."""
+        if dimension not in DIMENSIONS_CLASSEMENT:
+            raise ErreurSQL(f"Dimension de classement inconnue: {dimension!r}")
+        if mesure not in MESURES_CLASSEMENT:
+            raise ErreurSQL(f"Mesure de classement inconnue: {mesure!r}")
+        try:
+            n = int(n)
+        except ValueError:
+            n = 0
+        if n < 1:
+            raise ErreurSQL("n doit être un entier positif")
+        return self._classer(dimension, mesure, n)
+
+    def _table(self, plan):
+        try:
+            if self.cube is not None and self.cube.peut_repondre(plan):
+                return self.cube.repondre(plan)
+            return executer_plan(plan, self.donnees)
+        except (TypeError, ValueError) as erreur:
+            raise ErreurSQL(f"Requête impossible à évaluer: {erreur}") from erreur
+
+    def _json(self, entete, resultat):
+        entete = json.dumps(entete, ensure_ascii=False)
+        return (entete[:-1] + ', "resultat": ' + resultat + '}').encode()
+
+    def _calculer(self, plan):
+        return self._table(plan).to_json(orient='split', index=False, force_ascii=False)
+
+    def _classer(self, dimension, mesure, n):
+        selection = ', '.join(f"{expression} AS {nom}" for nom, expression in MESURES_CLASSEMENT.items())
+        table = self._table(analyser_requete(f"SELECT {dimension}, {selection} FROM ventes GROUP BY {dimension}"))
+        meilleurs = classer(table, {'classement': (mesure, n)})['classement']
+        resultat = meilleurs.to_json(orient='split', index=False, force_ascii=False)
+        return self._json({'dimension': dimension, 'mesure': mesure, 'n': n}, resultat)
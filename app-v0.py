@@ -1,7 +1,9 @@
 import plotly.express as px
 import pandas as pd
 
-données = pd.read_csv('https://docs.google.com/spreadsheets/d/e/2PACX-1vSC4KusfFzvOsr8WJRgozzsCxrELW4G4PopUkiDbvrrV2lg0S19-zeryp02MC9WYSVBuzGCUtn8ucZW/pub?output=csv')
+from source_donnees import charger_donnees
+
+données = charger_donnees()
 
 figure = px.pie(données, values='qte', names='region', title='quantité vendue par région')
 
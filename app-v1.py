@@ -3,8 +3,10 @@ import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from source_donnees import charger_donnees
+
 # Chargement des données
-donnees = pd.read_csv('https://docs.google.com/spreadsheets/d/e/2PACX-1vSC4KusfFzvOsr8WJRgozzsCxrELW4G4PopUkiDbvrrV2lg0S19-zeryp02MC9WYSVBuzGCUtn8ucZW/pub?output=csv')
+donnees = charger_donnees()
 
 # Calcul du chiffre d'affaires
 donnees['chiffre_affaires'] = donnees['prix'] * donnees['qte']
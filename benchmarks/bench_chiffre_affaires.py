@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare le calcul du chiffre d'affaires par groupe : ancienne agrégation
+par lambda Python contre la colonne prix * qte vectorisée du moteur SQL.
+
+    python benchmarks/bench_chiffre_affaires.py --lignes 200000 --cardinalites 10 1000 100000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from moteur_sql import executer_requetes
+
+REQUETES = {
+    'ventes_par_produit': """
+        SELECT produit, SUM(qte) AS quantite_vendue, SUM(prix * qte) AS chiffre_affaires
+        FROM donnees GROUP BY produit ORDER BY chiffre_affaires DESC
+    """,
+    'ventes_par_region': """
+        SELECT region, SUM(qte) AS quantite_vendue, SUM(prix * qte) AS chiffre_affaires
+        FROM donnees GROUP BY region ORDER BY chiffre_affaires DESC
+    """,
+}
+
+
+def generer(n_lignes, n_produits, graine=0):
+    rng = np.random.default_rng(graine)
+    return pd.DataFrame({
+        'produit': pd.Series(rng.integers(0, n_produits, n_lignes)).map('P{:06d}'.format),
+        'region': rng.choice(['Nord', 'Sud', 'Est', 'Ouest'], n_lignes),
+        'prix': rng.uniform(1, 100, n_lignes).round(2),
+        'qte': rng.integers(1, 20, n_lignes),
+    })
+
+
+def par_lambda(df):
+    """Ancienne implémentation : un appel Python et un .loc par groupe."""
+    resultats = {}
+    for cle in ('produit', 'region'):
+        resultats[cle] = df.groupby(cle).agg(
+            quantite_vendue=('qte', 'sum'),
+            chiffre_affaires=('prix', lambda x: (x * df.loc[x.index, 'qte']).sum())
+        ).reset_index()
+    return resultats
+
+
+def par_moteur(df):
+    return executer_requetes(REQUETES, df)
+
+
+def chronometrer(fonction, df, repetitions):
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction(df)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lignes', type=int, default=200_000)
+    parser.add_argument('--cardinalites', type=int, nargs='+', default=[10, 1_000, 10_000])
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'produits':>10} {'lambda (s)':>12} {'vectorisé (s)':>14} {'gain':>8}")
+    for n_produits in args.cardinalites:
+        df = generer(args.lignes, n_produits)
+        # Les deux chemins doivent produire le même chiffre d'affaires
+        attendu = par_lambda(df)['produit'].set_index('produit')['chiffre_affaires']
+        obtenu = par_moteur(df)['ventes_par_produit'].set_index('produit')['chiffre_affaires']
+        pd.testing.assert_series_equal(attendu.sort_index(), obtenu.sort_index(), check_exact=False)
+
+        duree_lambda = chronometrer(par_lambda, df, args.repetitions)
+        duree_moteur = chronometrer(par_moteur, df, args.repetitions)
+        print(f"{n_produits:>10,} {duree_lambda:>12.4f} {duree_moteur:>14.4f} {duree_lambda / duree_moteur:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Chronomètre chaque étape du pipeline d'app.py sur des ventes synthétiques.
+
+Pour chaque taille de table : chargement, chaque requête de `requetes_sql`
+seule puis le lot complet, construction du dashboard et des figures,
+sérialisation HTML et écriture sur disque. Tout est local (aucun accès
+réseau) et reproductible (graine fixe) ; les résultats sont écrits en JSON
+et peuvent être comparés à une exécution précédente.
+
+    python benchmarks/bench_pipeline.py --lignes 1000 100000 10000000 --sortie bench.json
+    python benchmarks/bench_pipeline.py --lignes 100000 --comparer bench.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import figures
+from donnees_synthetiques import ecrire
+from moteur_sql import executer_requete_sql, executer_requetes
+from fichiers import ecrire_atomique
+from rendu import figure_en_html, installer_plotlyjs
+from requetes import requetes_sql
+from source_donnees import charger_donnees, parquet_disponible
+
+SEUIL_REGRESSION = 0.20
+# Écart absolu en dessous duquel une mesure n'est pas une régression (bruit)
+PLANCHER = 0.002
+
+
+def chronometrer(fonction, repetitions):
+    """Meilleure durée sur `repetitions` appels, et le dernier résultat."""
+    meilleur, resultat = float('inf'), None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur, resultat
+
+
+def mesurer(chemin, repetitions, dossier_html):
+    """Durées de chaque étape du pipeline sur le fichier `chemin`."""
+    durees = {}
+    durees['chargement'], donnees = chronometrer(lambda: charger_donnees(str(chemin)), repetitions)
+    for nom, requete_sql in requetes_sql.items():
+        durees[f"requete:{nom}"], _ = chronometrer(lambda: executer_requete_sql(requete_sql, donnees), repetitions)
+    durees['requetes:lot'], resultats = chronometrer(lambda: executer_requetes(requetes_sql, donnees), repetitions)
+
+    ventes_produit = resultats['ventes_par_produit']
+    ventes_region = resultats['ventes_par_region']
+    quantite_produit = resultats['quantite_par_produit']
+    top5_ca = ventes_produit.nlargest(5, 'chiffre_affaires')
+    top5_qte = quantite_produit.nlargest(5, 'quantite_vendue')
+
+    durees['figure:dashboard'], dashboard = chronometrer(
+        lambda: figures.dashboard(ventes_region, ventes_produit, quantite_produit, top5_ca, top5_qte), repetitions
+    )
+    individuelles = {
+        'ca-produit': lambda: figures.ca_produit(ventes_produit),
+        'ca-region': lambda: figures.ca_region(ventes_region),
+        'quantite-produit': lambda: figures.quantite_produit(quantite_produit),
+    }
+    for nom, construire in individuelles.items():
+        durees[f"figure:{nom}"], _ = chronometrer(construire, repetitions)
+
+    durees['html:serialisation'], html = chronometrer(lambda: figure_en_html(dashboard, autonome=False), repetitions)
+    installer_plotlyjs(dossier_html)
+    chemin_html = Path(dossier_html) / 'dashboard.html'
+    durees['html:ecriture'], _ = chronometrer(lambda: ecrire_atomique(chemin_html, html), repetitions)
+    return durees, len(donnees)
+
+
+def environnement():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plotly': plotly.__version__,
+        'machine': platform.machine(),
+        'processeur': platform.processor() or platform.machine(),
+    }
+
+
+def comparer(actuel, reference, seuil=SEUIL_REGRESSION):
+    """Liste des mesures plus lentes que la référence de plus de `seuil` (fraction)."""
+    anciennes = {(m['lignes'], m['produits'], m['etape']): m['secondes'] for m in reference['mesures']}
+    regressions = []
+    for mesure in actuel['mesures']:
+        ancienne = anciennes.get((mesure['lignes'], mesure['produits'], mesure['etape']))
+        if ancienne and mesure['secondes'] > ancienne * (1 + seuil) and mesure['secondes'] - ancienne > PLANCHER:
+            regressions.append((mesure, ancienne))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lignes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--produits', type=int, default=50)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet' if parquet_disponible() else 'csv')
+    parser.add_argument('--donnees', default=None, help="répertoire des fichiers générés (réutilisés d'une exécution à l'autre)")
+    parser.add_argument('--sortie', default='bench_pipeline.json', help="fichier JSON des résultats")
+    parser.add_argument('--comparer', default=None, help="JSON d'une exécution précédente")
+    parser.add_argument('--seuil', type=float, default=SEUIL_REGRESSION, help="tolérance avant régression (0.20 = 20 %%)")
+    args = parser.parse_args()
+
+    dossier_donnees = Path(args.donnees or Path(tempfile.gettempdir()) / 'ventes-bench')
+    dossier_donnees.mkdir(parents=True, exist_ok=True)
+    rapport = {'environnement': environnement(), 'repetitions': args.repetitions, 'mesures': []}
+
+    with tempfile.TemporaryDirectory() as dossier_html:
+        for n_lignes in args.lignes:
+            chemin = dossier_donnees / f"ventes-{n_lignes}-{args.produits}-{args.regions}.{args.format}"
+            if not chemin.exists():
+                ecrire(chemin, n_lignes, args.produits, args.regions)
+            durees, lignes = mesurer(chemin, args.repetitions, dossier_html)
+            print(f"\n📏 {lignes:,} lignes, {args.produits:,} produits ({args.format})")
+            for etape, secondes in durees.items():
+                print(f"   {etape:<28} {secondes:>10.4f} s")
+                rapport['mesures'].append({
+                    'lignes': n_lignes, 'produits': args.produits, 'regions': args.regions,
+                    'etape': etape, 'secondes': secondes,
+                })
+
+    Path(args.sortie).write_text(json.dumps(rapport, indent=2))
+    print(f"\n💾 Résultats écrits dans {args.sortie}")
+
+    if args.comparer:
+        regressions = comparer(rapport, json.loads(Path(args.comparer).read_text()), args.seuil)
+        for mesure, ancienne in regressions:
+            print(f"❌ {mesure['lignes']:,} lignes, {mesure['etape']}: "
+                  f"{ancienne:.4f} s -> {mesure['secondes']:.4f} s (+{mesure['secondes'] / ancienne - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Aucune régression au-delà de {args.seuil:.0%} par rapport à {args.comparer}")
+
+
+if __name__ == '__main__':
+    main()
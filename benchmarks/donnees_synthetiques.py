@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Génère un tableau de ventes synthétique (produit, region, prix, qte).
+
+Les lignes sont produites et écrites par blocs : même 100 millions de
+lignes tiennent en mémoire bornée. La graine rend chaque fichier
+reproductible à l'identique.
+
+    python benchmarks/donnees_synthetiques.py ventes.parquet --lignes 10000000 --produits 1000
+"""
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TAILLE_BLOC = 1_000_000
+REGIONS = ['Nord', 'Sud', 'Est', 'Ouest', 'Centre', 'Outre-mer']
+
+
+def vocabulaire(n_produits, n_regions):
+    """Catégories des dimensions produit et region."""
+    regions = REGIONS[:n_regions] + [f"Région {i}" for i in range(len(REGIONS), n_regions)]
+    return [f"Produit {i:06d}" for i in range(n_produits)], regions
+
+
+def generer(n_lignes, n_produits=50, n_regions=4, graine=0, taille_bloc=TAILLE_BLOC):
+    """Générateur de blocs de ventes typés comme `source_donnees.SCHEMA_VENTES`."""
+    rng = np.random.default_rng(graine)
+    produits, regions = vocabulaire(n_produits, n_regions)
+    type_produit = pd.CategoricalDtype(produits)
+    type_region = pd.CategoricalDtype(regions)
+    # Prix unitaire fixe par produit, comme dans la feuille de ventes
+    prix_produit = rng.uniform(1, 500, n_produits).round(2).astype(np.float32)
+    for debut in range(0, n_lignes, taille_bloc):
+        taille = min(taille_bloc, n_lignes - debut)
+        codes_produit = rng.integers(0, n_produits, taille, dtype=np.int32)
+        yield pd.DataFrame({
+            'produit': pd.Categorical.from_codes(codes_produit, dtype=type_produit),
+            'region': pd.Categorical.from_codes(rng.integers(0, n_regions, taille, dtype=np.int32), dtype=type_region),
+            'prix': prix_produit[codes_produit],
+            'qte': rng.integers(1, 20, taille, dtype=np.int32),
+        }, index=pd.RangeIndex(debut, debut + taille))
+
+
+def ecrire(chemin, n_lignes, n_produits=50, n_regions=4, graine=0):
+    """Écrit le tableau synthétique en CSV ou en Parquet (selon l'extension)."""
+    chemin = Path(chemin)
+    temporaire = chemin.with_name(chemin.name + '.tmp')
+    blocs = generer(n_lignes, n_produits, n_regions, graine)
+    if chemin.suffix == '.parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for bloc in blocs:
+                table = pa.Table.from_pandas(bloc, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(temporaire, table.schema, compression='zstd')
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(temporaire, 'w', newline='') as fichier:
+            for i, bloc in enumerate(blocs):
+                bloc.to_csv(fichier, index=False, header=i == 0)
+    os.replace(temporaire, chemin)
+    return chemin
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('destination', help="fichier .csv ou .parquet à écrire")
+    parser.add_argument('--lignes', type=int, default=1_000_000)
+    parser.add_argument('--produits', type=int, default=50)
+    parser.add_argument('--regions', type=int, default=4)
+    parser.add_argument('--graine', type=int, default=0)
+    args = parser.parse_args()
+    chemin = ecrire(args.destination, args.lignes, args.produits, args.regions, args.graine)
+    print(f"✅ {chemin} écrit ({args.lignes:,} lignes, {chemin.stat().st_size:,} octets)")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Rapport du temps d'import des étapes d'app.py (`python -X importtime`).
+
+Chaque scénario importe, dans un interpréteur neuf, les modules dont a
+besoin une exécution : le calcul seul (`import app`, comme `--calcul-seul`)
+ou le calcul suivi des figures (`figures` et `rendu`, donc Plotly). Le
+rapport donne la durée totale d'import et les paquets les plus coûteux ;
+la meilleure de plusieurs répétitions est retenue.
+
+    python benchmarks/temps_demarrage.py
+    python benchmarks/temps_demarrage.py --repetitions 5 --sortie demarrage.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    'calcul seul': 'import app',
+    'calcul + figures': 'import app, figures, rendu',
+}
+
+
+def mesurer_imports(code):
+    """Durée totale d'import (µs) et temps cumulé de chaque paquet de premier niveau.
+
+    Le temps d'un paquet comprend celui des paquets qu'il importe lui-même
+    (pandas compte numpy) : les durées par paquet ne s'additionnent pas.
+    """
+    sortie = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=RACINE,
+                            capture_output=True, text=True, check=True).stderr
+    paquets = defaultdict(int)
+    total = 0
+    for ligne in sortie.splitlines():
+        if not ligne.startswith('import time:') or 'cumulative' in ligne:
+            continue
+        _, cumule, module = ligne[len('import time:'):].split('|')
+        nom = module.strip()
+        if '.' not in nom:
+            paquets[nom] += int(cumule)
+        # Seuls les imports sans retrait (faits par le scénario) s'additionnent
+        if not module[1:].startswith(' '):
+            total += int(cumule)
+    return total, dict(paquets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--premiers', type=int, default=8, help="nombre de paquets détaillés par scénario")
+    parser.add_argument('--sortie', default=None, help="fichier JSON des mesures")
+    args = parser.parse_args()
+
+    rapport = {}
+    for scenario, code in SCENARIOS.items():
+        total, paquets = min((mesurer_imports(code) for _ in range(args.repetitions)), key=lambda mesure: mesure[0])
+        rapport[scenario] = {'total_s': total / 1e6, 'paquets_s': {nom: us / 1e6 for nom, us in paquets.items()}}
+        print(f"\n⏱️ {scenario} ({code}) : {total / 1e6:.3f} s")
+        for nom, us in sorted(paquets.items(), key=lambda paquet: -paquet[1])[:args.premiers]:
+            print(f"   {nom:<24} {us / 1e6:8.3f} s")
+
+    reference = rapport['calcul + figures']['total_s']
+    if reference:
+        print(f"\n🚀 Calcul seul : {rapport['calcul seul']['total_s'] / reference:.0%} du temps d'import complet")
+    if args.sortie:
+        Path(args.sortie).write_text(json.dumps(rapport, indent=2))
+        print(f"💾 Mesures écrites dans {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Cache des résultats de requêtes SQL, invalidé par la version des données.
+
+Un résultat est indexé par le plan de la requête (SQL normalisé, paramètres
+liés) et par l'empreinte des colonnes qu'elle lit : tant que ni la requête
+ni ces colonnes ne changent, il est servi sans recalcul ; dès que les
+données changent, l'empreinte change et l'ancien résultat n'est plus
+jamais atteint.
+
+Deux niveaux : un LRU en mémoire borné à `taille` résultats, et, si un
+dossier est fourni, une copie sur disque (pickle) partagée entre les
+exécutions d'app.py.
+
+Variables d'environnement :
+    VENTES_CACHE_RESULTATS  active le niveau disque dans app.py
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fichiers import fichier_temporaire
+from moteur_sql import analyser_requete, colonnes_requises, executer_requetes, lier_parametres
+
+TAILLE_CACHE = 128
+DOSSIER_RESULTATS = Path(os.environ.get('VENTES_CACHE_DIR', '.cache')) / 'resultats'
+
+
+def _empreinte_colonne(serie):
+    empreinte = hashlib.sha256(f"{serie.name}|{serie.dtype}|{len(serie)}".encode())
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        empreinte.update(pd.util.hash_array(serie.cat.categories.to_numpy()).tobytes())
+        valeurs = serie.cat.codes.to_numpy()
+    else:
+        valeurs = serie.to_numpy()
+    if valeurs.dtype == object or not isinstance(valeurs, np.ndarray):
+        valeurs = pd.util.hash_array(np.asarray(valeurs, dtype=object))
+    empreinte.update(np.ascontiguousarray(valeurs).data)
+    return empreinte.hexdigest()
+
+
+def empreinte_donnees(df, colonnes=None, empreintes=None):
+    """Empreinte du contenu des colonnes `colonnes` (toutes par défaut).
+
+    `empreintes` mémorise celles de chaque colonne entre plusieurs appels
+    sur le même DataFrame.
+    """
+    empreintes = {} if empreintes is None else empreintes
+    empreinte = hashlib.sha256(str(len(df)).encode())
+    for colonne in sorted(df.columns if colonnes is None else colonnes):
+        if colonne not in empreintes:
+            empreintes[colonne] = _empreinte_colonne(df[colonne])
+        empreinte.update(empreintes[colonne].encode())
+    return empreinte.hexdigest()
+
+
+class CacheResultats:
+    """Résultats de requêtes en LRU mémoire, avec niveau disque optionnel."""
+
+    def __init__(self, taille=TAILLE_CACHE, dossier=None):
+        self.taille = taille
+        self.dossier = Path(dossier) if dossier is not None else None
+        self._memoire = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = self.echecs = 0
+
+    @staticmethod
+    def cle(plan, version):
+        return hashlib.sha256(f"{version}|{plan!r}".encode()).hexdigest()
+
+    def obtenir(self, cle):
+        """Copie du résultat en cache, ou None."""
+        with self._verrou:
+            resultat = self._memoire.get(cle)
+            if resultat is not None:
+                self._memoire.move_to_end(cle)
+        if resultat is None and self.dossier is not None:
+            try:
+                with open(self.dossier / f"{cle}.pkl", 'rb') as fichier:
+                    resultat = pickle.load(fichier)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                resultat = None
+            if resultat is not None:
+                self._memoriser(cle, resultat)
+        with self._verrou:
+            if resultat is None:
+                self.echecs += 1
+                return None
+            self.succes += 1
+        return resultat.copy()
+
+    def _memoriser(self, cle, resultat):
+        with self._verrou:
+            self._memoire[cle] = resultat
+            self._memoire.move_to_end(cle)
+            while len(self._memoire) > self.taille:
+                self._memoire.popitem(last=False)
+
+    def enregistrer(self, cle, resultat):
+        resultat = resultat.copy()
+        self._memoriser(cle, resultat)
+        if self.dossier is not None:
+            self.dossier.mkdir(parents=True, exist_ok=True)
+            chemin = self.dossier / f"{cle}.pkl"
+            with fichier_temporaire(chemin) as temporaire, open(temporaire, 'wb') as fichier:
+                pickle.dump(resultat, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def vider(self):
+        with self._verrou:
+            self._memoire.clear()
+        if self.dossier is not None:
+            for chemin in self.dossier.glob('*.pkl'):
+                chemin.unlink(missing_ok=True)
+
+    def executer_requetes(self, requetes, df, parametres=None, executer=executer_requetes):
+        """Comme `moteur_sql.executer_requetes`, en ne calculant que les requêtes absentes du cache.
+
+        Les requêtes manquantes sont exécutées ensemble par `executer`
+        (par exemple `parallele.executer_requetes_parallele`) pour conserver
+        le partage des passes.
+        """
+        plans = {nom: lier_parametres(analyser_requete(requete_sql.strip()), parametres)
+                 for nom, requete_sql in requetes.items()}
+        empreintes, cles, resultats = {}, {}, {}
+        for nom, plan in plans.items():
+            version = empreinte_donnees(df, colonnes_requises([requetes[nom]]), empreintes)
+            cles[nom] = self.cle(plan, version)
+            resultat = self.obtenir(cles[nom])
+            if resultat is not None:
+                resultats[nom] = resultat
+
+        manquantes = {nom: requetes[nom] for nom in plans if nom not in resultats}
+        if manquantes:
+            calcules = executer(manquantes, df) if parametres is None else executer(manquantes, df, parametres=parametres)
+            for nom, resultat in calcules.items():
+                self.enregistrer(cles[nom], resultat)
+                resultats[nom] = resultat
+        return {nom: resultats[nom] for nom in plans}
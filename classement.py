@@ -0,0 +1,64 @@
+"""Classements top-N des tables de résultats.
+
+`classer` calcule en un appel tous les classements demandés sur une table
+(top 5 par chiffre d'affaires, meilleur par quantité...) : chaque mesure
+est lue une fois avec `np.argpartition`, en O(lignes), pour le plus grand
+N demandé, puis seuls les N retenus sont triés. L'ordre et les ex aequo sont ceux de
+`DataFrame.nlargest(n, colonne)` : à valeur égale, la première ligne
+l'emporte ; les valeurs manquantes ne sont retenues que faute d'autres.
+
+Les sources lues par morceaux ou par partitions sont classées une fois
+leurs totaux par groupe fusionnés (cube de `cube.py`) : un produit réparti
+sur plusieurs morceaux n'est rangé que sur son total.
+
+    classements = classer(ventes_produit, {'top5_ca': ('chiffre_affaires', 5),
+                                           'meilleur_qte': ('quantite_vendue', 1)})
+"""
+import numpy as np
+import pandas as pd
+
+
+def indices_meilleurs(valeurs, n):
+    """Positions des `n` plus grandes valeurs, dans l'ordre de `nlargest`."""
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    manquantes = np.isnan(valeurs)
+    if manquantes.any():
+        candidats = np.flatnonzero(~manquantes)
+        valeurs_candidates = valeurs[candidats]
+    else:
+        candidats, valeurs_candidates = None, valeurs
+    total = len(valeurs_candidates)
+    if n <= 0:
+        return np.arange(0)
+    if not total:
+        # Comme nlargest : sans aucune valeur, les manquantes sont retenues dans l'ordre
+        return np.flatnonzero(manquantes)[:n]
+    if n < total:
+        seuil = valeurs_candidates[np.argpartition(valeurs_candidates, total - n)[total - n:]].min()
+        # Toutes les valeurs au niveau du seuil sont gardées pour départager les ex aequo par position
+        retenues = np.flatnonzero(valeurs_candidates >= seuil)
+    else:
+        retenues = np.arange(total)
+    retenues = retenues[np.argsort(-valeurs_candidates[retenues], kind='stable')[:n]]
+    if candidats is None:
+        return retenues
+    if n > total:
+        # Comme nlargest : faute de valeurs, les manquantes complètent le classement
+        return np.concatenate([candidats[retenues], np.flatnonzero(manquantes)[:n - total]])
+    return candidats[retenues]
+
+
+def classer(df, demandes):
+    """Calcule plusieurs classements d'une table.
+
+    `demandes` associe un nom à un couple (colonne, n). Retourne un
+    dictionnaire nom -> DataFrame des n meilleures lignes.
+    """
+    # Une seule sélection par colonne : le top 1 est le début du top 5
+    plus_grands = {}
+    for colonne, n in demandes.values():
+        if colonne not in df.columns:
+            raise KeyError(f"Colonne de classement inconnue: {colonne!r}")
+        plus_grands[colonne] = max(n, plus_grands.get(colonne, 0))
+    positions = {colonne: indices_meilleurs(df[colonne].to_numpy(), n) for colonne, n in plus_grands.items()}
+    return {nom: df.iloc[positions[colonne][:n]] for nom, (colonne, n) in demandes.items()}
@@ -0,0 +1,152 @@
+"""Cube pré-agrégé produit × région.
+
+Les ventes sont agrégées une seule fois par couple (produit, région) :
+quantités, chiffre d'affaires, nombre de lignes et statistiques de prix,
+conservés sous forme d'agrégats partiels combinables (voir
+`moteur_sql.partiels_de`). Toute requête agrégée dont les clés et le
+filtre ne portent que sur ces dimensions, et dont les agrégats figurent
+dans le cube, est ensuite calculée à partir du cube seul : totaux,
+ventilations par produit ou par région, classements et détail d'un
+produit dans une région. Le coût d'une requête dépend alors du nombre de
+cellules du cube, plus du nombre de lignes de ventes.
+
+`construire_partitions` ajoute une dimension de partition (client,
+région...) et découpe le résultat en un cube par valeur : les cubes de
+toutes les partitions sont calculés en une seule lecture des ventes.
+
+    cube = CubeVentes.construire(donnees)
+    cube.executer("SELECT region, SUM(qte) AS q FROM ventes WHERE produit = 'P8' GROUP BY region")
+    cube.detail(produit='P8')
+"""
+from moteur_sql import (
+    Agregat, ErreurSQL, analyser_requete, colonnes_de, combiner_partiels, completer_agregats,
+    executer_requetes, filtrer, finaliser, formater, lier_parametres, partiels_du_plan,
+)
+
+DIMENSIONS = ('produit', 'region')
+
+AGREGATS_CUBE = """
+        SUM(qte) AS quantite_vendue,
+        SUM(prix * qte) AS chiffre_affaires,
+        COUNT(*) AS lignes,
+        SUM(prix) AS somme_prix,
+        COUNT(prix) AS nombre_prix,
+        MIN(prix) AS prix_min,
+        MAX(prix) AS prix_max"""
+
+
+def sql_cube(dimensions=DIMENSIONS):
+    """Requête du cube regroupé par `dimensions`."""
+    cles = ', '.join(dimensions)
+    return f"""
+    SELECT
+        {cles},{AGREGATS_CUBE}
+    FROM donnees
+    GROUP BY {cles}
+"""
+
+
+SQL_CUBE = sql_cube()
+
+
+class CubeVentes:
+    """Agrégats partiels par cellule (produit, région) et requêtes servies par le cube."""
+
+    def __init__(self, table, dimensions, partiels):
+        self.table = table
+        self.dimensions = tuple(dimensions)
+        self.partiels = tuple(partiels)
+
+    @classmethod
+    def construire(cls, source, executer=executer_requetes, requete_sql=SQL_CUBE):
+        """Calcule le cube en une lecture de `source`.
+
+        `executer(requetes, source)` exécute le regroupement, par exemple
+        `parallele.executer_requetes_parallele` sur un DataFrame ou
+        `moteur_sql.executer_requetes_par_morceaux` sur un flux de morceaux.
+        """
+        return cls.depuis_resultat(executer({'cube': requete_sql}, source)['cube'], requete_sql)
+
+    @classmethod
+    def depuis_resultat(cls, resultat, requete_sql=SQL_CUBE):
+        """Cube à partir du résultat déjà calculé de `requete_sql` (mode incrémental, cache...)."""
+        plan = analyser_requete(requete_sql.strip())
+        if any(agregat.fonction == 'AVG' for agregat in plan.agregats):
+            raise ErreurSQL("Le cube ne contient que des agrégats combinables (SUM, COUNT, MIN, MAX)")
+        noms = {nom: formater(expr) for nom, expr in plan.selection if isinstance(expr, Agregat)}
+        return cls(resultat.rename(columns=noms), plan.cles, plan.agregats)
+
+    @classmethod
+    def construire_partitions(cls, source, cle, executer=executer_requetes):
+        """Un cube par valeur de la colonne `cle`, calculés en une seule lecture de `source`.
+
+        Retourne un dictionnaire valeur -> CubeVentes ; la colonne `cle`
+        reste une dimension de chaque cube, constante dans la partition.
+        """
+        dimensions = DIMENSIONS if cle in DIMENSIONS else (cle, *DIMENSIONS)
+        return cls.construire(source, executer, sql_cube(dimensions)).partitionner(cle)
+
+    def partitionner(self, cle):
+        """Découpe le cube selon une de ses dimensions : valeur -> CubeVentes."""
+        if cle not in self.dimensions:
+            raise ErreurSQL(f"Dimension de partition inconnue: {cle!r}")
+        return {
+            valeur: type(self)(cellules.reset_index(drop=True), self.dimensions, self.partiels)
+            for valeur, cellules in self.table.groupby(cle, observed=True, sort=True)
+        }
+
+    def __len__(self):
+        return len(self.table)
+
+    def peut_repondre(self, plan):
+        """Indique si le plan se calcule à partir du cube seul."""
+        if not plan.est_agregee or not set(plan.cles) <= set(self.dimensions):
+            return False
+        if plan.filtre is not None and not set(colonnes_de(plan.filtre)) <= set(self.dimensions):
+            return False
+        return all(partiel in self.partiels for partiel in partiels_du_plan(plan))
+
+    def repondre(self, plan):
+        """Résultat d'un plan calculé à partir des cellules du cube."""
+        if not self.peut_repondre(plan):
+            raise ErreurSQL("Requête hors du cube: clés, filtre ou agrégats non disponibles")
+        cellules = filtrer(plan, self.table)
+        source = combiner_partiels(cellules, plan.cles, partiels_du_plan(plan))
+        source, colonnes_agregats = completer_agregats(plan, source)
+        return finaliser(plan, source, colonnes_agregats)
+
+    def executer(self, requete_sql, parametres=None):
+        return self.repondre(lier_parametres(analyser_requete(requete_sql.strip()), parametres))
+
+    def executer_requetes(self, requetes, df=None, executer=executer_requetes, parametres=None):
+        """Répond aux requêtes depuis le cube ; les autres sont exécutées sur `df`.
+
+        Retourne un dictionnaire nom -> DataFrame dans l'ordre des requêtes.
+        """
+        plans = {nom: lier_parametres(analyser_requete(requete_sql.strip()), parametres)
+                 for nom, requete_sql in requetes.items()}
+        resultats = {nom: self.repondre(plan) for nom, plan in plans.items() if self.peut_repondre(plan)}
+        autres = {nom: requetes[nom] for nom in plans if nom not in resultats}
+        if autres:
+            if df is None:
+                raise ErreurSQL(f"Requêtes hors du cube sans données brutes: {', '.join(autres)}")
+            resultats.update(executer(autres, df) if parametres is None else executer(autres, df, parametres=parametres))
+        return {nom: resultats[nom] for nom in plans}
+
+    def detail(self, **valeurs):
+        """Descente dans le cube : ventes des autres dimensions pour les valeurs fixées.
+
+        `cube.detail(produit='P8')` ventile le produit P8 par région,
+        `cube.detail()` donne toutes les cellules, triées par chiffre d'affaires.
+        """
+        inconnues = set(valeurs) - set(self.dimensions)
+        if inconnues:
+            raise ErreurSQL(f"Dimension(s) inconnue(s): {', '.join(sorted(inconnues))}")
+        cles = [dimension for dimension in self.dimensions if dimension not in valeurs]
+        selection = cles + ['SUM(qte) AS quantite_vendue', 'SUM(prix * qte) AS chiffre_affaires', 'COUNT(*) AS lignes']
+        requete_sql = f"SELECT {', '.join(selection)} FROM cube"
+        if valeurs:
+            requete_sql += ' WHERE ' + ' AND '.join(f"{dimension} = :{dimension}" for dimension in valeurs)
+        if cles:
+            requete_sql += f" GROUP BY {', '.join(cles)}"
+        return self.executer(requete_sql + ' ORDER BY chiffre_affaires DESC', valeurs)
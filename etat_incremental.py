@@ -0,0 +1,145 @@
+"""Maintenance incrémentale des agrégats quand des ventes sont ajoutées.
+
+L'état persistant contient, pour un lot de requêtes donné, les agrégats
+partiels de chaque passe (sommes par produit, par région, total...), le
+nombre de lignes déjà intégrées (marque de niveau haut) et une empreinte
+des dernières lignes intégrées. À l'exécution suivante, seules les lignes
+au-delà de la marque sont chargées, agrégées et fusionnées dans l'état :
+le coût est proportionnel aux nouvelles lignes, pas à tout l'historique.
+
+L'empreinte des `LIGNES_ANCRE` dernières lignes détecte une source
+réécrite au lieu d'être complétée ; l'état est alors recalculé en
+entier. `verifier_etat` compare sur demande l'état incrémental avec un
+recalcul complet.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from fichiers import fichier_temporaire
+from moteur_sql import (
+    ErreurSQL, analyser_requete, calculer_passes, executer_requetes, finaliser_passes,
+    fusionner_partiels, planifier_lot,
+)
+
+CHEMIN_ETAT = Path(os.environ.get('VENTES_CACHE_DIR', '.cache')) / 'etat_agregats.pkl'
+LIGNES_ANCRE = 64
+
+
+def signature_lot(requetes, colonnes=None):
+    """Empreinte d'un lot de requêtes : un état ne sert qu'au même lot."""
+    normalisees = {nom: ' '.join(requete_sql.split()) for nom, requete_sql in requetes.items()}
+    contenu = json.dumps({'requetes': normalisees, 'colonnes': colonnes}, sort_keys=True)
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+def empreinte_lignes(df):
+    """Empreinte du contenu de quelques lignes, indépendante de leur index."""
+    valeurs = pd.util.hash_pandas_object(df.reset_index(drop=True), index=False)
+    return hashlib.sha256(valeurs.to_numpy().tobytes()).hexdigest()
+
+
+def lire_etat(chemin=CHEMIN_ETAT):
+    """État persistant, ou None s'il n'existe pas ou est illisible."""
+    try:
+        with open(chemin, 'rb') as fichier:
+            return pickle.load(fichier)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def ecrire_etat(etat, chemin=CHEMIN_ETAT):
+    chemin = Path(chemin)
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    with fichier_temporaire(chemin) as temporaire, open(temporaire, 'wb') as fichier:
+        pickle.dump(etat, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def executer_requetes_incremental(requetes, charger, chemin=CHEMIN_ETAT, colonnes=None):
+    """Exécute un lot de requêtes agrégées en ne traitant que les nouvelles lignes.
+
+    `charger(a_partir_de)` doit retourner les lignes de la source à partir
+    de la position donnée (0 pour toute la table), par exemple
+    `lambda debut: charger_donnees(colonnes=..., a_partir_de=debut)`.
+
+    Retourne les résultats (comme `executer_requetes`) et un dictionnaire
+    décrivant la mise à jour : mode 'incremental' ou 'complet', lignes
+    traitées et total de lignes intégrées.
+    """
+    plans = {nom: analyser_requete(requete_sql.strip()) for nom, requete_sql in requetes.items()}
+    for nom, plan in plans.items():
+        if not plan.est_agregee:
+            raise ErreurSQL(f"{nom}: seules les requêtes agrégées peuvent être maintenues incrémentalement")
+    passes = planifier_lot(plans)
+    signature = signature_lot(requetes, colonnes)
+
+    etat = lire_etat(chemin)
+    raison = None
+    if etat is None:
+        raison = "aucun état"
+    elif etat['signature'] != signature:
+        raison = "requêtes modifiées"
+    else:
+        debut = max(etat['lignes'] - LIGNES_ANCRE, 0)
+        lignes = charger(debut)
+        ancre = lignes.iloc[:etat['lignes'] - debut]
+        if len(ancre) != etat['lignes'] - debut or empreinte_lignes(ancre) != etat['ancre']:
+            raison = "source réécrite"
+
+    if raison is None:
+        nouvelles = lignes.iloc[etat['lignes'] - debut:]
+        partiels = etat['partiels']
+        if len(nouvelles):
+            partiels = fusionner_partiels(passes, partiels, calculer_passes(plans, passes, nouvelles))
+        total = etat['lignes'] + len(nouvelles)
+        queue = lignes.iloc[max(len(lignes) - LIGNES_ANCRE, 0):] if len(nouvelles) else ancre
+        mise_a_jour = {'mode': 'incremental', 'lignes_traitees': len(nouvelles), 'lignes_total': total}
+    else:
+        lignes = charger(0)
+        partiels = calculer_passes(plans, passes, lignes)
+        total = len(lignes)
+        queue = lignes.iloc[max(total - LIGNES_ANCRE, 0):]
+        mise_a_jour = {'mode': 'complet', 'raison': raison, 'lignes_traitees': total, 'lignes_total': total}
+
+    ecrire_etat({
+        'signature': signature,
+        'lignes': total,
+        'ancre': empreinte_lignes(queue),
+        'partiels': partiels,
+        'mis_a_jour_le': time.time(),
+    }, chemin)
+
+    resultats = finaliser_passes(plans, passes, partiels)
+    return {nom: resultats[nom] for nom in plans}, mise_a_jour
+
+
+def verifier_etat(requetes, charger, chemin=CHEMIN_ETAT, colonnes=None):
+    """Compare l'état incrémental avec un recalcul complet.
+
+    Retourne la liste des requêtes dont le résultat diffère (vide si l'état
+    est cohérent).
+    """
+    etat = lire_etat(chemin)
+    if etat is None or etat['signature'] != signature_lot(requetes, colonnes):
+        raise ValueError(f"Aucun état valide pour ce lot de requêtes dans {chemin}")
+    lignes = charger(0)
+    if len(lignes) < etat['lignes']:
+        return list(requetes)
+    plans = {nom: analyser_requete(requete_sql.strip()) for nom, requete_sql in requetes.items()}
+    incremental = finaliser_passes(plans, planifier_lot(plans), etat['partiels'])
+    complet = executer_requetes(requetes, lignes.iloc[:etat['lignes']])
+
+    differences = []
+    for nom in requetes:
+        try:
+            pd.testing.assert_frame_equal(
+                incremental[nom], complet[nom], check_exact=False, check_dtype=False, check_categorical=False
+            )
+        except AssertionError:
+            differences.append(nom)
+    return differences
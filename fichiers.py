@@ -0,0 +1,40 @@
+"""Écriture atomique des fichiers produits (pages, caches, états, catalogues).
+
+Le contenu est écrit dans un fichier temporaire unique du répertoire de
+destination (`tempfile.mkstemp`) puis renommé sur le chemin final : un
+lecteur voit l'ancien ou le nouveau fichier, jamais un fichier à moitié
+écrit, et deux écritures simultanées vers le même chemin ne se mélangent
+pas.
+
+    ecrire_atomique(Path('html/index.html'), html)
+    with fichier_temporaire(chemin) as temporaire:
+        df.to_parquet(temporaire)
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def fichier_temporaire(chemin):
+    """Chemin temporaire à remplir ; il remplace `chemin` si le bloc réussit."""
+    chemin = Path(chemin)
+    descripteur, temporaire = tempfile.mkstemp(dir=chemin.parent, prefix=f".{chemin.name}.", suffix='.tmp')
+    os.close(descripteur)
+    try:
+        yield Path(temporaire)
+        os.chmod(temporaire, 0o644)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        Path(temporaire).unlink(missing_ok=True)
+        raise
+
+
+def ecrire_atomique(chemin, contenu):
+    """Écrit `contenu` (texte, en UTF-8, ou octets) dans `chemin`."""
+    with fichier_temporaire(chemin) as temporaire:
+        if isinstance(contenu, str):
+            temporaire.write_text(contenu, encoding='utf-8')
+        else:
+            temporaire.write_bytes(contenu)
@@ -0,0 +1,266 @@
+"""Construction des figures Plotly du dashboard des ventes.
+
+Chaque figure est produite par une fonction de module prenant les
+résultats des requêtes en arguments : elles peuvent ainsi être
+construites dans un autre processus (voir `rendu.exporter_figures`).
+
+Les tables sont d'abord bornées par `limiter_barres` : au-delà de
+`MAX_BARRES` produits ou régions, seuls les meilleurs sont tracés et le
+reste est regroupé en une barre « Autres ». La taille des pages et le
+temps de rendu ne dépendent plus du nombre de produits (les barres n'ont
+pas de variante WebGL dans Plotly : c'est le nombre de points qu'il faut
+borner).
+
+Variables d'environnement :
+    VENTES_MAX_BARRES  nombre maximal de barres ou de secteurs par trace (50)
+"""
+import os
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from classement import classer
+
+MAX_BARRES = int(os.environ.get('VENTES_MAX_BARRES', 50))
+ETIQUETTE_AUTRES = 'Autres'
+
+
+def limiter_barres(df, etiquette, mesure, k=None):
+    """Les `k` meilleures lignes selon `mesure`, suivies d'une ligne « Autres ».
+
+    Les colonnes numériques des lignes regroupées sont sommées. Retourne la
+    table bornée et le nombre de lignes regroupées (0 si la table tenait
+    déjà en `k` lignes, auquel cas elle est retournée telle quelle).
+    """
+    k = MAX_BARRES if k is None else k
+    if len(df) <= k:
+        return df, 0
+    meilleurs = classer(df, {'meilleurs': (mesure, k)})['meilleurs']
+    reste = df.drop(index=meilleurs.index)
+    autres = {colonne: reste[colonne].sum() for colonne in df.columns
+              if colonne != etiquette and pd.api.types.is_numeric_dtype(df[colonne])}
+    autres[etiquette] = f"{ETIQUETTE_AUTRES} ({len(reste):,})"
+    table = pd.concat([meilleurs.astype({etiquette: str}), pd.DataFrame([autres])], ignore_index=True)
+    return table[list(df.columns)], len(reste)
+
+
+def _titre(titre, regroupes, k=None):
+    if not regroupes:
+        return titre
+    return f"{titre} — top {MAX_BARRES if k is None else k}, {regroupes:,} autres regroupés"
+
+
+def dashboard(ventes_region, ventes_produit, quantite_produit, top5_ca_produits, top5_qte_produits):
+    """Dashboard principal : six graphiques sur une grille 3 x 2."""
+    ventes_region_ca, _ = limiter_barres(ventes_region, 'region', 'chiffre_affaires')
+    ventes_region_qte, _ = limiter_barres(ventes_region, 'region', 'quantite_vendue')
+    ventes_produit, _ = limiter_barres(ventes_produit, 'produit', 'chiffre_affaires')
+    quantite_produit, _ = limiter_barres(quantite_produit, 'produit', 'quantite_vendue')
+    fig = make_subplots(
+        rows=3, cols=2,
+        subplot_titles=(
+            '📊 CA par région',
+            '📦 Quantité vendue par région',
+            '💰 CA par produit',
+            '📈 Quantité vendue par produit',
+            '🏆 Top 5 produits par CA',
+            '🥇 Top 5 produits par quantité'
+        ),
+        specs=[
+            [{"type": "pie"}, {"type": "bar"}],
+            [{"type": "bar"}, {"type": "bar"}],
+            [{"type": "bar"}, {"type": "bar"}]
+        ],
+        vertical_spacing=0.10,
+        horizontal_spacing=0.08
+    )
+
+    # 1. Pie chart - CA par région
+    fig.add_trace(
+        go.Pie(
+            values=ventes_region_ca['chiffre_affaires'],
+            labels=ventes_region_ca['region'],
+            name="CA Région",
+            textinfo='label+percent+value',
+            hovertemplate='<b>%{label}</b><br>CA: %{value:,.0f} €<br>Part: %{percent}<extra></extra>'
+        ),
+        row=1, col=1
+    )
+
+    # 2. Bar chart - Quantité par région
+    fig.add_trace(
+        go.Bar(
+            x=ventes_region_qte['region'],
+            y=ventes_region_qte['quantite_vendue'],
+            name="Quantité Région",
+            marker_color='#1f77b4',
+            hovertemplate='<b>%{x}</b><br>Quantité: %{y:,.0f} units<extra></extra>'
+        ),
+        row=1, col=2
+    )
+
+    # 3. Bar chart - CA par produit
+    fig.add_trace(
+        go.Bar(
+            x=ventes_produit['produit'],
+            y=ventes_produit['chiffre_affaires'],
+            name="CA Produit",
+            marker_color='#2ca02c',
+            hovertemplate='<b>%{x}</b><br>CA: %{y:,.0f} €<extra></extra>'
+        ),
+        row=2, col=1
+    )
+
+    # 4. Bar chart - Quantité par produit
+    fig.add_trace(
+        go.Bar(
+            x=quantite_produit['produit'],
+            y=quantite_produit['quantite_vendue'],
+            name="Quantité Produit",
+            marker_color='#9467bd',
+            hovertemplate='<b>%{x}</b><br>Quantité: %{y:,.0f} units<extra></extra>'
+        ),
+        row=2, col=2
+    )
+
+    # 5. Top 5 produits par CA
+    fig.add_trace(
+        go.Bar(
+            x=top5_ca_produits['produit'],
+            y=top5_ca_produits['chiffre_affaires'],
+            name="Top 5 CA Produits",
+            marker_color='#ff7f0e',
+            hovertemplate='<b>%{x}</b><br>CA: %{y:,.0f} €<extra></extra>'
+        ),
+        row=3, col=1
+    )
+
+    # 6. Top 5 produits par quantité
+    fig.add_trace(
+        go.Bar(
+            x=top5_qte_produits['produit'],
+            y=top5_qte_produits['quantite_vendue'],
+            name="Top 5 Quantité Produits",
+            marker_color='#e377c2',
+            hovertemplate='<b>%{x}</b><br>Quantité: %{y:,.0f} units<extra></extra>'
+        ),
+        row=3, col=2
+    )
+
+    # Mise en page élégante
+    fig.update_layout(
+        height=1200,
+        width=1400,
+        title_text="📈 ANALYSE COMPLÈTE DES VENTES - DASHBOARD",
+        title_font_size=20,
+        title_x=0.5,
+        showlegend=False,
+        font=dict(family="Arial", size=10),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)'
+    )
+
+    # Amélioration des axes
+    fig.update_xaxes(tickangle=45)
+    fig.update_yaxes(tickformat=",.0f")
+    return fig
+
+
+def _mise_en_forme(fig):
+    """Mise en forme commune des visualisations individuelles."""
+    fig.update_layout(
+        font=dict(family="Arial", size=12),
+        hoverlabel=dict(bgcolor="white", font_size=12),
+        xaxis_tickangle=45
+    )
+    return fig
+
+
+def quantite_region(ventes_region):
+    ventes_region, regroupes = limiter_barres(ventes_region, 'region', 'quantite_vendue')
+    return _mise_en_forme(px.pie(
+        ventes_region,
+        values='quantite_vendue',
+        names='region',
+        title=_titre('📦 Quantité vendue par région', regroupes),
+        hover_data=['chiffre_affaires'],
+        labels={'quantite_vendue': 'Quantité', 'chiffre_affaires': 'CA'}
+    ))
+
+
+def ca_region(ventes_region):
+    ventes_region, regroupes = limiter_barres(ventes_region, 'region', 'chiffre_affaires')
+    return _mise_en_forme(px.pie(
+        ventes_region,
+        values='chiffre_affaires',
+        names='region',
+        title=_titre('💰 Chiffre d\'affaires par région', regroupes),
+        hover_data=['quantite_vendue'],
+        labels={'quantite_vendue': 'Quantité', 'chiffre_affaires': 'CA'}
+    ))
+
+
+def ca_produit(ventes_produit):
+    ventes_produit, regroupes = limiter_barres(ventes_produit, 'produit', 'chiffre_affaires')
+    return _mise_en_forme(px.bar(
+        ventes_produit,
+        x='produit',
+        y='chiffre_affaires',
+        title=_titre('📊 Chiffre d\'affaires par produit', regroupes),
+        hover_data=['quantite_vendue'],
+        labels={'quantite_vendue': 'Quantité', 'chiffre_affaires': 'CA'},
+        color='chiffre_affaires',
+        color_continuous_scale='Viridis'
+    ))
+
+
+def quantite_produit(quantite_produit):
+    quantite_produit, regroupes = limiter_barres(quantite_produit, 'produit', 'quantite_vendue')
+    return _mise_en_forme(px.bar(
+        quantite_produit,
+        x='produit',
+        y='quantite_vendue',
+        title=_titre('📈 Quantité vendue par produit', regroupes),
+        labels={'quantite_vendue': 'Quantité vendue'},
+        color='quantite_vendue',
+        color_continuous_scale='Blues'
+    ))
+
+
+def top5_ca_produits(top5_ca_produits):
+    return _mise_en_forme(px.bar(
+        top5_ca_produits,
+        x='produit',
+        y='chiffre_affaires',
+        title='🏆 Top 5 produits par chiffre d\'affaires',
+        labels={'chiffre_affaires': 'Chiffre d\'affaires (€)'},
+        color='chiffre_affaires',
+        color_continuous_scale='Oranges'
+    ))
+
+
+def top5_quantite_produits(top5_qte_produits):
+    return _mise_en_forme(px.bar(
+        top5_qte_produits,
+        x='produit',
+        y='quantite_vendue',
+        title='🥇 Top 5 produits par quantité vendue',
+        labels={'quantite_vendue': 'Quantité vendue'},
+        color='quantite_vendue',
+        color_continuous_scale='Purples'
+    ))
+
+
+def evolution(serie, periode):
+    """Courbe du chiffre d'affaires par jour, semaine ou mois (WebGL au-delà de 1 000 points)."""
+    return _mise_en_forme(px.line(
+        serie,
+        x=periode,
+        y='chiffre_affaires',
+        title=f"📅 Chiffre d'affaires par {periode}",
+        labels={'chiffre_affaires': "Chiffre d'affaires (€)", periode: periode.capitalize()},
+        hover_data=['quantite_vendue'],
+        markers=len(serie) <= 60,
+    ))
@@ -0,0 +1,141 @@
+"""Instantané binaire du tableau des ventes, lu par projection en mémoire.
+
+Chaque colonne typée est écrite dans un fichier .npy ; les colonnes
+catégorielles (`produit`, `region`) sous forme de codes entiers, leur
+dictionnaire étant conservé dans le manifeste `instantane.json` avec le
+nombre de lignes et l'empreinte de la source. `charger_instantane`
+projette les fichiers en mémoire (`np.load(mmap_mode='r')`) et construit
+le DataFrame sans copie : le chargement ne lit rien, les pages sont lues à
+la demande et le cache de pages du système est partagé par tous les
+processus qui lisent le même instantané (app.py, `serve.py --api`,
+notebooks).
+
+    ecrire_instantane(donnees, '.cache/ventes.instantane')
+    donnees = charger_instantane('.cache/ventes.instantane', colonnes=['produit', 'qte'])
+
+Les tableaux sont en lecture seule. Les fichiers de colonnes portent un
+jeton propre à chaque écriture et le manifeste est remplacé en dernier :
+un lecteur voit l'ancien ou le nouvel instantané, jamais un mélange.
+
+    python instantane.py .cache/ventes.instantane --source ventes.csv
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fichiers import ecrire_atomique
+
+MANIFESTE = 'instantane.json'
+VERSION = 1
+
+
+def est_instantane(chemin):
+    """Indique si `chemin` est un répertoire d'instantané."""
+    return (Path(chemin) / MANIFESTE).is_file()
+
+
+def lire_manifeste(dossier):
+    manifeste = json.loads((Path(dossier) / MANIFESTE).read_text())
+    if manifeste.get('version') != VERSION:
+        raise ValueError(f"Version d'instantané non prise en charge: {manifeste.get('version')!r}")
+    return manifeste
+
+
+def empreinte_instantane(dossier):
+    """Empreinte de la source de l'instantané, ou None s'il est absent ou illisible."""
+    try:
+        return lire_manifeste(dossier).get('empreinte')
+    except (OSError, ValueError):
+        return None
+
+
+def ecrire_instantane(df, dossier, empreinte=None):
+    """Écrit les colonnes de `df` dans le répertoire `dossier`.
+
+    Les colonnes texte sont converties en catégories. `empreinte` identifie
+    la source (somme de contrôle du CSV...) pour savoir si l'instantané est
+    à jour (voir `source_donnees.charger_donnees`).
+    """
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    jeton = os.urandom(4).hex()
+    colonnes = {}
+    for nom in df.columns:
+        serie = df[nom]
+        if serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+            serie = serie.astype('category')
+        description = {'fichier': f"{nom}.{jeton}.npy"}
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valeurs = serie.cat.codes.to_numpy()
+            description['categories'] = serie.cat.categories.tolist()
+            description['ordonnee'] = bool(serie.cat.ordered)
+        else:
+            valeurs = serie.to_numpy()
+        np.save(dossier / description['fichier'], np.ascontiguousarray(valeurs), allow_pickle=False)
+        colonnes[nom] = description
+
+    manifeste = {'version': VERSION, 'lignes': len(df), 'empreinte': empreinte, 'colonnes': colonnes}
+    ecrire_atomique(dossier / MANIFESTE, json.dumps(manifeste, indent=2, ensure_ascii=False))
+
+    # Les colonnes des écritures précédentes ne sont plus référencées ; les
+    # lecteurs qui les projettent encore gardent leur vue (sauf sous Windows,
+    # où elles ne seront supprimées qu'à la prochaine écriture)
+    actuels = {description['fichier'] for description in colonnes.values()}
+    for chemin in dossier.glob('*.npy'):
+        if chemin.name not in actuels:
+            try:
+                chemin.unlink()
+            except OSError:
+                pass
+    return dossier
+
+
+def _colonne(dossier, description):
+    valeurs = np.load(Path(dossier) / description['fichier'], mmap_mode='r', allow_pickle=False)
+    if 'categories' not in description:
+        return valeurs
+    type_ = pd.CategoricalDtype(description['categories'], ordered=description['ordonnee'])
+    return pd.Categorical.from_codes(valeurs, dtype=type_, validate=False)
+
+
+def charger_instantane(dossier, colonnes=None, a_partir_de=0, jusqu_a=None):
+    """DataFrame projeté en mémoire, sans copie, des lignes [a_partir_de, jusqu_a).
+
+    `colonnes` limite les fichiers ouverts ; l'index conserve la numérotation
+    des lignes de l'instantané.
+    """
+    manifeste = lire_manifeste(dossier)
+    noms = list(colonnes) if colonnes is not None else list(manifeste['colonnes'])
+    inconnues = [nom for nom in noms if nom not in manifeste['colonnes']]
+    if inconnues:
+        raise KeyError(f"Colonne(s) absente(s) de l'instantané: {', '.join(inconnues)}")
+    fin = manifeste['lignes'] if jusqu_a is None else min(jusqu_a, manifeste['lignes'])
+    debut = min(a_partir_de, fin)
+    index = pd.RangeIndex(debut, fin)
+    series = {nom: pd.Series(_colonne(dossier, manifeste['colonnes'][nom])[debut:fin], index=index, copy=False)
+              for nom in noms}
+    return pd.DataFrame(series, index=index, copy=False)
+
+
+def morceaux_instantane(dossier, taille=1_000_000, colonnes=None):
+    """Vues successives de `taille` lignes de l'instantané."""
+    lignes = lire_manifeste(dossier)['lignes']
+    for debut in range(0, lignes, taille):
+        yield charger_instantane(dossier, colonnes, debut, debut + taille)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from source_donnees import charger_donnees
+
+    parser = argparse.ArgumentParser(description="Écrit un instantané binaire du tableau des ventes")
+    parser.add_argument('destination', help="répertoire de l'instantané")
+    parser.add_argument('--source', help="URL, CSV ou Parquet source (par défaut VENTES_SOURCE ou la feuille publiée)")
+    args = parser.parse_args()
+    chemin = ecrire_instantane(charger_donnees(args.source), args.destination)
+    taille = sum(fichier.stat().st_size for fichier in chemin.iterdir())
+    print(f"✅ Instantané {chemin} écrit ({taille:,} octets)")
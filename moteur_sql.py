@@ -0,0 +1,1133 @@
+"""Moteur SQL minimal pour interroger un DataFrame pandas.
+
+Le sous-ensemble supporté couvre les requêtes analytiques du projet :
+
+    SELECT <expressions> FROM <table>
+    [WHERE <condition>]
+    [GROUP BY <colonnes>]
+    [HAVING <condition>]
+    [ORDER BY <expression> [ASC|DESC], ...]
+    [LIMIT <n>]
+
+avec les agrégats SUM, COUNT, AVG, MIN et MAX, les opérateurs arithmétiques,
+les comparaisons, IN, AND/OR/NOT, les littéraux numériques ou chaînes et
+des paramètres nommés (`WHERE region = :region`) liés à l'exécution.
+
+La requête est d'abord analysée en un plan logique (`PlanRequete`), puis
+exécutée de façon vectorisée : filtre booléen, une seule réduction groupée
+pour l'ensemble des agrégats, puis projection, HAVING, tri et LIMIT sur le
+résultat agrégé. Toute construction non supportée lève `ErreurSQL`.
+Quand les clés de regroupement sont catégorielles (`produit`, `region`),
+la réduction travaille sur leurs codes entiers (`np.bincount`) sans
+hacher de chaînes ; les étiquettes ne sont décodées qu'à la fin.
+
+`executer_requetes` exécute un lot de requêtes en partageant les lectures :
+une seule réduction par regroupement distinct, les requêtes plus grossières
+étant dérivées des agrégats partiels déjà calculés. Ces partiels étant
+combinables, `executer_requetes_par_morceaux` applique le même lot à une
+source lue morceau par morceau, en mémoire bornée.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+class ErreurSQL(ValueError):
+    """Requête SQL invalide ou hors du sous-ensemble supporté."""
+
+
+# ---------------------------------------------------------------------------
+# Arbre d'expressions
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Colonne:
+    nom: str
+
+
+@dataclass(frozen=True)
+class Litteral:
+    valeur: object
+
+
+@dataclass(frozen=True)
+class Etoile:
+    pass
+
+
+@dataclass(frozen=True)
+class Unaire:
+    operateur: str
+    operande: object
+
+
+@dataclass(frozen=True)
+class Binaire:
+    operateur: str
+    gauche: object
+    droite: object
+
+
+@dataclass(frozen=True)
+class DansListe:
+    expression: object
+    valeurs: tuple
+    negation: bool = False
+
+
+@dataclass(frozen=True)
+class Parametre:
+    nom: str
+
+
+@dataclass(frozen=True)
+class Agregat:
+    fonction: str
+    argument: object  # None pour COUNT(*)
+
+
+FONCTIONS_AGREGAT = {'SUM': 'sum', 'COUNT': 'count', 'AVG': 'mean', 'MIN': 'min', 'MAX': 'max'}
+
+
+def formater(expr):
+    """Rend une expression sous forme de texte SQL (nom de colonne par défaut)."""
+    if isinstance(expr, Colonne):
+        return expr.nom
+    if isinstance(expr, Litteral):
+        return f"'{expr.valeur}'" if isinstance(expr.valeur, str) else str(expr.valeur)
+    if isinstance(expr, Etoile):
+        return '*'
+    if isinstance(expr, Parametre):
+        return f":{expr.nom}"
+    if isinstance(expr, Agregat):
+        argument = '*' if expr.argument is None else formater(expr.argument)
+        return f"{expr.fonction}({argument})"
+    if isinstance(expr, Unaire):
+        separateur = ' ' if expr.operateur == 'NOT' else ''
+        return f"{expr.operateur}{separateur}{formater(expr.operande)}"
+    if isinstance(expr, Binaire):
+        return f"({formater(expr.gauche)} {expr.operateur} {formater(expr.droite)})"
+    if isinstance(expr, DansListe):
+        valeurs = ', '.join(formater(v) for v in expr.valeurs)
+        negation = 'NOT ' if expr.negation else ''
+        return f"{formater(expr.expression)} {negation}IN ({valeurs})"
+    raise ErreurSQL(f"Expression inconnue: {expr!r}")
+
+
+def agregats_de(expr):
+    """Liste les agrégats contenus dans une expression, dans l'ordre d'apparition."""
+    if isinstance(expr, Agregat):
+        return [expr]
+    if isinstance(expr, Unaire):
+        return agregats_de(expr.operande)
+    if isinstance(expr, Binaire):
+        return agregats_de(expr.gauche) + agregats_de(expr.droite)
+    if isinstance(expr, DansListe):
+        trouves = agregats_de(expr.expression)
+        for valeur in expr.valeurs:
+            trouves += agregats_de(valeur)
+        return trouves
+    return []
+
+
+def colonnes_de(expr):
+    """Liste les colonnes référencées par une expression."""
+    if isinstance(expr, Colonne):
+        return [expr.nom]
+    if isinstance(expr, Agregat):
+        return [] if expr.argument is None else colonnes_de(expr.argument)
+    if isinstance(expr, Unaire):
+        return colonnes_de(expr.operande)
+    if isinstance(expr, Binaire):
+        return colonnes_de(expr.gauche) + colonnes_de(expr.droite)
+    if isinstance(expr, DansListe):
+        trouvees = colonnes_de(expr.expression)
+        for valeur in expr.valeurs:
+            trouvees += colonnes_de(valeur)
+        return trouvees
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Analyse lexicale et syntaxique
+# ---------------------------------------------------------------------------
+
+MOTS_CLES = {
+    'SELECT', 'FROM', 'WHERE', 'GROUP', 'BY', 'HAVING', 'ORDER', 'LIMIT',
+    'AS', 'ASC', 'DESC', 'AND', 'OR', 'NOT', 'IN', 'NULL', 'DISTINCT',
+    'JOIN', 'UNION', 'OFFSET',
+}
+
+MOTIF_JETON = re.compile(r"""
+    (?P<espace>\s+|--[^\n]*)
+  | (?P<nombre>\d+\.\d*|\.\d+|\d+)
+  | (?P<chaine>'(?:[^']|'')*')
+  | (?P<identifiant_cite>"[^"]+")
+  | (?P<identifiant>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<parametre>:[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<operateur><=|>=|<>|!=|[=<>+\-*/(),;])
+""", re.VERBOSE)
+
+
+@dataclass(frozen=True)
+class Jeton:
+    type: str
+    valeur: object
+    position: int
+
+
+def decouper(requete_sql):
+    """Découpe le texte SQL en jetons."""
+    jetons = []
+    position = 0
+    while position < len(requete_sql):
+        correspondance = MOTIF_JETON.match(requete_sql, position)
+        if correspondance is None:
+            raise ErreurSQL(f"Caractère inattendu {requete_sql[position]!r} en position {position}")
+        type_jeton = correspondance.lastgroup
+        texte = correspondance.group()
+        if type_jeton == 'nombre':
+            jetons.append(Jeton('nombre', float(texte) if '.' in texte else int(texte), position))
+        elif type_jeton == 'chaine':
+            jetons.append(Jeton('chaine', texte[1:-1].replace("''", "'"), position))
+        elif type_jeton == 'identifiant_cite':
+            jetons.append(Jeton('identifiant', texte[1:-1], position))
+        elif type_jeton == 'identifiant':
+            if texte.upper() in MOTS_CLES:
+                jetons.append(Jeton('mot_cle', texte.upper(), position))
+            else:
+                jetons.append(Jeton('identifiant', texte, position))
+        elif type_jeton == 'parametre':
+            jetons.append(Jeton('parametre', texte[1:], position))
+        elif type_jeton == 'operateur':
+            jetons.append(Jeton('operateur', texte, position))
+        position = correspondance.end()
+    jetons.append(Jeton('fin', None, position))
+    return jetons
+
+
+class _Analyseur:
+    """Analyseur descendant récursif produisant l'arbre d'une requête."""
+
+    def __init__(self, requete_sql):
+        self.jetons = decouper(requete_sql)
+        self.index = 0
+
+    # -- primitives ---------------------------------------------------------
+
+    @property
+    def courant(self):
+        return self.jetons[self.index]
+
+    def avancer(self):
+        jeton = self.jetons[self.index]
+        self.index += 1
+        return jeton
+
+    def est(self, type_jeton, valeur=None):
+        jeton = self.courant
+        return jeton.type == type_jeton and (valeur is None or jeton.valeur == valeur)
+
+    def accepter(self, type_jeton, valeur=None):
+        if self.est(type_jeton, valeur):
+            return self.avancer()
+        return None
+
+    def exiger(self, type_jeton, valeur=None):
+        jeton = self.accepter(type_jeton, valeur)
+        if jeton is None:
+            attendu = valeur or type_jeton
+            trouve = self.courant.valeur if self.courant.type != 'fin' else 'fin de requête'
+            raise ErreurSQL(f"{attendu} attendu, {trouve!r} trouvé en position {self.courant.position}")
+        return jeton
+
+    # -- requête ------------------------------------------------------------
+
+    def requete(self):
+        self.exiger('mot_cle', 'SELECT')
+        if self.est('mot_cle', 'DISTINCT'):
+            raise ErreurSQL("SELECT DISTINCT n'est pas supporté")
+        selection = [self.element_selection()]
+        while self.accepter('operateur', ','):
+            selection.append(self.element_selection())
+
+        self.exiger('mot_cle', 'FROM')
+        table = self.exiger('identifiant').valeur
+
+        filtre = having = limite = None
+        cles, tri = [], []
+        if self.accepter('mot_cle', 'WHERE'):
+            filtre = self.expression()
+        if self.accepter('mot_cle', 'GROUP'):
+            self.exiger('mot_cle', 'BY')
+            cles.append(self.exiger('identifiant').valeur)
+            while self.accepter('operateur', ','):
+                cles.append(self.exiger('identifiant').valeur)
+        if self.accepter('mot_cle', 'HAVING'):
+            having = self.expression()
+        if self.accepter('mot_cle', 'ORDER'):
+            self.exiger('mot_cle', 'BY')
+            tri.append(self.element_tri())
+            while self.accepter('operateur', ','):
+                tri.append(self.element_tri())
+        if self.accepter('mot_cle', 'LIMIT'):
+            jeton = self.exiger('nombre')
+            if not isinstance(jeton.valeur, int):
+                raise ErreurSQL("LIMIT attend un entier")
+            limite = jeton.valeur
+        self.accepter('operateur', ';')
+        if not self.est('fin'):
+            raise ErreurSQL(f"Construction non supportée: {self.courant.valeur!r} en position {self.courant.position}")
+        return selection, table, filtre, cles, having, tri, limite
+
+    def element_selection(self):
+        if self.accepter('operateur', '*'):
+            return None, Etoile()
+        expr = self.expression()
+        alias = None
+        if self.accepter('mot_cle', 'AS'):
+            alias = self.exiger('identifiant').valeur
+        elif self.est('identifiant'):
+            alias = self.avancer().valeur
+        return alias, expr
+
+    def element_tri(self):
+        expr = self.expression()
+        croissant = True
+        if self.accepter('mot_cle', 'DESC'):
+            croissant = False
+        else:
+            self.accepter('mot_cle', 'ASC')
+        return expr, croissant
+
+    # -- expressions, par priorité croissante ---------------------------------
+
+    def expression(self):
+        gauche = self.conjonction()
+        while self.accepter('mot_cle', 'OR'):
+            gauche = Binaire('OR', gauche, self.conjonction())
+        return gauche
+
+    def conjonction(self):
+        gauche = self.negation()
+        while self.accepter('mot_cle', 'AND'):
+            gauche = Binaire('AND', gauche, self.negation())
+        return gauche
+
+    def negation(self):
+        if self.accepter('mot_cle', 'NOT'):
+            return Unaire('NOT', self.negation())
+        return self.comparaison()
+
+    def comparaison(self):
+        gauche = self.somme()
+        if self.est('operateur') and self.courant.valeur in ('=', '<>', '!=', '<', '<=', '>', '>='):
+            operateur = self.avancer().valeur
+            operateur = '<>' if operateur == '!=' else operateur
+            return Binaire(operateur, gauche, self.somme())
+        negation = False
+        if self.est('mot_cle', 'NOT') and self.jetons[self.index + 1].valeur == 'IN':
+            self.avancer()
+            negation = True
+        if self.accepter('mot_cle', 'IN'):
+            self.exiger('operateur', '(')
+            valeurs = [self.somme()]
+            while self.accepter('operateur', ','):
+                valeurs.append(self.somme())
+            self.exiger('operateur', ')')
+            return DansListe(gauche, tuple(valeurs), negation)
+        return gauche
+
+    def somme(self):
+        gauche = self.produit()
+        while self.est('operateur') and self.courant.valeur in ('+', '-'):
+            operateur = self.avancer().valeur
+            gauche = Binaire(operateur, gauche, self.produit())
+        return gauche
+
+    def produit(self):
+        gauche = self.unaire()
+        while self.est('operateur') and self.courant.valeur in ('*', '/'):
+            operateur = self.avancer().valeur
+            gauche = Binaire(operateur, gauche, self.unaire())
+        return gauche
+
+    def unaire(self):
+        if self.accepter('operateur', '-'):
+            return Unaire('-', self.unaire())
+        self.accepter('operateur', '+')
+        return self.primaire()
+
+    def primaire(self):
+        jeton = self.courant
+        if self.accepter('nombre') or self.accepter('chaine'):
+            return Litteral(jeton.valeur)
+        if self.accepter('mot_cle', 'NULL'):
+            return Litteral(None)
+        if self.accepter('parametre'):
+            return Parametre(jeton.valeur)
+        if self.accepter('operateur', '('):
+            expr = self.expression()
+            self.exiger('operateur', ')')
+            return expr
+        if self.accepter('identifiant'):
+            if not self.accepter('operateur', '('):
+                return Colonne(jeton.valeur)
+            fonction = jeton.valeur.upper()
+            if fonction not in FONCTIONS_AGREGAT:
+                raise ErreurSQL(f"Fonction non supportée: {jeton.valeur}")
+            if self.est('mot_cle', 'DISTINCT'):
+                raise ErreurSQL(f"{fonction}(DISTINCT ...) n'est pas supporté")
+            if self.accepter('operateur', '*'):
+                if fonction != 'COUNT':
+                    raise ErreurSQL(f"{fonction}(*) n'est pas valide")
+                argument = None
+            else:
+                argument = self.expression()
+                if agregats_de(argument):
+                    raise ErreurSQL("Les agrégats imbriqués ne sont pas supportés")
+            self.exiger('operateur', ')')
+            return Agregat(fonction, argument)
+        trouve = jeton.valeur if jeton.type != 'fin' else 'fin de requête'
+        raise ErreurSQL(f"Expression attendue, {trouve!r} trouvé en position {jeton.position}")
+
+
+# ---------------------------------------------------------------------------
+# Plan logique
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class PlanRequete:
+    """Plan logique d'une requête : filtre, clés, agrégats puis post-traitements."""
+    table: str
+    selection: tuple    # ((nom de sortie, expression), ...)
+    filtre: object      # expression ou None
+    cles: tuple         # colonnes du GROUP BY
+    agregats: tuple     # agrégats distincts calculés en une seule réduction
+    having: object      # expression ou None
+    tri: tuple          # ((expression, croissant), ...)
+    limite: object      # entier ou None
+
+    @property
+    def est_agregee(self):
+        return bool(self.cles or self.agregats)
+
+    @property
+    def colonnes_sortie(self):
+        return [nom for nom, _ in self.selection]
+
+
+@lru_cache(maxsize=256)
+def analyser_requete(requete_sql):
+    """Transforme le texte SQL en `PlanRequete` (résultat mis en cache)."""
+    selection, table, filtre, cles, having, tri, limite = _Analyseur(requete_sql).requete()
+
+    if filtre is not None and agregats_de(filtre):
+        raise ErreurSQL("Les agrégats ne sont pas autorisés dans WHERE (utiliser HAVING)")
+
+    selection_nommee = []
+    for alias, expr in selection:
+        if isinstance(expr, Etoile):
+            if cles:
+                raise ErreurSQL("SELECT * est incompatible avec GROUP BY")
+            selection_nommee.append(('*', expr))
+        else:
+            selection_nommee.append((alias or formater(expr), expr))
+
+    # HAVING et ORDER BY peuvent désigner une expression par son alias
+    alias = {nom: expr for nom, expr in selection_nommee if not isinstance(expr, Etoile)}
+    if having is not None:
+        having = _substituer_alias(having, alias, cles)
+    tri = [(_substituer_alias(_expression_tri(expr, selection_nommee), alias, cles), croissant)
+           for expr, croissant in tri]
+
+    agregats = []
+    for expr in [e for _, e in selection_nommee] + [having] + [e for e, _ in tri]:
+        if expr is None:
+            continue
+        for agregat in agregats_de(expr):
+            if agregat not in agregats:
+                agregats.append(agregat)
+
+    if having is not None and not (cles or agregats):
+        raise ErreurSQL("HAVING nécessite un GROUP BY ou des agrégats")
+
+    if cles or agregats:
+        # Toute colonne hors agrégat doit faire partie des clés de regroupement
+        for nom, expr in selection_nommee:
+            _verifier_colonnes_groupees(expr, cles, f"SELECT {nom}")
+        if having is not None:
+            _verifier_colonnes_groupees(having, cles, "HAVING")
+        for expr, _ in tri:
+            _verifier_colonnes_groupees(expr, cles, "ORDER BY")
+
+    return PlanRequete(
+        table=table,
+        selection=tuple(selection_nommee),
+        filtre=filtre,
+        cles=tuple(cles),
+        agregats=tuple(agregats),
+        having=having,
+        tri=tuple(tri),
+        limite=limite,
+    )
+
+
+def _expression_tri(expr, selection):
+    """Expression désignée par un numéro de colonne (`ORDER BY 2`), sinon `expr`."""
+    if not isinstance(expr, Litteral):
+        return expr
+    position = expr.valeur
+    if isinstance(position, bool) or not isinstance(position, int):
+        raise ErreurSQL(f"ORDER BY attend une expression ou un numéro de colonne, pas {formater(expr)}")
+    if not 1 <= position <= len(selection):
+        raise ErreurSQL(f"ORDER BY {position}: la sélection compte {len(selection)} colonne(s)")
+    _, cible = selection[position - 1]
+    if isinstance(cible, Etoile):
+        raise ErreurSQL(f"ORDER BY {position} désigne SELECT *")
+    return cible
+
+
+def _substituer_alias(expr, alias, cles):
+    if isinstance(expr, Colonne):
+        if expr.nom in alias and expr.nom not in cles:
+            return alias[expr.nom]
+        return expr
+    if isinstance(expr, Unaire):
+        return Unaire(expr.operateur, _substituer_alias(expr.operande, alias, cles))
+    if isinstance(expr, Binaire):
+        return Binaire(expr.operateur,
+                       _substituer_alias(expr.gauche, alias, cles),
+                       _substituer_alias(expr.droite, alias, cles))
+    if isinstance(expr, DansListe):
+        return DansListe(_substituer_alias(expr.expression, alias, cles),
+                         tuple(_substituer_alias(v, alias, cles) for v in expr.valeurs),
+                         expr.negation)
+    return expr
+
+
+def _lier(expr, valeurs):
+    if isinstance(expr, Parametre):
+        if expr.nom not in valeurs:
+            raise ErreurSQL(f"Paramètre sans valeur: :{expr.nom}")
+        return Litteral(valeurs[expr.nom])
+    if isinstance(expr, Agregat) and expr.argument is not None:
+        return Agregat(expr.fonction, _lier(expr.argument, valeurs))
+    if isinstance(expr, Unaire):
+        return Unaire(expr.operateur, _lier(expr.operande, valeurs))
+    if isinstance(expr, Binaire):
+        return Binaire(expr.operateur, _lier(expr.gauche, valeurs), _lier(expr.droite, valeurs))
+    if isinstance(expr, DansListe):
+        return DansListe(_lier(expr.expression, valeurs), tuple(_lier(v, valeurs) for v in expr.valeurs),
+                         expr.negation)
+    return expr
+
+
+def _parametres(expr):
+    if isinstance(expr, Parametre):
+        return [expr.nom]
+    if isinstance(expr, Agregat):
+        return [] if expr.argument is None else _parametres(expr.argument)
+    if isinstance(expr, Unaire):
+        return _parametres(expr.operande)
+    if isinstance(expr, Binaire):
+        return _parametres(expr.gauche) + _parametres(expr.droite)
+    if isinstance(expr, DansListe):
+        noms = _parametres(expr.expression)
+        for valeur in expr.valeurs:
+            noms += _parametres(valeur)
+        return noms
+    return []
+
+
+def parametres_de(plan):
+    """Noms des paramètres (:nom) attendus par un plan, dans l'ordre d'apparition."""
+    noms = []
+    expressions = [expr for _, expr in plan.selection] + [plan.filtre, plan.having]
+    for expr in expressions + [expr for expr, _ in plan.tri]:
+        if expr is not None:
+            noms += [nom for nom in _parametres(expr) if nom not in noms]
+    return noms
+
+
+@lru_cache(maxsize=1024)
+def _lier_plan(plan, valeurs):
+    valeurs = dict(valeurs)
+    lier = lambda expr: None if expr is None else _lier(expr, valeurs)
+    return replace(
+        plan,
+        selection=tuple((nom, lier(expr)) for nom, expr in plan.selection),
+        filtre=lier(plan.filtre),
+        agregats=tuple(lier(agregat) for agregat in plan.agregats),
+        having=lier(plan.having),
+        tri=tuple((lier(expr), croissant) for expr, croissant in plan.tri),
+    )
+
+
+def lier_parametres(plan, parametres=None):
+    """Remplace les paramètres :nom du plan par les valeurs fournies.
+
+    Le plan lié est un plan ordinaire : il peut partager ses passes avec
+    les autres requêtes d'un lot.
+    """
+    if not parametres_de(plan):
+        return plan
+    return _lier_plan(plan, tuple(sorted((parametres or {}).items())))
+
+
+def _verifier_colonnes_groupees(expr, cles, clause):
+    if isinstance(expr, Agregat):
+        return
+    if isinstance(expr, Colonne):
+        if expr.nom not in cles:
+            raise ErreurSQL(f"{clause}: la colonne {expr.nom!r} doit figurer dans GROUP BY ou dans un agrégat")
+    elif isinstance(expr, Unaire):
+        _verifier_colonnes_groupees(expr.operande, cles, clause)
+    elif isinstance(expr, Binaire):
+        _verifier_colonnes_groupees(expr.gauche, cles, clause)
+        _verifier_colonnes_groupees(expr.droite, cles, clause)
+    elif isinstance(expr, DansListe):
+        _verifier_colonnes_groupees(expr.expression, cles, clause)
+        for valeur in expr.valeurs:
+            _verifier_colonnes_groupees(valeur, cles, clause)
+
+
+def colonnes_requises(requetes):
+    """Colonnes de la table lues par un ensemble de requêtes SQL.
+
+    Retourne None si l'une d'elles sélectionne toutes les colonnes (*).
+    """
+    colonnes = []
+    for requete_sql in requetes:
+        plan = analyser_requete(requete_sql.strip())
+        expressions = [expr for _, expr in plan.selection] + [plan.filtre, plan.having]
+        expressions += [expr for expr, _ in plan.tri] + [Colonne(cle) for cle in plan.cles]
+        for expr in expressions:
+            if isinstance(expr, Etoile):
+                return None
+            if expr is not None:
+                colonnes += [nom for nom in colonnes_de(expr) if nom not in colonnes]
+    return colonnes
+
+
+# ---------------------------------------------------------------------------
+# Exécution vectorisée
+# ---------------------------------------------------------------------------
+
+OPERATEURS = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'AND': lambda a, b: a & b,
+    'OR': lambda a, b: a | b,
+}
+
+
+def evaluer(expr, df, colonnes=None):
+    """Évalue une expression sur un DataFrame.
+
+    `colonnes` associe des expressions déjà matérialisées (agrégats, colonnes
+    calculées comme prix * qte) au nom de la colonne qui contient leur valeur.
+    """
+    if colonnes and expr in colonnes:
+        return df[colonnes[expr]]
+    if isinstance(expr, Colonne):
+        if expr.nom not in df.columns:
+            raise ErreurSQL(f"Colonne inconnue: {expr.nom!r}")
+        return df[expr.nom]
+    if isinstance(expr, Litteral):
+        return expr.valeur
+    if isinstance(expr, Agregat):
+        raise ErreurSQL(f"Agrégat inattendu: {formater(expr)}")
+    if isinstance(expr, Parametre):
+        raise ErreurSQL(f"Paramètre sans valeur: :{expr.nom}")
+    if isinstance(expr, Unaire):
+        valeur = evaluer(expr.operande, df, colonnes)
+        return ~valeur if expr.operateur == 'NOT' else -valeur
+    if isinstance(expr, Binaire):
+        gauche = evaluer(expr.gauche, df, colonnes)
+        droite = evaluer(expr.droite, df, colonnes)
+        return OPERATEURS[expr.operateur](gauche, droite)
+    if isinstance(expr, DansListe):
+        valeur = evaluer(expr.expression, df, colonnes)
+        valeurs = [evaluer(v, df, colonnes) for v in expr.valeurs]
+        masque = valeur.isin(valeurs)
+        return ~masque if expr.negation else masque
+    raise ErreurSQL(f"Expression non évaluable: {formater(expr)}")
+
+
+def _en_serie(valeur, index):
+    if isinstance(valeur, pd.Series):
+        return valeur
+    return pd.Series(valeur, index=index)
+
+
+def materialiser(df, expressions):
+    """Ajoute au DataFrame une colonne par expression calculée (hors simples
+    colonnes), évaluée une seule fois en vectoriel.
+
+    Retourne le DataFrame enrichi et le dictionnaire expression -> colonne à
+    passer aux fonctions d'exécution.
+    """
+    colonnes = {}
+    for expr in expressions:
+        if expr is None or isinstance(expr, Colonne) or expr in colonnes:
+            continue
+        colonnes[expr] = f"__calcul_{len(colonnes)}"
+    if not colonnes:
+        return df, colonnes
+    calculees = {nom: _en_serie(evaluer(expr, df), df.index) for expr, nom in colonnes.items()}
+    return df.assign(**calculees), colonnes
+
+
+def filtrer(plan, df, colonnes=None):
+    """Applique la clause WHERE du plan."""
+    if plan.filtre is None:
+        return df
+    masque = _en_serie(evaluer(plan.filtre, df, colonnes), df.index)
+    if masque.dtype != bool:
+        raise ErreurSQL(f"WHERE doit produire une condition booléenne: {formater(plan.filtre)}")
+    return df[masque]
+
+
+# Chaque agrégat se décompose en agrégats partiels combinables : les partiels
+# calculés sur des groupes fins (ou des morceaux de données) peuvent être
+# recombinés pour obtenir un regroupement plus grossier sans relire les lignes.
+COMBINAISONS = {'SUM': 'sum', 'COUNT': 'sum', 'MIN': 'min', 'MAX': 'max'}
+
+
+def partiels_de(agregat):
+    """Agrégats partiels nécessaires au calcul d'un agrégat."""
+    if agregat.fonction == 'AVG':
+        return [Agregat('SUM', agregat.argument), Agregat('COUNT', agregat.argument)]
+    return [agregat]
+
+
+def partiels_du_plan(plan):
+    """Agrégats partiels distincts nécessaires à un plan."""
+    partiels = []
+    for agregat in plan.agregats:
+        for partiel in partiels_de(agregat):
+            if partiel not in partiels:
+                partiels.append(partiel)
+    return partiels
+
+
+# Au-delà, la table dense des combinaisons de codes coûterait plus que le hachage
+TAILLE_MAX_CODES = 1 << 22
+
+
+def _reduire_par_codes(cles, reductions):
+    """Réduction par groupe sur les codes des clés catégorielles.
+
+    `cles` associe chaque nom de clé à une série catégorielle et
+    `reductions` est une liste de (nom, série, fonction) avec fonction
+    parmi sum, count, min, max et size (série ignorée). Les codes des clés
+    sont combinés en un indice dense de groupe, puis chaque réduction est
+    un `np.bincount` (ou `ufunc.at` pour min/max) sur cet indice ; les
+    groupes présents sont décodés en étiquettes dans l'ordre de première
+    apparition, comme `groupby(sort=False)`.
+
+    Retourne None si les clés ne s'y prêtent pas (clé non catégorielle,
+    valeur manquante, trop de combinaisons) : l'appelant utilise alors
+    `groupby`.
+    """
+    if not all(isinstance(serie.dtype, pd.CategoricalDtype) for serie in cles.values()):
+        return None
+    if not all(serie is None or serie.dtype.kind in 'biuf' for _, serie, _ in reductions):
+        return None
+    tailles = [len(serie.cat.categories) for serie in cles.values()]
+    if int(np.prod(tailles, dtype=np.float64)) > TAILLE_MAX_CODES:
+        return None
+
+    code = None
+    for serie, taille in zip(cles.values(), tailles):
+        codes = serie.cat.codes.to_numpy()
+        if len(codes) and codes.min() < 0:
+            return None
+        code = codes.astype(np.int64) if code is None else code * taille + codes
+    lignes = 0 if code is None else len(code)
+    total = int(np.prod(tailles))
+    effectifs = np.bincount(code, minlength=total)
+    presents = np.flatnonzero(effectifs)
+    premiere = np.full(total, lignes, dtype=np.int64)
+    np.minimum.at(premiere, code, np.arange(lignes))
+    presents = presents[np.argsort(premiere[presents], kind='stable')]
+
+    resultat, reste = {}, presents
+    for (nom, serie), taille in reversed(list(zip(cles.items(), tailles))):
+        resultat[nom] = pd.Categorical.from_codes(reste % taille, dtype=serie.dtype)
+        reste = reste // taille
+    resultat = dict(reversed(list(resultat.items())))
+
+    for nom, serie, fonction in reductions:
+        if fonction == 'size':
+            resultat[nom] = effectifs[presents]
+            continue
+        valeurs = serie.to_numpy()
+        if valeurs.dtype.kind == 'b':
+            valeurs = valeurs.astype(np.int64)
+        manquantes = np.isnan(valeurs) if valeurs.dtype.kind == 'f' else None
+        if manquantes is not None and manquantes.any():
+            indices, valeurs = code[~manquantes], valeurs[~manquantes]
+            non_nuls = np.bincount(indices, minlength=total)
+        else:
+            indices, non_nuls = code, effectifs
+        if fonction == 'count':
+            resultat[nom] = non_nuls[presents]
+        elif fonction == 'sum':
+            if valeurs.dtype.kind == 'f':
+                resultat[nom] = np.bincount(indices, weights=valeurs, minlength=total)[presents]
+            elif len(valeurs) and np.abs(valeurs).max() * float(len(valeurs)) >= 2 ** 53:
+                sommes = np.zeros(total, dtype=np.int64)
+                np.add.at(sommes, indices, valeurs)
+                resultat[nom] = sommes[presents]
+            else:
+                sommes = np.bincount(indices, weights=valeurs, minlength=total)[presents]
+                resultat[nom] = sommes.astype(np.int64)
+        else:
+            ufunc = np.minimum if fonction == 'min' else np.maximum
+            if valeurs.dtype.kind == 'f':
+                neutre = np.inf if fonction == 'min' else -np.inf
+            else:
+                bornes = np.iinfo(valeurs.dtype)
+                neutre = bornes.max if fonction == 'min' else bornes.min
+            extremes = np.full(total, neutre, dtype=valeurs.dtype)
+            ufunc.at(extremes, indices, valeurs)
+            extremes = extremes[presents]
+            vides = non_nuls[presents] == 0
+            if vides.any():
+                extremes = np.where(vides, np.nan, extremes)
+            resultat[nom] = extremes
+    return pd.DataFrame(resultat)
+
+
+def agreger_partiels(df, cles, partiels, colonnes=None):
+    """Calcule les agrégats partiels par groupe de `cles` en une seule réduction.
+
+    Retourne un DataFrame avec une colonne par clé puis une colonne par
+    partiel, nommée d'après `formater(partiel)`. Les arguments présents dans
+    `colonnes` (voir `materialiser`) sont lus tels quels.
+    """
+    # Colonnes de travail : les clés puis un argument par expression agrégée
+    # (prix * qte est calculé une seule fois, en vectoriel)
+    travail = {}
+    for cle in cles:
+        if cle not in df.columns:
+            raise ErreurSQL(f"Colonne inconnue dans GROUP BY: {cle!r}")
+        travail[cle] = df[cle]
+    arguments = {}
+    for partiel in partiels:
+        if partiel.argument is not None and partiel.argument not in arguments:
+            arguments[partiel.argument] = nom = f"__argument_{len(arguments)}"
+            valeurs = _en_serie(evaluer(partiel.argument, df, colonnes), df.index)
+            # Les sommes s'accumulent en 64 bits, même sur des colonnes float32
+            if valeurs.dtype.kind == 'f' and valeurs.dtype.itemsize < 8:
+                valeurs = valeurs.astype('float64')
+            travail[nom] = valeurs
+    travail = pd.DataFrame(travail, index=df.index)
+    noms = [formater(partiel) for partiel in partiels]
+
+    if cles:
+        reductions = [
+            (nom, None, 'size') if partiel.argument is None
+            else (nom, travail[arguments[partiel.argument]], FONCTIONS_AGREGAT[partiel.fonction])
+            for partiel, nom in zip(partiels, noms)
+        ]
+        resultat = _reduire_par_codes({cle: travail[cle] for cle in cles}, reductions)
+        if resultat is not None:
+            return resultat
+        groupes = travail.groupby(list(cles), sort=False, observed=True, dropna=False)
+        nommes = {
+            nom: (arguments[partiel.argument], FONCTIONS_AGREGAT[partiel.fonction])
+            for partiel, nom in zip(partiels, noms)
+            if partiel.argument is not None
+        }
+        resultat = groupes.agg(**nommes) if nommes else pd.DataFrame(index=groupes.size().index)
+        for partiel, nom in zip(partiels, noms):
+            if partiel.argument is None:
+                resultat[nom] = groupes.size()
+        return resultat[noms].reset_index()
+
+    ligne = {}
+    for partiel, nom in zip(partiels, noms):
+        if partiel.argument is None:
+            ligne[nom] = [len(travail)]
+        else:
+            ligne[nom] = [getattr(travail[arguments[partiel.argument]], FONCTIONS_AGREGAT[partiel.fonction])()]
+    return pd.DataFrame(ligne)
+
+
+def combiner_partiels(partiels_groupes, cles, partiels):
+    """Recombine des agrégats partiels sur un sous-ensemble (éventuellement
+    vide) des clés, ou fusionne plusieurs tables partielles de mêmes clés."""
+    operations = {formater(partiel): COMBINAISONS[partiel.fonction] for partiel in partiels}
+    if cles:
+        resultat = _reduire_par_codes(
+            {cle: partiels_groupes[cle] for cle in cles},
+            [(nom, partiels_groupes[nom], operation) for nom, operation in operations.items()],
+        )
+        if resultat is not None:
+            return resultat
+        groupes = partiels_groupes.groupby(list(cles), sort=False, observed=True, dropna=False)
+        if not operations:
+            return groupes.size().index.to_frame(index=False)
+        return groupes.agg(operations).reset_index()
+    return pd.DataFrame({nom: [getattr(partiels_groupes[nom], operation)()]
+                         for nom, operation in operations.items()})
+
+
+def completer_agregats(plan, partiels_groupes):
+    """Calcule les agrégats finaux du plan à partir des partiels.
+
+    Retourne la table enrichie et le dictionnaire agrégat -> colonne.
+    """
+    colonnes_agregats = {}
+    for i, agregat in enumerate(plan.agregats):
+        if agregat.fonction == 'AVG':
+            somme, compte = (formater(partiel) for partiel in partiels_de(agregat))
+            nom = f"__agregat_{i}"
+            partiels_groupes = partiels_groupes.assign(
+                **{nom: partiels_groupes[somme] / partiels_groupes[compte].replace(0, np.nan)}
+            )
+            colonnes_agregats[agregat] = nom
+        else:
+            colonnes_agregats[agregat] = formater(agregat)
+    return partiels_groupes, colonnes_agregats
+
+
+def agreger(plan, df, colonnes=None):
+    """Calcule tous les agrégats du plan en une seule réduction groupée.
+
+    Retourne un DataFrame avec une colonne par clé puis les agrégats, et le
+    dictionnaire agrégat -> nom de colonne interne.
+    """
+    partiels_groupes = agreger_partiels(df, plan.cles, partiels_du_plan(plan), colonnes)
+    return completer_agregats(plan, partiels_groupes)
+
+
+def finaliser(plan, source, colonnes=None):
+    """Projette, filtre (HAVING), trie et limite une table source.
+
+    `source` est soit le résultat de `agreger`, soit les lignes filtrées pour
+    une requête sans agrégat.
+    """
+    if plan.having is not None:
+        masque = _en_serie(evaluer(plan.having, source, colonnes), source.index)
+        source = source[masque]
+
+    if plan.tri:
+        cles_tri = {
+            f"__tri_{i}": np.asarray(_en_serie(evaluer(expr, source, colonnes), source.index))
+            for i, (expr, _) in enumerate(plan.tri)
+        }
+        ordre = pd.DataFrame(cles_tri).sort_values(
+            list(cles_tri), ascending=[croissant for _, croissant in plan.tri], kind='stable'
+        ).index
+        source = source.iloc[ordre]
+
+    if plan.limite is not None:
+        source = source.head(plan.limite)
+
+    sortie = {}
+    for nom, expr in plan.selection:
+        if isinstance(expr, Etoile):
+            for colonne in source.columns:
+                sortie[colonne] = source[colonne]
+        else:
+            sortie[nom] = _en_serie(evaluer(expr, source, colonnes), source.index)
+    return pd.DataFrame(sortie, index=source.index).reset_index(drop=True)
+
+
+def executer_plan(plan, df):
+    """Exécute un plan logique sur un DataFrame."""
+    lignes = filtrer(plan, df)
+    if not plan.est_agregee:
+        return finaliser(plan, lignes)
+    agregee, colonnes = agreger(plan, lignes)
+    return finaliser(plan, agregee, colonnes)
+
+
+def executer_requete_sql(requete_sql, df, parametres=None):
+    """Exécute une requête SQL sur un DataFrame pandas"""
+    return executer_plan(lier_parametres(analyser_requete(requete_sql.strip()), parametres), df)
+
+
+# ---------------------------------------------------------------------------
+# Exécution d'un lot de requêtes
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Passe:
+    """Une lecture groupée des données partagée par plusieurs requêtes."""
+    filtre: object      # clause WHERE commune
+    cles: tuple         # clés du regroupement le plus fin
+    partiels: tuple     # union des agrégats partiels des requêtes servies
+    requetes: tuple     # noms des requêtes calculées à partir de cette passe
+
+
+def planifier_lot(plans):
+    """Regroupe les plans agrégés d'un lot en passes partagées.
+
+    Les requêtes de même filtre partagent la sélection des lignes ; une
+    requête dont les clés sont incluses dans celles d'une autre (par exemple
+    `ca_total` sans clé, ou `quantite_par_produit` vis-à-vis de
+    `ventes_par_produit`) est dérivée de la passe la plus fine au lieu de
+    relire les données.
+    """
+    par_filtre = {}
+    for nom, plan in plans.items():
+        if plan.est_agregee:
+            par_filtre.setdefault(plan.filtre, []).append(nom)
+
+    passes = []
+    for filtre, noms in par_filtre.items():
+        ensembles = []
+        for nom in noms:
+            cles = plans[nom].cles
+            if set(cles) not in [set(e) for e in ensembles]:
+                ensembles.append(cles)
+        # Les passes lisent les regroupements maximaux ; les autres en dérivent
+        maximaux = [cles for cles in ensembles
+                    if not any(set(cles) < set(autres) for autres in ensembles)]
+        servies = {cles: [] for cles in maximaux}
+        for nom in noms:
+            cles = set(plans[nom].cles)
+            base = min((m for m in maximaux if cles <= set(m)), key=len)
+            servies[base].append(nom)
+        for cles, noms_servis in servies.items():
+            partiels = []
+            for nom in noms_servis:
+                for partiel in partiels_du_plan(plans[nom]):
+                    if partiel not in partiels:
+                        partiels.append(partiel)
+            passes.append(Passe(filtre, cles, tuple(partiels), tuple(noms_servis)))
+    return passes
+
+
+def calculer_passes(plans, passes, df):
+    """Calcule les agrégats partiels de chaque passe sur un DataFrame.
+
+    Les arguments calculés (prix * qte) sont évalués une seule fois sur
+    toutes les lignes, puis réutilisés par chaque filtre et chaque passe.
+    Retourne une table de partiels par passe, dans l'ordre de `passes`.
+    """
+    arguments = [partiel.argument for passe in passes for partiel in passe.partiels]
+    enrichies, colonnes = materialiser(df, arguments)
+    lignes_filtrees = {}
+    partiels_par_passe = []
+    for passe in passes:
+        if passe.filtre not in lignes_filtrees:
+            lignes_filtrees[passe.filtre] = filtrer(plans[passe.requetes[0]], enrichies, colonnes)
+        partiels_par_passe.append(
+            agreger_partiels(lignes_filtrees[passe.filtre], passe.cles, passe.partiels, colonnes)
+        )
+    return partiels_par_passe
+
+
+def finaliser_passes(plans, passes, partiels_par_passe):
+    """Dérive le résultat de chaque requête agrégée des partiels de sa passe."""
+    resultats = {}
+    for passe, partiels_groupes in zip(passes, partiels_par_passe):
+        for nom in passe.requetes:
+            plan = plans[nom]
+            source = partiels_groupes
+            if set(plan.cles) != set(passe.cles):
+                source = combiner_partiels(partiels_groupes, plan.cles, partiels_du_plan(plan))
+            source, colonnes_agregats = completer_agregats(plan, source)
+            resultats[nom] = finaliser(plan, source, colonnes_agregats)
+    return resultats
+
+
+def analyser_lot(requetes, parametres=None):
+    """Plans liés aux paramètres d'un dictionnaire nom -> requête SQL."""
+    return {nom: lier_parametres(analyser_requete(requete_sql.strip()), parametres)
+            for nom, requete_sql in requetes.items()}
+
+
+def executer_requetes(requetes, df, parametres=None):
+    """Exécute un dictionnaire de requêtes SQL en partageant les lectures.
+
+    `parametres` fournit les valeurs des paramètres :nom des requêtes.
+    Retourne un dictionnaire nom -> DataFrame dans l'ordre des requêtes.
+    """
+    plans = analyser_lot(requetes, parametres)
+    passes = planifier_lot(plans)
+    resultats = finaliser_passes(plans, passes, calculer_passes(plans, passes, df))
+
+    for nom, plan in plans.items():
+        if not plan.est_agregee:
+            resultats[nom] = finaliser(plan, filtrer(plan, df))
+
+    return {nom: resultats[nom] for nom in plans}
+
+
+# ---------------------------------------------------------------------------
+# Exécution en flux, morceau par morceau
+# ---------------------------------------------------------------------------
+
+def fusionner_partiels(passes, accumules, partiels_par_passe):
+    """Fusionne les partiels d'un nouveau morceau dans les partiels accumulés.
+
+    La taille du résultat ne dépend que du nombre de groupes, pas du nombre
+    de lignes déjà lues.
+    """
+    if accumules is None:
+        return partiels_par_passe
+    return [
+        combiner_partiels(_concatener(accumule, nouveau), passe.cles, passe.partiels)
+        for passe, accumule, nouveau in zip(passes, accumules, partiels_par_passe)
+    ]
+
+
+def _concatener(accumule, nouveau):
+    """Concatène deux tables partielles en gardant les clés catégorielles.
+
+    Les morceaux d'un flux ont chacun leur dictionnaire de catégories ;
+    celui du résultat est leur union, pour que la fusion se fasse encore
+    sur des codes.
+    """
+    resultat = pd.concat([accumule, nouveau], ignore_index=True)
+    for colonne in accumule.columns:
+        gauche, droite = accumule[colonne], nouveau[colonne]
+        if (isinstance(gauche.dtype, pd.CategoricalDtype) and isinstance(droite.dtype, pd.CategoricalDtype)
+                and gauche.dtype != droite.dtype):
+            resultat[colonne] = union_categoricals([gauche, droite], ignore_order=True)
+    return resultat
+
+
+def executer_requetes_par_morceaux(requetes, morceaux):
+    """Exécute un lot de requêtes agrégées sur un flux de DataFrames.
+
+    Chaque morceau est filtré et agrégé en partiels, puis fusionné avec les
+    partiels des morceaux précédents avant d'être libéré : la mémoire reste
+    bornée quelle que soit la taille de la source, et les résultats sont
+    ceux de `executer_requetes` sur la table complète.
+    """
+    plans = analyser_lot(requetes)
+    for nom, plan in plans.items():
+        if not plan.est_agregee:
+            raise ErreurSQL(f"{nom}: seules les requêtes agrégées peuvent être exécutées en flux")
+    passes = planifier_lot(plans)
+
+    accumules = None
+    for morceau in morceaux:
+        accumules = fusionner_partiels(passes, accumules, calculer_passes(plans, passes, morceau))
+    if accumules is None:
+        raise ValueError("Aucun morceau de données à agréger")
+
+    resultats = finaliser_passes(plans, passes, accumules)
+    return {nom: resultats[nom] for nom in plans}
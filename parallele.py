@@ -0,0 +1,139 @@
+"""Agrégation parallèle multi-cœurs d'un lot de requêtes SQL.
+
+Les colonnes utiles de la table sont copiées une fois dans des segments de
+mémoire partagée (`multiprocessing.shared_memory`) ; les dimensions texte y
+sont stockées sous forme de codes entiers, leur dictionnaire étant transmis
+à part. Chaque processus du pool reçoit seulement les noms des segments et
+une plage de lignes : il reconstruit des vues NumPy sans copie, calcule les
+agrégats partiels de sa partition avec `moteur_sql.calculer_passes` et ne
+renvoie que ces partiels, fusionnés ensuite comme en mode flux. Seul le
+découpage en plages contiguës de lignes est implémenté (pas de partition
+par hachage de la clé de regroupement) : une même clé peut apparaître dans
+plusieurs partitions, la fusion additionne ses partiels.
+
+Les processus sont démarrés par un serveur de fork (`forkserver`, ou
+`spawn` là où il n'existe pas) et non par `fork` : un fork d'un processus
+qui a déjà des threads (serveur, pool d'E/S) peut hériter de verrous pris.
+
+Sous `SEUIL_PARALLELE` lignes, ou avec un seul processus, le lot est
+exécuté en série : le démarrage du pool coûterait plus qu'il ne rapporte.
+
+Variables d'environnement :
+    VENTES_WORKERS    nombre de processus (par défaut le nombre de cœurs)
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from moteur_sql import (
+    analyser_lot, calculer_passes, colonnes_requises, executer_requetes, filtrer, finaliser,
+    finaliser_passes, fusionner_partiels, planifier_lot,
+)
+
+SEUIL_PARALLELE = 1_000_000
+
+
+def nombre_workers():
+    """Nombre de processus à utiliser, configurable par VENTES_WORKERS."""
+    return int(os.environ.get('VENTES_WORKERS', os.cpu_count() or 1))
+
+
+def contexte_processus():
+    """Contexte multiprocessing des pools : forkserver, sinon spawn."""
+    methode = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(methode)
+
+
+def _partager_colonnes(df, colonnes):
+    """Copie les colonnes dans des segments partagés.
+
+    Retourne les descripteurs transmis aux processus et les segments à
+    libérer par l'appelant.
+    """
+    descripteurs, segments = {}, []
+    for colonne in colonnes:
+        serie = df[colonne]
+        categories = None
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valeurs, categories = serie.cat.codes.to_numpy(), serie.cat.categories
+        elif serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype):
+            valeurs, categories = pd.factorize(serie, use_na_sentinel=True)
+            valeurs = valeurs.astype(np.int32 if len(categories) > np.iinfo(np.int16).max else np.int16)
+        else:
+            valeurs = serie.to_numpy()
+        segment = shared_memory.SharedMemory(create=True, size=max(valeurs.nbytes, 1))
+        segments.append(segment)
+        np.ndarray(valeurs.shape, dtype=valeurs.dtype, buffer=segment.buf)[:] = valeurs
+        descripteurs[colonne] = (segment.name, valeurs.dtype.str, len(valeurs), categories)
+    return descripteurs, segments
+
+
+def _agreger_partition(requetes, parametres, descripteurs, debut, fin):
+    """Calcule, dans un processus du pool, les partiels d'une plage de lignes."""
+    segments, colonnes = [], {}
+    try:
+        for colonne, (nom, type_, longueur, categories) in descripteurs.items():
+            segment = shared_memory.SharedMemory(name=nom, track=False)
+            segments.append(segment)
+            valeurs = np.ndarray((longueur,), dtype=type_, buffer=segment.buf)[debut:fin]
+            if categories is not None:
+                colonnes[colonne] = pd.Categorical.from_codes(valeurs, categories=categories, validate=False)
+            else:
+                colonnes[colonne] = valeurs
+        partition = pd.DataFrame(colonnes, index=pd.RangeIndex(fin - debut), copy=False)
+        del colonnes
+
+        plans = analyser_lot(requetes, parametres)
+        partiels = calculer_passes(plans, planifier_lot(plans), partition)
+        del partition
+        return partiels
+    finally:
+        for segment in segments:
+            segment.close()
+
+
+def executer_requetes_parallele(requetes, df, parametres=None, workers=None, seuil=SEUIL_PARALLELE):
+    """Exécute un lot de requêtes en répartissant les lignes sur un pool de processus.
+
+    Même contrat que `moteur_sql.executer_requetes` (dont `parametres`) ;
+    bascule sur l'exécution en série pour les petites tables ou un seul
+    processus.
+    """
+    workers = workers or nombre_workers()
+    if workers <= 1 or len(df) < seuil:
+        return executer_requetes(requetes, df, parametres)
+
+    plans = analyser_lot(requetes, parametres)
+    agregees = {nom: requetes[nom] for nom, plan in plans.items() if plan.est_agregee}
+    if not agregees:
+        return executer_requetes(requetes, df, parametres)
+    passes = planifier_lot(plans)
+    colonnes = colonnes_requises(agregees.values())
+    if colonnes is None:
+        colonnes = list(df.columns)
+
+    bornes = np.linspace(0, len(df), workers + 1, dtype=np.int64)
+    descripteurs, segments = _partager_colonnes(df, colonnes)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexte_processus()) as pool:
+            taches = [
+                pool.submit(_agreger_partition, agregees, parametres, descripteurs, int(debut), int(fin))
+                for debut, fin in zip(bornes[:-1], bornes[1:])
+            ]
+            accumules = None
+            for tache in taches:
+                accumules = fusionner_partiels(passes, accumules, tache.result())
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    resultats = finaliser_passes(plans, passes, accumules)
+    for nom, plan in plans.items():
+        if not plan.est_agregee:
+            resultats[nom] = finaliser(plan, filtrer(plan, df))
+    return {nom: resultats[nom] for nom in plans}
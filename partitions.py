@@ -0,0 +1,88 @@
+"""Dashboards par partition (région, client...) générés en une exécution.
+
+Les ventes sont chargées une fois et un seul regroupement calcule le cube
+produit × région de chaque valeur de la clé de partition
+(`CubeVentes.construire_partitions`) ; les requêtes de chaque partition
+sont ensuite calculées à partir de son cube. Les pages de toutes les
+partitions sont produites ensemble sur le pool de `rendu.exporter_figures`,
+dans `html/<partition>/`, avec une seule copie de plotly.js à la racine.
+Le coût dépend de la taille des données, pas du nombre de partitions
+multiplié par celui d'une exécution complète.
+
+    indicateurs = generer_partitions('region')      # html/Nord/, html/Sud/...
+    python app.py --partition client
+"""
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from cube import SQL_CUBE, CubeVentes
+from moteur_sql import colonnes_requises
+from parallele import executer_requetes_parallele
+from pipeline import HTML_DIR, PipelineVentes
+from profilage import Profileur
+from requetes import requetes_sql
+from source_donnees import charger_donnees
+
+
+def nom_partition(valeur):
+    """Nom de répertoire sûr pour une valeur de partition."""
+    return re.sub(r'[^\w.-]+', '_', str(valeur)).strip('._') or '_'
+
+
+def _silencieux(*_):
+    pass
+
+
+def generer_partitions(cle, source=None, sortie=HTML_DIR, afficher=print, profil=None):
+    """Calcule et rend le dashboard de chaque valeur de la colonne `cle`.
+
+    `source` est un chemin, une URL ou un DataFrame ; sans `sortie`, seuls
+    les indicateurs sont calculés. Retourne un dictionnaire nom de
+    partition -> indicateurs du résumé (voir `PipelineVentes.resumer`).
+    """
+    profil = profil if profil is not None else Profileur(actif=False)
+    colonnes = list(dict.fromkeys([*colonnes_requises([SQL_CUBE, *requetes_sql.values()]), cle]))
+    with profil.etape('chargement') as etape:
+        if isinstance(source, pd.DataFrame):
+            donnees = source[colonnes]
+        else:
+            donnees = charger_donnees(source, colonnes=colonnes, profil=profil)
+        etape.lignes = len(donnees)
+
+    # Un seul regroupement par (clé, produit, région) pour toutes les partitions
+    with profil.etape('cube (partitions)') as etape:
+        cubes = CubeVentes.construire_partitions(donnees, cle, executer=executer_requetes_parallele)
+        etape.lignes = len(donnees)
+    noms = {valeur: nom_partition(valeur) for valeur in cubes}
+    if len(set(noms.values())) < len(noms):
+        raise ValueError(f"Valeurs de {cle!r} indiscernables une fois converties en noms de répertoires")
+    afficher(f"🗂️ {len(cubes):,} partition(s) par {cle} calculées en une lecture de {len(donnees):,} lignes")
+
+    pipelines = {}
+    with profil.etape('requetes'):
+        for valeur, cube in cubes.items():
+            pipeline = PipelineVentes(source=cube, sortie=None if sortie is None else Path(sortie) / noms[valeur],
+                                      afficher=_silencieux)
+            pipeline.charger()
+            pipeline.requeter()
+            pipelines[noms[valeur]] = pipeline
+
+    if sortie is not None:
+        from rendu import exporter_figures, profiler_rapports
+
+        # Toutes les pages sur un seul pool ; seules celles qui ont changé sont reconstruites
+        Path(sortie).mkdir(parents=True, exist_ok=True)
+        taches = [tache for nom, pipeline in pipelines.items() for tache in pipeline.taches(f"{nom}/")]
+        with profil.etape('figures'):
+            rapports = exporter_figures(taches, sortie)
+            profiler_rapports(profil, rapports)
+        reconstruites = sum(rapport.reconstruite for rapport in rapports)
+        afficher(f"🎨 {reconstruites} page(s) reconstruite(s), {len(rapports) - reconstruites} inchangée(s) dans {sortie}/")
+
+    indicateurs = {nom: pipeline.resumer() for nom, pipeline in pipelines.items()}
+    for nom, valeurs in indicateurs.items():
+        afficher(f"📁 {nom:<16} {valeurs['ca_total']:>16,.2f} €  "
+                 f"{valeurs['produits']:>5} produits  meilleur: {valeurs.get('meilleur_produit_ca', 'N/A')}")
+    return indicateurs
@@ -0,0 +1,165 @@
+"""Ventes datées : stockage partitionné par mois et cumuls par période.
+
+Quand la source a une colonne `date`, `ecrire_periodes` ajoute les
+colonnes `jour`, `semaine` (lundi de la semaine) et `mois` puis écrit un
+répertoire par mois :
+
+    periodes/
+        periodes.json       catalogue : bornes, lignes et empreinte de chaque mois
+        2026-01/lignes/     instantané des ventes du mois (voir instantane.py)
+        2026-01/cumul/      cube jour × produit × région du mois, calculé une fois
+
+Un mois dont le contenu n'a pas changé n'est pas réécrit. `charger_cumuls`
+ne lit que les mois qui recoupent l'intervalle demandé (une vue « 30
+derniers jours » ne touche qu'un ou deux mois) et retourne un
+`CubeVentes` qui répond aux séries par jour, semaine ou mois
+(`requetes.requetes_temporelles`) comme aux ventilations par produit ou
+par région sur la période.
+
+Sans colonne `date`, il n'y a rien à partitionner : `ecrire_periodes`
+lève une ValueError explicite et le dashboard reste celui de toute la
+période.
+
+    python periodes.py periodes/ --source ventes.csv
+    VENTES_PERIODES=periodes/ VENTES_DERNIERS_JOURS=30 python app.py
+"""
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from cube import DIMENSIONS, CubeVentes, sql_cube
+from etat_incremental import empreinte_lignes
+from fichiers import ecrire_atomique
+from instantane import charger_instantane, ecrire_instantane
+from moteur_sql import executer_requetes
+
+CATALOGUE = 'periodes.json'
+PERIODES = ('jour', 'semaine', 'mois')
+SQL_CUMUL = sql_cube((*PERIODES, *DIMENSIONS))
+
+
+def ajouter_periodes(df, colonne='date'):
+    """Copie de `df` avec les colonnes jour, semaine et mois tirées de `colonne`."""
+    if colonne not in df.columns:
+        raise ValueError(f"Pas de colonne {colonne!r} : les ventes ne sont pas datées")
+    dates = pd.to_datetime(df[colonne])
+    return df.assign(**{colonne: dates}).assign(
+        jour=dates.dt.normalize(),
+        semaine=dates.dt.to_period('W').dt.start_time,
+        mois=dates.dt.to_period('M').dt.start_time,
+    )
+
+
+def lire_catalogue(dossier):
+    try:
+        return json.loads((Path(dossier) / CATALOGUE).read_text())
+    except (OSError, ValueError):
+        return {'partitions': {}}
+
+
+def ecrire_periodes(df, dossier, colonne='date'):
+    """Écrit les ventes datées de `df` partitionnées par mois, avec leurs cumuls.
+
+    Chaque mois présent dans `df` remplace la partition du même mois ; les
+    autres partitions sont conservées (on peut n'écrire que le mois en
+    cours). Retourne un dictionnaire mois -> 'ecrite' ou 'inchangee'.
+    """
+    dossier = Path(dossier)
+    df = ajouter_periodes(df, colonne)
+    dossier.mkdir(parents=True, exist_ok=True)
+    catalogue = lire_catalogue(dossier)
+    statuts = {}
+    for mois, lignes in df.groupby('mois', sort=True):
+        nom = f"{mois:%Y-%m}"
+        empreinte = empreinte_lignes(lignes)
+        if catalogue['partitions'].get(nom, {}).get('empreinte') == empreinte:
+            statuts[nom] = 'inchangee'
+            continue
+        lignes = lignes.reset_index(drop=True)
+        ecrire_instantane(lignes, dossier / nom / 'lignes', empreinte)
+        ecrire_instantane(executer_requetes({'cumul': SQL_CUMUL}, lignes)['cumul'], dossier / nom / 'cumul', empreinte)
+        catalogue['partitions'][nom] = {
+            'debut': f"{lignes['jour'].min():%Y-%m-%d}",
+            'fin': f"{lignes['jour'].max():%Y-%m-%d}",
+            'lignes': len(lignes),
+            'empreinte': empreinte,
+        }
+        statuts[nom] = 'ecrite'
+
+    catalogue['partitions'] = dict(sorted(catalogue['partitions'].items()))
+    ecrire_atomique(dossier / CATALOGUE, json.dumps(catalogue, indent=2))
+    return statuts
+
+
+def intervalle(dossier, debut=None, fin=None, derniers_jours=None):
+    """Bornes (Timestamp ou None) ; `derniers_jours` part du dernier jour stocké.
+
+    `derniers_jours` remplace les deux bornes : le combiner avec `debut` ou
+    `fin` lève une ValueError.
+    """
+    if derniers_jours and (debut is not None or fin is not None):
+        raise ValueError("derniers_jours ne se combine pas avec debut ou fin")
+    if derniers_jours:
+        partitions = lire_catalogue(dossier)['partitions']
+        if partitions:
+            fin = pd.Timestamp(max(partition['fin'] for partition in partitions.values()))
+            debut = fin - pd.Timedelta(days=derniers_jours - 1)
+    return (pd.Timestamp(debut) if debut is not None else None,
+            pd.Timestamp(fin) if fin is not None else None)
+
+
+def partitions_utiles(dossier, debut=None, fin=None):
+    """Mois dont les ventes recoupent [debut, fin], d'après le catalogue seul."""
+    return [
+        nom for nom, partition in lire_catalogue(dossier)['partitions'].items()
+        if (debut is None or pd.Timestamp(partition['fin']) >= debut)
+        and (fin is None or pd.Timestamp(partition['debut']) <= fin)
+    ]
+
+
+def _dans_intervalle(table, debut, fin):
+    if debut is not None:
+        table = table[table['jour'] >= debut]
+    if fin is not None:
+        table = table[table['jour'] <= fin]
+    return table
+
+
+def _assembler(tables):
+    table = pd.concat(tables, ignore_index=True)
+    # Les catégories diffèrent d'un mois à l'autre : la concaténation les perd
+    return table.astype({dimension: 'category' for dimension in DIMENSIONS if dimension in table.columns})
+
+
+def charger_cumuls(dossier, debut=None, fin=None, derniers_jours=None):
+    """Cube jour × produit × région des seuls mois utiles, limité à [debut, fin].
+
+    Retourne None si aucune partition ne recoupe l'intervalle.
+    """
+    debut, fin = intervalle(dossier, debut, fin, derniers_jours)
+    noms = partitions_utiles(dossier, debut, fin)
+    if not noms:
+        return None
+    table = _assembler([charger_instantane(Path(dossier) / nom / 'cumul') for nom in noms])
+    return CubeVentes.depuis_resultat(_dans_intervalle(table, debut, fin).reset_index(drop=True), SQL_CUMUL)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    from source_donnees import charger_donnees
+
+    parser = argparse.ArgumentParser(description="Partitionne les ventes datées par mois et calcule leurs cumuls")
+    parser.add_argument('destination', help="répertoire des partitions")
+    parser.add_argument('--source', help="URL, CSV, Parquet ou instantané (par défaut VENTES_SOURCE)")
+    parser.add_argument('--colonne', default='date', help="colonne de date (date)")
+    args = parser.parse_args()
+    try:
+        statuts = ecrire_periodes(charger_donnees(args.source), args.destination, args.colonne)
+    except ValueError as erreur:
+        print(f"⚠️ {erreur}")
+        sys.exit(1)
+    ecrites = sum(statut == 'ecrite' for statut in statuts.values())
+    print(f"📅 {len(statuts)} mois : {ecrites} écrit(s), {len(statuts) - ecrites} inchangé(s) dans {args.destination}")
@@ -0,0 +1,377 @@
+"""Pipeline d'analyse des ventes : chargement → requêtes → rendu → résumé.
+
+    pipeline = PipelineVentes(source='ventes.csv', sortie='html/client-42')
+    indicateurs = pipeline.executer()
+
+Chaque étape est une méthode appelable séparément (`charger`, `requeter`,
+`rendre`, `resumer`). Les entrées et sorties sont injectables :
+
+- `source` : chemin ou URL (voir `source_donnees`), DataFrame déjà chargé,
+  fonction `charger(colonnes)` retournant un DataFrame, ou `CubeVentes`
+  déjà calculé (voir `partitions.py`) ;
+- `sortie` : répertoire des pages HTML, ou None pour ne produire aucune
+  figure (Plotly n'est alors pas importé) ;
+- `afficher` : reçoit chaque ligne de texte (`print` par défaut,
+  `logging.info`, `list.append`...).
+
+Avec `periodes` (répertoire écrit par `periodes.py`), les séries par jour,
+semaine et mois sont calculées à partir des cumuls mensuels, limitées aux
+`derniers_jours` si demandé, et tracées en courbes.
+
+Un même pipeline peut être exécuté à répétition dans un processus : les
+imports, les plans SQL analysés, le cache des résultats (`cache`, partageable
+entre pipelines) et le manifeste des pages restent chauds d'une exécution à
+l'autre. `app.py` en est l'interface en ligne de commande.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache_resultats import DOSSIER_RESULTATS, CacheResultats
+from classement import classer
+from cube import SQL_CUBE, CubeVentes
+from etat_incremental import CHEMIN_ETAT, executer_requetes_incremental, verifier_etat
+from moteur_sql import colonnes_requises, executer_requetes_par_morceaux
+from parallele import executer_requetes_parallele
+from periodes import charger_cumuls
+from profilage import Profileur
+from requetes import requetes_sql, requetes_temporelles
+from source_donnees import charger_donnees, lire_par_morceaux
+
+HTML_DIR = Path('html')
+
+
+class PipelineVentes:
+    """Calcule les requêtes du dashboard, produit les pages HTML et le résumé."""
+
+    def __init__(self, source=None, sortie=HTML_DIR, afficher=print, cache=None, profil=None,
+                 taille_morceau=None, incremental=False, verifier=False, chemin_etat=CHEMIN_ETAT,
+                 periodes=None, derniers_jours=None):
+        if (taille_morceau or incremental) and not (source is None or isinstance(source, (str, Path))):
+            raise ValueError("Les modes flux et incrémental lisent un chemin ou une URL, pas un objet en mémoire")
+        self.source = source
+        self.sortie = Path(sortie) if sortie is not None else None
+        self.afficher = afficher
+        self.cache = cache if cache is not None else CacheResultats()
+        self.profil = profil if profil is not None else Profileur(actif=False)
+        self.taille_morceau = taille_morceau
+        self.incremental = incremental
+        self.verifier = verifier
+        self.chemin_etat = chemin_etat
+        self.periodes = periodes
+        self.derniers_jours = derniers_jours
+        # Seules les colonnes lues par le cube et les requêtes sont chargées
+        self.colonnes = colonnes_requises([SQL_CUBE, *requetes_sql.values()])
+        self.donnees = self.cube = self.resultats = self.classements = self.series = None
+
+    @classmethod
+    def depuis_environnement(cls, **options):
+        """Pipeline configuré par les variables VENTES_* (mode flux, incrémental, cache disque, périodes)."""
+        taille_morceau = os.environ.get('VENTES_TAILLE_MORCEAU')
+        options.setdefault('taille_morceau', int(taille_morceau) if taille_morceau else None)
+        derniers_jours = os.environ.get('VENTES_DERNIERS_JOURS')
+        options.setdefault('periodes', os.environ.get('VENTES_PERIODES'))
+        options.setdefault('derniers_jours', int(derniers_jours) if derniers_jours else None)
+        options.setdefault('incremental', os.environ.get('VENTES_INCREMENTAL', '') not in ('', '0'))
+        options.setdefault('verifier', os.environ.get('VENTES_VERIFIER', '') not in ('', '0'))
+        if 'cache' not in options:
+            # Avec VENTES_CACHE_RESULTATS, le cube de données inchangées est relu du disque
+            disque = os.environ.get('VENTES_CACHE_RESULTATS', '') not in ('', '0')
+            options['cache'] = CacheResultats(dossier=DOSSIER_RESULTATS if disque else None)
+        return cls(**options)
+
+    def executer(self):
+        """Enchaîne les quatre étapes ; retourne les indicateurs du résumé."""
+        self.afficher("=" * 60)
+        self.afficher("🔍 EXÉCUTION DES REQUÊTES SQL")
+        self.afficher("=" * 60)
+        self.charger()
+        self.requeter()
+        if self.sortie is not None:
+            self.rendre()
+        return self.resumer()
+
+    def _lire(self, a_partir_de=0):
+        if isinstance(self.source, pd.DataFrame):
+            return self.source[self.colonnes]
+        if callable(self.source):
+            return self.source(self.colonnes)
+        return charger_donnees(self.source, colonnes=self.colonnes, a_partir_de=a_partir_de, profil=self.profil)
+
+    def charger(self):
+        """Charge les ventes ; en mode flux ou incrémental, la lecture se fait dans `requeter`."""
+        self.donnees = None
+        if not (self.taille_morceau or self.incremental or isinstance(self.source, CubeVentes)):
+            with self.profil.etape('chargement') as etape:
+                self.donnees = self._lire()
+                etape.lignes = len(self.donnees)
+        return self.donnees
+
+    def _construire_cube(self):
+        # Les ventes sont agrégées une seule fois en un cube produit × région ;
+        # toutes les requêtes du dashboard sont ensuite calculées à partir du cube.
+        profil, afficher = self.profil, self.afficher
+        if isinstance(self.source, CubeVentes):
+            return self.source
+        if self.taille_morceau:
+            with profil.etape('cube (flux)') as etape:
+                morceaux = etape.compter(lire_par_morceaux(self.source, taille=self.taille_morceau, colonnes=self.colonnes))
+                cube = CubeVentes.construire(morceaux, executer=executer_requetes_par_morceaux)
+            afficher(f"🌊 Mode flux : lecture par morceaux de {self.taille_morceau:,} lignes")
+            return cube
+        if self.incremental:
+            # Seules les lignes ajoutées depuis la dernière exécution sont agrégées
+            with profil.etape('cube (incremental)') as etape:
+                resultats_cube, mise_a_jour = executer_requetes_incremental(
+                    {'cube': SQL_CUBE}, self._lire, chemin=self.chemin_etat, colonnes=self.colonnes
+                )
+                cube = CubeVentes.depuis_resultat(resultats_cube['cube'])
+                etape.lignes = mise_a_jour['lignes_traitees']
+            afficher(f"♻️ Mise à jour {mise_a_jour['mode']} : {mise_a_jour['lignes_traitees']:,} ligne(s) traitée(s) "
+                     f"sur {mise_a_jour['lignes_total']:,}")
+            if self.verifier:
+                with profil.etape('verification'):
+                    differences = verifier_etat({'cube': SQL_CUBE}, self._lire, chemin=self.chemin_etat, colonnes=self.colonnes)
+                afficher("✅ État incrémental cohérent avec un recalcul complet" if not differences
+                         else f"❌ Écarts avec le recalcul complet : {', '.join(differences)}")
+            return cube
+        # Réparti sur VENTES_WORKERS processus au-delà de SEUIL_PARALLELE lignes
+        succes = self.cache.succes
+        with profil.etape('cube') as etape:
+            cube = CubeVentes.construire(
+                self.donnees,
+                executer=lambda requetes, df: self.cache.executer_requetes(requetes, df, executer=executer_requetes_parallele),
+            )
+            etape.lignes = len(self.donnees)
+        if self.cache.succes > succes:
+            afficher("💾 Cube repris du cache (données inchangées)")
+        return cube
+
+    def requeter(self):
+        """Construit le cube, calcule les requêtes du dashboard et les classements."""
+        self.cube = self._construire_cube()
+        with self.profil.etape('requetes'):
+            self.resultats = self.cube.executer_requetes(requetes_sql, self.donnees)
+        self.afficher(f"🧊 Cube produit × région : {len(self.cube):,} cellules ; "
+                      f"{len(requetes_sql)} requêtes calculées à partir du cube")
+        self._afficher_requetes()
+        self.classements = self._calculer_classements()
+        if self.periodes:
+            self.series = self._calculer_series()
+        return self.resultats
+
+    def _calculer_series(self):
+        # Seuls les mois qui recoupent l'intervalle sont lus
+        with self.profil.etape('series'):
+            cube = charger_cumuls(self.periodes, derniers_jours=self.derniers_jours)
+            series = cube.executer_requetes(requetes_temporelles) if cube is not None else None
+        if series is None:
+            self.afficher(f"⚠️ Aucune vente datée dans {self.periodes} : pas de séries temporelles")
+            return None
+        etendue = f"{self.derniers_jours} derniers jours" if self.derniers_jours else "toute la période"
+        self.afficher(f"📅 Séries temporelles ({etendue}) : {len(series['jour'])} jour(s), "
+                      f"{len(series['semaine'])} semaine(s), {len(series['mois'])} mois")
+        return series
+
+    def _afficher_requetes(self):
+        afficher, resultats = self.afficher, self.resultats
+        # a. Chiffre d'affaires total
+        afficher("\n📈 REQUÊTE a - Chiffre d'affaires total:")
+        afficher(requetes_sql['ca_total'])
+        ca_total = resultats['ca_total']['chiffre_affaires_total'].iloc[0]
+        afficher(f"✅ Résultat: {ca_total:,.2f} €")
+
+        # b. Ventes par produit (quantité + CA)
+        afficher("\n📦 REQUÊTE b - Ventes par produit (quantité + CA):")
+        afficher(requetes_sql['ventes_par_produit'])
+        afficher(f"✅ Résultat: {len(resultats['ventes_par_produit'])} produits analysés")
+
+        # c. Ventes par région
+        afficher("\n🌍 REQUÊTE c - Ventes par région:")
+        afficher(requetes_sql['ventes_par_region'])
+        afficher(f"✅ Résultat: {len(resultats['ventes_par_region'])} régions analysées")
+
+        # d. Quantité par produit
+        afficher("\n📊 REQUÊTE d - Quantité vendue par produit:")
+        afficher(requetes_sql['quantite_par_produit'])
+        afficher(f"✅ Résultat: {len(resultats['quantite_par_produit'])} produits analysés")
+
+    def _calculer_classements(self):
+        # Tous les classements sont calculés une fois et partagés par les graphiques et le résumé
+        resultats = self.resultats
+        return {
+            **classer(resultats['ventes_par_produit'], {'top5_ca_produits': ('chiffre_affaires', 5),
+                                                         'meilleur_produit_ca': ('chiffre_affaires', 1)}),
+            **classer(resultats['quantite_par_produit'], {'top5_qte_produits': ('quantite_vendue', 5),
+                                                           'meilleur_produit_qte': ('quantite_vendue', 1)}),
+            **classer(resultats['ventes_par_region'], {'meilleure_region_ca': ('chiffre_affaires', 1),
+                                                        'meilleure_region_qte': ('quantite_vendue', 1)}),
+        }
+
+    def visualisations(self):
+        """Pages HTML à produire : dashboard principal puis visualisations individuelles."""
+        import figures
+
+        ventes_produit = self.resultats['ventes_par_produit']
+        ventes_region = self.resultats['ventes_par_region']
+        quantite_produit = self.resultats['quantite_par_produit']
+        top5_ca_produits = self.classements['top5_ca_produits']
+        top5_qte_produits = self.classements['top5_qte_produits']
+        pages = {
+            'dashboard-ventes-complet.html': {
+                'figure': figures.dashboard,
+                'donnees': (ventes_region, ventes_produit, quantite_produit, top5_ca_produits, top5_qte_produits),
+                'description': 'Dashboard complet'
+            },
+            'ventes-quantite-region.html': {
+                'figure': figures.quantite_region,
+                'donnees': (ventes_region,),
+                'description': 'Quantité par région'
+            },
+            'ca-region.html': {
+                'figure': figures.ca_region,
+                'donnees': (ventes_region,),
+                'description': 'CA par région'
+            },
+            'ca-produit.html': {
+                'figure': figures.ca_produit,
+                'donnees': (ventes_produit,),
+                'description': 'CA par produit'
+            },
+            'quantite-produit.html': {
+                'figure': figures.quantite_produit,
+                'donnees': (quantite_produit,),
+                'description': 'Quantité par produit'
+            },
+            'top5-ca-produits.html': {
+                'figure': figures.top5_ca_produits,
+                'donnees': (top5_ca_produits,),
+                'description': 'Top 5 produits par CA'
+            },
+            'top5-quantite-produits.html': {
+                'figure': figures.top5_quantite_produits,
+                'donnees': (top5_qte_produits,),
+                'description': 'Top 5 produits par quantité'
+            }
+        }
+        for periode, serie in (self.series or {}).items():
+            pages[f"evolution-ca-{periode}.html"] = {
+                'figure': figures.evolution,
+                'donnees': (serie, periode),
+                'description': f"Évolution du CA par {periode}"
+            }
+        return pages
+
+    def taches(self, prefixe=''):
+        """Pages à produire, en `TacheFigure` dont les fichiers commencent par `prefixe`."""
+        from rendu import TacheFigure
+
+        return [
+            TacheFigure(prefixe + filename, config['description'], config['figure'], config['donnees'])
+            for filename, config in self.visualisations().items()
+        ]
+
+    def rendre(self):
+        """Construit et sauvegarde les pages HTML dans `sortie` ; seule étape qui importe Plotly."""
+        from rendu import exporter_figures, profiler_rapports
+
+        afficher = self.afficher
+        afficher("\n" + "=" * 60)
+        afficher("🎨 CRÉATION DES VISUALISATIONS")
+        afficher("=" * 60)
+
+        self.sortie.mkdir(parents=True, exist_ok=True)
+        # Construction et sauvegarde en parallèle (VENTES_WORKERS processus) des
+        # seules figures dont les données ou la définition ont changé
+        with self.profil.etape('figures'):
+            rapports = exporter_figures(self.taches(), self.sortie)
+            profiler_rapports(self.profil, rapports)
+        for rapport in rapports:
+            if not rapport.reconstruite:
+                afficher(f"⏭️ {rapport.description} inchangé ({rapport.fichier})")
+                continue
+            afficher(f"✅ {rapport.description} sauvegardé dans {rapport.fichier} "
+                     f"({rapport.total:.2f}s : construction {rapport.construction:.2f}s, "
+                     f"sérialisation {rapport.serialisation:.2f}s, écriture {rapport.ecriture:.2f}s)")
+        return rapports
+
+    def resumer(self):
+        """Affiche le résumé détaillé ; retourne ses indicateurs dans un dictionnaire."""
+        afficher, classements = self.afficher, self.classements
+        ca_total = self.resultats['ca_total']['chiffre_affaires_total'].iloc[0]
+        ventes_produit = self.resultats['ventes_par_produit']
+        ventes_region = self.resultats['ventes_par_region']
+        indicateurs = {'ca_total': float(ca_total), 'produits': len(ventes_produit), 'regions': len(ventes_region)}
+
+        # CORRECTION : Calcul du prix moyen correct, sur une copie (les résultats sont partagés)
+        prix_moyen = ventes_produit['chiffre_affaires'] / ventes_produit['quantite_vendue']
+        ventes_produit = ventes_produit.assign(prix_moyen=prix_moyen.replace([np.inf, -np.inf], np.nan).fillna(0))
+
+        # Trouver le produit avec le meilleur prix moyen
+        if not ventes_produit.empty and 'prix_moyen' in ventes_produit.columns:
+            meilleur = classer(ventes_produit, {'prix': ('prix_moyen', 1)})['prix'].iloc[0]
+            produit_meilleur_prix, meilleur_prix = meilleur['produit'], meilleur['prix_moyen']
+        else:
+            produit_meilleur_prix = "N/A"
+            meilleur_prix = 0
+
+        # Résumé final détaillé
+        afficher("\n" + "=" * 70)
+        afficher("🎯 RÉSUMÉ DÉTAILLÉ DE L'ANALYSE")
+        afficher("=" * 70)
+        afficher(f"💰 Chiffre d'affaires total: {ca_total:,.2f} €")
+        afficher(f"📦 Nombre total de produits: {len(ventes_produit)}")
+        afficher(f"🌍 Nombre total de régions: {len(ventes_region)}")
+        if self.sortie is not None:
+            afficher(f"📊 Fichier principal: dashboard-ventes-complet.html")
+        afficher("=" * 70)
+
+        # Affichage des top performers détaillés
+        afficher("\n🏆 TOP PERFORMERS - DÉTAIL")
+        afficher("-" * 40)
+        if not ventes_region.empty:
+            meilleure = classements['meilleure_region_ca'].iloc[0]
+            afficher(f"📍 Meilleure région (CA): {meilleure['region']} ({meilleure['chiffre_affaires']:,.0f} €)")
+            indicateurs['meilleure_region_ca'] = meilleure['region']
+            meilleure = classements['meilleure_region_qte'].iloc[0]
+            afficher(f"📦 Meilleure région (Quantité): {meilleure['region']} ({meilleure['quantite_vendue']:,.0f} units)")
+            indicateurs['meilleure_region_qte'] = meilleure['region']
+
+        if not ventes_produit.empty:
+            meilleur = classements['meilleur_produit_ca'].iloc[0]
+            afficher(f"⭐ Meilleur produit (CA): {meilleur['produit']} ({meilleur['chiffre_affaires']:,.0f} €)")
+            indicateurs['meilleur_produit_ca'] = meilleur['produit']
+            meilleur = classements['meilleur_produit_qte'].iloc[0]
+            afficher(f"🚀 Meilleur produit (Quantité): {meilleur['produit']} ({meilleur['quantite_vendue']:,.0f} units)")
+            indicateurs['meilleur_produit_qte'] = meilleur['produit']
+
+            # Descente dans le cube : le meilleur produit ventilé par région, sans relire les ventes
+            meilleur_produit = indicateurs['meilleur_produit_ca']
+            afficher(f"🔎 {meilleur_produit} par région: " + ", ".join(
+                f"{ligne.region} {ligne.chiffre_affaires:,.0f} €"
+                for ligne in self.cube.detail(produit=meilleur_produit).itertuples()
+            ))
+
+        # Statistiques supplémentaires CORRIGÉES
+        afficher("\n📊 STATISTIQUES SUPPLÉMENTAIRES")
+        afficher("-" * 30)
+        afficher(f"📈 Produit avec le meilleur prix moyen: {produit_meilleur_prix} ({meilleur_prix:,.2f} €/unit)")
+        indicateurs['produit_meilleur_prix'] = produit_meilleur_prix
+
+        if not ventes_produit.empty:
+            prix_moyen_pondere = ventes_produit['chiffre_affaires'].sum() / ventes_produit['quantite_vendue'].sum()
+            afficher(f"📊 CA moyen par produit: {ventes_produit['chiffre_affaires'].mean():,.0f} €")
+            afficher(f"📦 Quantité moyenne par produit: {ventes_produit['quantite_vendue'].mean():,.0f} units")
+            afficher(f"💰 Prix moyen pondéré: {prix_moyen_pondere:.2f} €/unit")
+            indicateurs['prix_moyen_pondere'] = float(prix_moyen_pondere)
+        else:
+            afficher("📊 Aucune donnée produit disponible")
+
+        afficher("=" * 70)
+
+        if self.sortie is not None:
+            afficher(f"\n🌐 Pour visualiser les résultats: python serve.py")
+            afficher("=" * 70)
+        return indicateurs
@@ -0,0 +1,272 @@
+"""Mesure des étapes d'une exécution : durée, temps CPU, mémoire et lignes.
+
+    profil = Profileur(actif=True)
+    with profil.etape('chargement') as etape:
+        donnees = charger_donnees()
+        etape.lignes = len(donnees)
+    profil.ecrire_rapport('profil.json')    # ou profil.csv
+    profil.ecrire_trace('trace.json')       # Perfetto, chrome://tracing, speedscope
+
+Chaque étape relève la durée réelle, le temps CPU du processus (et celui
+des processus du pool terminés pendant l'étape), le pic de mémoire
+résidente et le nombre de lignes traitées. Sous Linux, le pic est remis à
+zéro au début de chaque étape (/proc/self/clear_refs) : il est propre à
+l'étape et à ses sous-étapes ; ailleurs c'est le pic du processus depuis
+son démarrage. Les étapes peuvent s'imbriquer ; la trace (format Trace
+Event) se lit directement comme un flame graph.
+
+`mesure_externe` ajoute les durées mesurées dans un autre processus (les
+pages produites par le pool de `rendu.exporter_figures`) ; elles
+apparaissent dans le rapport et, dans la trace, sur la piste du processus
+qui les a produites.
+
+Désactivé, `etape` retourne un objet inerte : le coût est un appel de
+méthode, sans mesure ni écriture.
+
+Variables d'environnement :
+    VENTES_PROFIL  chemin du rapport (.json ou .csv), active les mesures
+    VENTES_TRACE   chemin de la trace (.json), active les mesures
+"""
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CHAMPS = ['etape', 'profondeur', 'debut_s', 'duree_s', 'cpu_s', 'cpu_enfants_s', 'pic_rss_octets', 'lignes', 'processus']
+
+
+def _lire_statut(champ):
+    try:
+        with open('/proc/self/status') as statut:
+            for ligne in statut:
+                if ligne.startswith(champ + ':'):
+                    return int(ligne.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def pic_rss():
+    """Pic de mémoire résidente du processus, en octets (None si inconnu)."""
+    pic = _lire_statut('VmHWM')
+    if pic is None and resource is not None:
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pic *= 1 if sys.platform == 'darwin' else 1024
+    return pic
+
+
+def _reinitialiser_pic():
+    try:
+        with open('/proc/self/clear_refs', 'w') as fichier:
+            fichier.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _cpu_enfants():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class _EtapeInactive:
+    lignes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def compter(self, morceaux):
+        return morceaux
+
+
+_INACTIVE = _EtapeInactive()
+
+
+class Etape:
+    """Mesure d'une étape ; `lignes` peut être renseigné dans le bloc."""
+
+    def __init__(self, profileur, nom):
+        self.profileur = profileur
+        self.nom = nom
+        self.lignes = None
+        self.pic = None
+
+    def __enter__(self):
+        profileur = self.profileur
+        self.profondeur = len(profileur._pile)
+        if profileur._pile and profileur._pic_reinitialisable:
+            # Le pic atteint jusqu'ici appartient à l'étape englobante
+            parent = profileur._pile[-1]
+            parent.pic = max(parent.pic or 0, pic_rss() or 0)
+        profileur._pile.append(self)
+        if profileur._pic_reinitialisable:
+            _reinitialiser_pic()
+        self._cpu_enfants = _cpu_enfants()
+        self._cpu = time.process_time()
+        self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duree = time.perf_counter() - self._debut
+        cpu = time.process_time() - self._cpu
+        cpu_enfants = _cpu_enfants() - self._cpu_enfants
+        pic = max(self.pic or 0, pic_rss() or 0) or None
+        profileur = self.profileur
+        profileur._pile.pop()
+        if profileur._pile:
+            parent = profileur._pile[-1]
+            parent.pic = max(parent.pic or 0, pic or 0)
+        profileur.mesures.append({
+            'etape': self.nom,
+            'profondeur': self.profondeur,
+            'debut_s': self._debut - profileur.origine,
+            'duree_s': duree,
+            'cpu_s': cpu,
+            'cpu_enfants_s': cpu_enfants,
+            'pic_rss_octets': pic,
+            'lignes': self.lignes,
+            'processus': None,
+        })
+        return False
+
+    def compter(self, morceaux):
+        """Itère sur des DataFrames en ajoutant leurs lignes à `lignes`."""
+        self.lignes = self.lignes or 0
+        for morceau in morceaux:
+            self.lignes += len(morceau)
+            yield morceau
+
+
+class Profileur:
+    """Collecte les mesures des étapes, si `actif`."""
+
+    def __init__(self, actif=True, chemin_rapport=None, chemin_trace=None):
+        self.actif = actif
+        self.chemin_rapport = chemin_rapport
+        self.chemin_trace = chemin_trace
+        self.mesures = []
+        self.origine = time.perf_counter()
+        self._pile = []
+        self._pic_reinitialisable = actif and _reinitialiser_pic()
+
+    @classmethod
+    def depuis_environnement(cls, rapport=None, trace=None):
+        """Profileur actif si un rapport ou une trace est demandé (arguments ou variables)."""
+        rapport = rapport or os.environ.get('VENTES_PROFIL')
+        trace = trace or os.environ.get('VENTES_TRACE')
+        return cls(bool(rapport or trace), rapport, trace)
+
+    def etape(self, nom):
+        if not self.actif:
+            return _INACTIVE
+        return Etape(self, nom)
+
+    def mesure_externe(self, nom, debut, duree, profondeur=0, processus=None, lignes=None):
+        """Ajoute une mesure prise ailleurs (processus du pool...) sous l'étape en cours.
+
+        `debut` est une valeur de `time.perf_counter()`, horloge commune aux
+        processus de la machine ; `profondeur` est relative à l'étape en cours.
+        """
+        if not self.actif:
+            return
+        self.mesures.append({
+            'etape': nom,
+            'profondeur': len(self._pile) + profondeur,
+            'debut_s': debut - self.origine,
+            'duree_s': duree,
+            'cpu_s': None,
+            'cpu_enfants_s': None,
+            'pic_rss_octets': None,
+            'lignes': lignes,
+            'processus': processus,
+        })
+
+    def _dans_l_ordre(self):
+        """Mesures en ordre de parcours : chaque étape suivie de ses sous-étapes.
+
+        Les sous-étapes de processus différents se chevauchent dans le temps ;
+        chacune est rattachée à l'étape qui la contient dans son processus.
+        """
+        mesures = sorted(self.mesures, key=lambda mesure: (mesure['debut_s'], mesure['profondeur']))
+        enfants = {id(mesure): [] for mesure in mesures}
+        racines = []
+        for position, mesure in enumerate(mesures):
+            parent = next((
+                candidat for candidat in reversed(mesures[:position])
+                if candidat['profondeur'] == mesure['profondeur'] - 1
+                and candidat['processus'] in (None, mesure['processus'])
+                and mesure['debut_s'] <= candidat['debut_s'] + candidat['duree_s'] + 1e-6
+            ), None)
+            (enfants[id(parent)] if parent is not None else racines).append(mesure)
+        ordre = []
+        pile = list(reversed(racines))
+        while pile:
+            mesure = pile.pop()
+            ordre.append(mesure)
+            pile.extend(reversed(enfants[id(mesure)]))
+        return ordre
+
+    def ecrire_rapport(self, chemin):
+        """Écrit les mesures en JSON ou en CSV selon l'extension du fichier."""
+        chemin = Path(chemin)
+        mesures = self._dans_l_ordre()
+        if chemin.suffix == '.csv':
+            with open(chemin, 'w', newline='') as fichier:
+                writer = csv.DictWriter(fichier, fieldnames=CHAMPS)
+                writer.writeheader()
+                writer.writerows(mesures)
+        else:
+            chemin.write_text(json.dumps({'etapes': mesures}, indent=2))
+        return chemin
+
+    def ecrire_trace(self, chemin):
+        """Écrit les étapes au format Trace Event (événements complets, en µs)."""
+        evenements = [
+            {
+                'name': mesure['etape'], 'ph': 'X', 'pid': mesure['processus'] or os.getpid(), 'tid': 0,
+                'ts': mesure['debut_s'] * 1e6, 'dur': mesure['duree_s'] * 1e6,
+                'args': {cle: mesure[cle] for cle in ('cpu_s', 'cpu_enfants_s', 'pic_rss_octets', 'lignes')},
+            }
+            for mesure in self._dans_l_ordre()
+        ]
+        chemin = Path(chemin)
+        chemin.write_text(json.dumps({'traceEvents': evenements, 'displayTimeUnit': 'ms'}))
+        return chemin
+
+    def terminer(self):
+        """Écrit le rapport et la trace demandés ; retourne les chemins écrits."""
+        if not self.actif:
+            return []
+        ecrits = []
+        if self.chemin_rapport:
+            ecrits.append(self.ecrire_rapport(self.chemin_rapport))
+        if self.chemin_trace:
+            ecrits.append(self.ecrire_trace(self.chemin_trace))
+        return ecrits
+
+    def resume(self):
+        """Lignes de texte résumant les étapes, sous-étapes en retrait."""
+        lignes = []
+        for mesure in self._dans_l_ordre():
+            retrait = '   ' * (mesure['profondeur'] + 1)
+            pic = f", pic {mesure['pic_rss_octets'] / 2 ** 20:,.0f} Mo" if mesure['pic_rss_octets'] else ''
+            nombre = f", {mesure['lignes']:,} lignes" if mesure['lignes'] is not None else ''
+            if mesure['cpu_s'] is None:
+                details = f"processus {mesure['processus']}{nombre}" if mesure['processus'] else nombre.lstrip(', ')
+            else:
+                details = f"CPU {mesure['cpu_s'] + mesure['cpu_enfants_s']:.3f}s{pic}{nombre}"
+            details = f" ({details})" if details else ''
+            lignes.append(f"{retrait}{mesure['etape']:<24} {mesure['duree_s']:8.3f}s{details}")
+        return lignes
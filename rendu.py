@@ -0,0 +1,215 @@
+"""Export HTML des figures Plotly.
+
+Par défaut, les pages référencent une copie locale unique de plotly.js
+(`plotly-<version>.min.js`, environ 4,8 Mo) écrite une fois dans le
+répertoire de sortie, au lieu de l'embarquer dans chaque fichier : le
+navigateur et `serve.py` ne la transfèrent qu'une fois. Le numéro de
+version dans le nom évite de servir une ancienne copie après une mise à
+jour de Plotly.
+
+`VENTES_HTML_AUTONOME=1` (ou `autonome=True`) produit au contraire des
+pages autonomes, lisibles sans le fichier partagé.
+
+`exporter_figures` construit, sérialise et écrit un ensemble de figures
+sur un pool de processus. Chaque page est écrite dans un fichier
+temporaire puis renommée : un serveur ne voit jamais de page à moitié
+écrite.
+
+Un manifeste (`html/.manifest.json`) conserve l'empreinte de chaque page :
+contenu des tables en entrée, code du module qui définit la figure et
+des modules du projet qu'il utilise (`classement.py`...), valeur de leurs
+constantes (`figures.MAX_BARRES`, tirée de `VENTES_MAX_BARRES`), version
+de Plotly et mode d'export. Une page dont l'empreinte n'a pas
+changé n'est ni reconstruite ni réécrite, ce qui garde sa date de
+modification stable pour le cache HTTP.
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from pathlib import Path
+
+import pandas as pd
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from fichiers import ecrire_atomique
+from parallele import contexte_processus, nombre_workers
+
+BUNDLE_PLOTLYJS = f"plotly-{get_plotlyjs_version()}.min.js"
+MANIFESTE = '.manifest.json'
+
+
+def html_autonome():
+    """Indique si les pages doivent embarquer plotly.js (VENTES_HTML_AUTONOME)."""
+    return os.environ.get('VENTES_HTML_AUTONOME', '') not in ('', '0')
+
+
+def installer_plotlyjs(dossier):
+    """Écrit la copie partagée de plotly.js dans `dossier` si elle manque."""
+    chemin = Path(dossier) / BUNDLE_PLOTLYJS
+    if not chemin.exists():
+        ecrire_atomique(chemin, get_plotlyjs())
+    return chemin
+
+
+def figure_en_html(figure, autonome=None, bundle=BUNDLE_PLOTLYJS):
+    """Sérialise une figure en page HTML, avec plotly.js partagé (chemin `bundle`) ou embarqué."""
+    autonome = html_autonome() if autonome is None else autonome
+    return figure.to_html(include_plotlyjs=True if autonome else bundle)
+
+
+@dataclass(frozen=True)
+class TacheFigure:
+    """Figure à produire : `construire(*arguments)` doit être une fonction de module.
+
+    `fichier` est relatif au répertoire d'export et peut contenir des
+    sous-répertoires (`Nord/ca-produit.html`) ; la copie partagée de
+    plotly.js reste unique, à la racine.
+    """
+    fichier: str
+    description: str
+    construire: object
+    arguments: tuple
+
+
+@dataclass(frozen=True)
+class RapportFigure:
+    """Durées (en secondes) des étapes de production d'une figure."""
+    fichier: str
+    description: str
+    construction: float
+    serialisation: float
+    ecriture: float
+    octets: int
+    reconstruite: bool = True
+    debut: float = 0.0          # time.perf_counter() au début de la construction
+    processus: int = None       # pid du processus qui a produit la page
+
+    @property
+    def total(self):
+        return self.construction + self.serialisation + self.ecriture
+
+
+def profiler_rapports(profil, rapports):
+    """Ajoute au profil construction, sérialisation et écriture des pages reconstruites."""
+    for rapport in rapports:
+        if not rapport.reconstruite:
+            continue
+        profil.mesure_externe(f"figure {rapport.fichier}", rapport.debut, rapport.total, processus=rapport.processus)
+        debut = rapport.debut
+        for nom in ('construction', 'serialisation', 'ecriture'):
+            duree = getattr(rapport, nom)
+            profil.mesure_externe(nom, debut, duree, profondeur=1, processus=rapport.processus)
+            debut += duree
+
+
+def _rendre(tache, dossier, autonome):
+    debut = time.perf_counter()
+    figure = tache.construire(*tache.arguments)
+    construite = time.perf_counter()
+    profondeur = len(Path(tache.fichier).parts) - 1
+    html = figure_en_html(figure, autonome, '../' * profondeur + BUNDLE_PLOTLYJS)
+    serialisee = time.perf_counter()
+    chemin = Path(dossier) / tache.fichier
+    chemin.parent.mkdir(parents=True, exist_ok=True)
+    ecrire_atomique(chemin, html)
+    ecrite = time.perf_counter()
+    return RapportFigure(
+        tache.fichier, tache.description,
+        construite - debut, serialisee - construite, ecrite - serialisee, len(html.encode()),
+        debut=debut, processus=os.getpid(),
+    )
+
+
+def _empreinte_valeur(valeur, empreinte):
+    if isinstance(valeur, pd.DataFrame):
+        empreinte.update(repr((list(valeur.columns), [str(t) for t in valeur.dtypes])).encode())
+        empreinte.update(pd.util.hash_pandas_object(valeur, index=True).to_numpy().tobytes())
+    elif isinstance(valeur, pd.Series):
+        empreinte.update(repr((valeur.name, str(valeur.dtype))).encode())
+        empreinte.update(pd.util.hash_pandas_object(valeur, index=True).to_numpy().tobytes())
+    else:
+        empreinte.update(repr(valeur).encode())
+
+
+def _modules_projet(module):
+    """`module` et les modules voisins (même répertoire) dont il importe des noms."""
+    dossier = Path(module.__file__).resolve().parent
+    modules = {module.__name__: module}
+    for valeur in vars(module).values():
+        if inspect.isfunction(valeur) or inspect.isclass(valeur):
+            valeur = sys.modules.get(valeur.__module__)
+        fichier = getattr(valeur, '__file__', None) if inspect.ismodule(valeur) else None
+        if fichier and Path(fichier).resolve().parent == dossier:
+            modules.setdefault(valeur.__name__, valeur)
+    return [modules[nom] for nom in sorted(modules)]
+
+
+def empreinte_tache(tache, autonome):
+    """Empreinte des entrées d'une figure : données, définition et export."""
+    empreinte = hashlib.sha256()
+    empreinte.update(f"{tache.construire.__module__}.{tache.construire.__qualname__}".encode())
+    for module in _modules_projet(inspect.getmodule(tache.construire)):
+        # Code et réglages (constantes lues de l'environnement) du module
+        constantes = sorted((nom, valeur) for nom, valeur in vars(module).items()
+                            if nom.isupper() and isinstance(valeur, (bool, int, float, str)))
+        empreinte.update(f"{module.__name__}|{constantes!r}".encode())
+        empreinte.update(inspect.getsource(module).encode())
+    empreinte.update(f"{get_plotlyjs_version()}|{autonome}".encode())
+    for argument in tache.arguments:
+        _empreinte_valeur(argument, empreinte)
+    return empreinte.hexdigest()
+
+
+def lire_manifeste(dossier):
+    try:
+        return json.loads((Path(dossier) / MANIFESTE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def exporter_figures(taches, dossier, workers=None, autonome=None):
+    """Construit et écrit les figures en parallèle.
+
+    Seules les figures dont l'empreinte diffère du manifeste (ou dont le
+    fichier manque) sont produites. Retourne un `RapportFigure` par tâche,
+    dans l'ordre des tâches. Avec un seul processus (VENTES_WORKERS=1 ou
+    machine mono-cœur), les figures sont produites en série dans le
+    processus courant.
+    """
+    dossier = Path(dossier)
+    autonome = html_autonome() if autonome is None else autonome
+    if not autonome:
+        installer_plotlyjs(dossier)
+
+    manifeste = lire_manifeste(dossier)
+    empreintes = {tache.fichier: empreinte_tache(tache, autonome) for tache in taches}
+    a_produire = [
+        tache for tache in taches
+        if manifeste.get(tache.fichier) != empreintes[tache.fichier] or not (dossier / tache.fichier).exists()
+    ]
+
+    workers = min(workers or nombre_workers(), len(a_produire))
+    if workers <= 1:
+        produits = [_rendre(tache, dossier, autonome) for tache in a_produire]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexte_processus()) as pool:
+            produits = list(pool.map(_rendre, a_produire, repeat(dossier), repeat(autonome)))
+    produits = {rapport.fichier: rapport for rapport in produits}
+
+    if produits:
+        manifeste.update({fichier: empreintes[fichier] for fichier in produits})
+        ecrire_atomique(dossier / MANIFESTE, json.dumps(manifeste, indent=2, sort_keys=True))
+
+    return [
+        produits.get(tache.fichier) or RapportFigure(
+            tache.fichier, tache.description, 0.0, 0.0, 0.0,
+            (dossier / tache.fichier).stat().st_size, reconstruite=False,
+        )
+        for tache in taches
+    ]
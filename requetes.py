@@ -0,0 +1,94 @@
+"""Requêtes SQL du tableau de bord des ventes.
+
+`requetes_sql` alimente le dashboard ; `requetes_parametrees` sont
+exposées en plus par l'API JSON de serve.py (voir `api.py`), leurs
+paramètres :nom étant fournis dans l'URL. `requetes_temporelles` portent
+sur les colonnes de période (jour, semaine, mois) des ventes datées,
+calculées à partir des cumuls de `periodes.py`.
+"""
+
+# Requêtes du dashboard
+requetes_sql = {
+    'ca_total': """
+        SELECT SUM(prix * qte) AS chiffre_affaires_total
+        FROM donnees
+    """,
+    
+    'ventes_par_produit': """
+        SELECT 
+            produit,
+            SUM(qte) AS quantite_vendue,
+            SUM(prix * qte) AS chiffre_affaires
+        FROM donnees
+        GROUP BY produit
+        ORDER BY chiffre_affaires DESC
+    """,
+    
+    'ventes_par_region': """
+        SELECT 
+            region,
+            SUM(qte) AS quantite_vendue,
+            SUM(prix * qte) AS chiffre_affaires
+        FROM donnees
+        GROUP BY region
+        ORDER BY chiffre_affaires DESC
+    """,
+    
+    'quantite_par_produit': """
+        SELECT 
+            produit,
+            SUM(qte) AS quantite_vendue
+        FROM donnees
+        GROUP BY produit
+        ORDER BY quantite_vendue DESC
+    """
+}
+
+# Requêtes à la demande de l'API
+requetes_parametrees = {
+    'produits_par_region': """
+        SELECT
+            produit,
+            SUM(qte) AS quantite_vendue,
+            SUM(prix * qte) AS chiffre_affaires
+        FROM donnees
+        WHERE region = :region
+        GROUP BY produit
+        ORDER BY chiffre_affaires DESC
+    """,
+
+    'regions_par_produit': """
+        SELECT
+            region,
+            SUM(qte) AS quantite_vendue,
+            SUM(prix * qte) AS chiffre_affaires
+        FROM donnees
+        WHERE produit = :produit
+        GROUP BY region
+        ORDER BY chiffre_affaires DESC
+    """,
+
+    'produits_ca_minimum': """
+        SELECT
+            produit,
+            SUM(prix * qte) AS chiffre_affaires
+        FROM donnees
+        GROUP BY produit
+        HAVING chiffre_affaires >= :minimum
+        ORDER BY chiffre_affaires DESC
+    """,
+}
+
+# Séries temporelles (ventes datées, voir periodes.py)
+requetes_temporelles = {
+    periode: f"""
+        SELECT
+            {periode},
+            SUM(qte) AS quantite_vendue,
+            SUM(prix * qte) AS chiffre_affaires
+        FROM donnees
+        GROUP BY {periode}
+        ORDER BY {periode}
+    """
+    for periode in ('jour', 'semaine', 'mois')
+}
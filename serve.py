@@ -1,37 +1,382 @@
 #!/usr/bin/env python3
-import os
+"""Serveur HTTP des dashboards générés dans html/.
+
+Les requêtes sont traitées par un pool de threads de taille bornée
+(`--threads`), si bien qu'un client lent n'en bloque pas d'autres ; une
+connexion dont la ligne de requête et les en-têtes n'arrivent pas en 15
+secondes (`VENTES_DELAI_INACTIVITE`), keep-alive inactive comprise, est
+fermée, et l'arrêt ferme celles qui restent. Le délai ne s'applique pas à
+l'envoi de la réponse. Chaque fichier est servi avec un ETag fort (SHA-256
+du contenu) et les requêtes conditionnelles If-None-Match reçoivent un 304. Les pages HTML sont
+revalidées à chaque visite (Cache-Control: no-cache) ; la copie versionnée
+de plotly.js est mise en cache un an par le navigateur.
+
+Les fichiers texte sont servis précompressés : une variante .gz (et .br
+si le module brotli est installé) est écrite à côté de chaque fichier au
+démarrage. Les threads de requête ne compressent jamais : une variante
+absente ou plus ancienne que l'original est refaite en arrière-plan et,
+en attendant, le fichier est servi tel quel. Les réponses de l'API ne
+sont pas compressées.
+
+Avec `--api`, les données sont chargées une fois et l'API JSON de
+`api.py` répond sous /api/ (requêtes nommées ou SQL libre, avec cache).
+
+    python serve.py --port 8000 --threads 64 --headless --api
+"""
+import argparse
+import gzip
+import hashlib
 import http.server
-import socketserver
+import io
+import json
+import os
+import socket
+import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from fichiers import ecrire_atomique
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONS_COMPRESSIBLES = {'.html', '.js', '.css', '.json', '.svg', '.csv', '.txt'}
+ENCODAGES = {'br': '.br', 'gzip': '.gz'}
+
+
+def variante_a_jour(chemin, encodage):
+    """Chemin de la variante compressée d'un fichier si elle existe et est à jour, sinon None."""
+    if chemin.suffix not in EXTENSIONS_COMPRESSIBLES or (encodage == 'br' and brotli is None):
+        return None
+    variante = chemin.with_name(chemin.name + ENCODAGES[encodage])
+    try:
+        if variante.stat().st_mtime_ns >= chemin.stat().st_mtime_ns:
+            return variante
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def variante_compressee(chemin, encodage):
+    """Chemin de la variante compressée à jour d'un fichier, créée si besoin.
+
+    Retourne None si le fichier ne se compresse pas ou si l'encodage n'est
+    pas disponible.
+    """
+    if chemin.suffix not in EXTENSIONS_COMPRESSIBLES or (encodage == 'br' and brotli is None):
+        return None
+    variante = variante_a_jour(chemin, encodage)
+    if variante is not None:
+        return variante
+    variante = chemin.with_name(chemin.name + ENCODAGES[encodage])
+    contenu = chemin.read_bytes()
+    if encodage == 'br':
+        compresse = brotli.compress(contenu, quality=11)
+    else:
+        compresse = gzip.compress(contenu, compresslevel=9, mtime=0)
+    ecrire_atomique(variante, compresse)
+    return variante
+
+
+def precompresser(dossier):
+    """Prépare les variantes compressées de tous les fichiers du dossier."""
+    for chemin in Path(dossier).rglob('*'):
+        if chemin.is_file() and not chemin.name.startswith('.'):
+            for encodage in ENCODAGES:
+                variante_compressee(chemin, encodage)
+
+
+class CacheEtags:
+    """ETags forts calculés une fois par version (taille, date) de fichier."""
+
+    def __init__(self):
+        self._etags = {}
+        self._verrou = threading.Lock()
+
+    def etag(self, chemin, stat):
+        cle = (str(chemin), stat.st_size, stat.st_mtime_ns)
+        with self._verrou:
+            etag = self._etags.get(cle)
+        if etag is None:
+            empreinte = hashlib.sha256()
+            with open(chemin, 'rb') as fichier:
+                for bloc in iter(lambda: fichier.read(1 << 20), b''):
+                    empreinte.update(bloc)
+            etag = f'"{empreinte.hexdigest()[:32]}"'
+            with self._verrou:
+                self._etags[cle] = etag
+        return etag
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    """Sert les fichiers avec ETag, 304 et variantes précompressées."""
+
+    protocol_version = 'HTTP/1.1'
+    # Délai de lecture de la ligne de requête et des en-têtes : une connexion
+    # keep-alive inactive libère son thread du pool
+    timeout = int(os.environ.get('VENTES_DELAI_INACTIVITE', 15))
+    etags = CacheEtags()
+    api = None
+
+    def handle_one_request(self):
+        self.connection.settimeout(self.timeout)
+        super().handle_one_request()
+
+    def parse_request(self):
+        # En-têtes lus : l'envoi de la réponse n'est pas limité par le délai
+        valide = super().parse_request()
+        self.connection.settimeout(None)
+        return valide
+
+    def end_headers(self):
+        self.send_header('Vary', 'Accept-Encoding')
+        super().end_headers()
+
+    def _encodages_acceptes(self):
+        acceptes = set()
+        for element in self.headers.get('Accept-Encoding', '').split(','):
+            nom, _, parametres = element.strip().partition(';')
+            if parametres.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                continue
+            acceptes.add(nom.strip().lower())
+        return acceptes
+
+    def _cache_control(self, chemin):
+        if chemin.name.startswith('plotly-') and chemin.name.endswith('.min.js'):
+            return 'public, max-age=31536000, immutable'
+        return 'no-cache'
+
+    def _reponse_api(self):
+        """Corps et statut d'un appel /api/, ou None hors de l'API."""
+        from moteur_sql import ErreurSQL
+        from api import RequeteInconnue
+
+        url = urlsplit(self.path)
+        parametres = dict(parse_qsl(url.query))
+        try:
+            if url.path in ('/api/requetes', '/api/requetes/'):
+                return HTTPStatus.OK, self.api.catalogue()
+            if url.path.startswith('/api/requetes/'):
+                return HTTPStatus.OK, self.api.executer(url.path.removeprefix('/api/requetes/'), parametres)
+            if url.path == '/api/classement':
+                return HTTPStatus.OK, self.api.classement(
+                    parametres.get('dimension', 'produit'), parametres.get('mesure', 'chiffre_affaires'),
+                    parametres.get('n', '10'),
+                )
+            if url.path == '/api/sql':
+                if 'q' not in parametres:
+                    raise ErreurSQL("Paramètre q attendu")
+                return HTTPStatus.OK, self.api.executer_sql(parametres.pop('q'), parametres)
+        except RequeteInconnue as erreur:
+            return HTTPStatus.NOT_FOUND, json.dumps({'erreur': f"Requête inconnue: {erreur.args[0]}"}).encode()
+        except ErreurSQL as erreur:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'erreur': str(erreur)}, ensure_ascii=False).encode()
+        except Exception as erreur:
+            self.log_error("Erreur de l'API sur %s: %r", self.path, erreur)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'erreur': "Erreur interne"}).encode()
+        return HTTPStatus.NOT_FOUND, json.dumps({'erreur': "Point d'accès inconnu"}).encode()
+
+    def _envoyer_api(self):
+        statut, corps = self._reponse_api()
+        etag = f'"{hashlib.sha256(corps).hexdigest()[:32]}"'
+        if statut == HTTPStatus.OK and etag in [e.strip() for e in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return None
+        self.send_response(statut)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corps)))
+        if statut == HTTPStatus.OK:
+            self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        return io.BytesIO(corps)
+
+    def send_head(self):
+        if self.api is not None and urlsplit(self.path).path.startswith('/api/'):
+            return self._envoyer_api()
+        # Fichiers cachés (.manifest.json, temporaires d'écriture) : jamais servis
+        if any(partie.startswith('.') for partie in unquote(urlsplit(self.path).path).split('/')):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        chemin = Path(self.translate_path(self.path))
+        if not chemin.is_file() or self.path.endswith('/'):
+            return super().send_head()
+
+        # Choix de la représentation : brotli, gzip ou fichier brut
+        servi, encodage = chemin, None
+        acceptes = self._encodages_acceptes()
+        for candidat in ENCODAGES:
+            if candidat in acceptes:
+                variante = variante_a_jour(chemin, candidat)
+                if variante is not None:
+                    servi, encodage = variante, candidat
+                    break
+        if encodage is None and acceptes & set(ENCODAGES) and chemin.suffix in EXTENSIONS_COMPRESSIBLES:
+            self.server.preparer_variantes(chemin)
+
+        try:
+            fichier = open(servi, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            stat = os.fstat(fichier.fileno())
+            etag = self.etags.etag(servi, stat)
+            if etag in [e.strip() for e in self.headers.get('If-None-Match', '').split(',')]:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', self._cache_control(chemin))
+                self.end_headers()
+                fichier.close()
+                return None
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', self.guess_type(str(chemin)))
+            self.send_header('Content-Length', str(stat.st_size))
+            if encodage:
+                self.send_header('Content-Encoding', encodage)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(stat.st_mtime))
+            self.send_header('Cache-Control', self._cache_control(chemin))
+            self.end_headers()
+            return fichier
+        except BaseException:
+            fichier.close()
+            raise
+
+
+class ServeurPool(http.server.HTTPServer):
+    """Serveur HTTP dont les connexions sont traitées par un pool de threads."""
+
+    def __init__(self, adresse, handler, threads):
+        super().__init__(adresse, handler)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+        self.compression = ThreadPoolExecutor(max_workers=1, thread_name_prefix='compression')
+        self._connexions = set()
+        self._a_compresser = set()
+        self._verrou = threading.Lock()
+
+    def preparer_variantes(self, chemin):
+        """Refait en arrière-plan les variantes compressées manquantes ou périmées de `chemin`."""
+        with self._verrou:
+            if chemin in self._a_compresser:
+                return
+            self._a_compresser.add(chemin)
+        try:
+            self.compression.submit(self._compresser, chemin)
+        except RuntimeError:
+            # Serveur en cours d'arrêt
+            with self._verrou:
+                self._a_compresser.discard(chemin)
+
+    def _compresser(self, chemin):
+        try:
+            for encodage in ENCODAGES:
+                variante_compressee(chemin, encodage)
+        except OSError as erreur:
+            print(f"⚠️ Compression de {chemin} impossible: {erreur}")
+        finally:
+            with self._verrou:
+                self._a_compresser.discard(chemin)
+
+    def process_request(self, request, client_address):
+        with self._verrou:
+            self._connexions.add(request)
+        self.pool.submit(self._traiter, request, client_address)
+
+    def _traiter(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._verrou:
+                self._connexions.discard(request)
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        # Débloque les threads qui attendent encore un client : sans cela,
+        # l'arrêt de l'interpréteur attendrait la fin de leur connexion
+        with self._verrou:
+            connexions = list(self._connexions)
+        for request in connexions:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.pool.shutdown(wait=True)
+        self.compression.shutdown(wait=True, cancel_futures=True)
+
+
+def creer_api():
+    """API JSON sur les données de ventes, chargées une fois."""
+    from api import ApiVentes
+    from cube import SQL_CUBE, CubeVentes
+    from moteur_sql import colonnes_requises
+    from requetes import requetes_parametrees, requetes_sql
+    from source_donnees import charger_donnees
+
+    requetes = {**requetes_sql, **requetes_parametrees}
+    donnees = charger_donnees(colonnes=colonnes_requises([SQL_CUBE, *requetes.values()]))
+    return ApiVentes(donnees, requetes, cube=CubeVentes.construire(donnees))
+
+
+def creer_serveur(dossier='html', port=8000, threads=32, hote='', api=None):
+    """Crée le serveur sur `dossier` sans le démarrer ; `api` active /api/."""
+    dossier = Path(dossier).resolve()
+    api_serveur = api
+
+    class HandlerDossier(Handler):
+        api = api_serveur
 
-def demarrer_serveur():
-    # Se déplacer dans le répertoire html
-    html_dir = Path('html')
-    os.chdir(html_dir)
-    
-    PORT = 8000
-    
-    class Handler(http.server.SimpleHTTPRequestHandler):
         def __init__(self, *args, **kwargs):
-            super().__init__(*args, directory=str(html_dir), **kwargs)
-    
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
-        print(f"🌐 Serveur HTTP démarré sur http://localhost:{PORT}")
-        print("📁 Servant les fichiers depuis le répertoire: html/")
+            super().__init__(*args, directory=str(dossier), **kwargs)
+
+    return ServeurPool((hote, port), HandlerDossier, threads)
+
+
+def demarrer_serveur(dossier='html', port=8000, threads=32, hote='', headless=False, api=False):
+    html_dir = Path(dossier)
+    precompresser(html_dir)
+    api = creer_api() if api else None
+
+    with creer_serveur(html_dir, port, threads, hote, api) as httpd:
+        print(f"🌐 Serveur HTTP démarré sur http://localhost:{port} ({threads} threads)")
+        print(f"📁 Servant les fichiers depuis le répertoire: {html_dir}/")
         print("📊 Fichiers disponibles:")
-        for file in html_dir.glob('*.html'):
-            print(f"   • http://localhost:{PORT}/{file.name}")
+        for file in sorted(html_dir.glob('*.html')):
+            print(f"   • http://localhost:{port}/{file.name}")
+        if api is not None:
+            print(f"🔌 API JSON: http://localhost:{port}/api/requetes ({len(api.donnees):,} lignes chargées)")
         print("\n🛑 Pour arrêter le serveur: Ctrl+C")
         print("=" * 50)
-        
+
         # Ouvrir le dashboard automatiquement
-        webbrowser.open(f"http://localhost:{PORT}/dashboard-ventes-complet.html")
-        
+        if not headless:
+            webbrowser.open(f"http://localhost:{port}/dashboard-ventes-complet.html")
+
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\n🛑 Serveur arrêté")
 
+
 if __name__ == "__main__":
-    demarrer_serveur()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sert les dashboards générés par app.py")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--hote', default='', help="adresse d'écoute (toutes par défaut)")
+    parser.add_argument('--dossier', default='html', help="répertoire à servir")
+    parser.add_argument('--threads', type=int, default=32, help="requêtes traitées simultanément")
+    parser.add_argument('--headless', action='store_true', help="ne pas ouvrir de navigateur")
+    parser.add_argument('--api', action='store_true', help="charger les données et servir l'API JSON /api/")
+    args = parser.parse_args()
+    demarrer_serveur(args.dossier, args.port, args.threads, args.hote, args.headless, args.api)
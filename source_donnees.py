@@ -0,0 +1,364 @@
+"""Chargement des données de ventes avec cache local.
+
+Le CSV publié par Google Sheets est conservé sur disque avec ses
+métadonnées (somme de contrôle SHA-256, date de téléchargement, ETag et
+Last-Modified renvoyés par le serveur). Tant que la copie a moins de
+`ttl` secondes, elle est lue sans accès réseau ; au-delà, elle est
+revalidée par une requête conditionnelle (If-None-Match /
+If-Modified-Since) et n'est retéléchargée que si la source a changé.
+Si la source est injoignable, la dernière copie valide est utilisée. Le
+téléchargement est copié et haché par blocs : la mémoire utilisée ne
+dépend pas de la taille du CSV.
+
+Au premier chargement d'un nouveau téléchargement, une copie en colonnes
+(Parquet compressé zstd) est écrite à côté du CSV avec un schéma explicite
+(`SCHEMA_VENTES`) :
+`produit` et `region` en catégories, `prix` en float32, `qte` en int32 et,
+si elle existe, `date` en datetime64.
+Le chargement lit alors uniquement les colonnes demandées. Parquet
+nécessite pyarrow (`uv pip install pyarrow`) ; sans lui, le CSV est lu
+avec le même schéma.
+
+Avec `VENTES_INSTANTANE=1`, un instantané binaire (voir `instantane.py`)
+est écrit à côté du CSV et projeté en mémoire aux chargements suivants,
+sans analyse ni copie. Un répertoire d'instantané peut aussi être donné
+directement comme source.
+
+Variables d'environnement :
+    VENTES_SOURCE      URL (ou chemin local) du CSV, par défaut la feuille publiée
+    VENTES_CACHE_DIR   répertoire du cache, par défaut .cache/
+    VENTES_CACHE_TTL   durée de validité sans revalidation, en secondes
+    VENTES_INSTANTANE  lit le cache depuis un instantané projeté en mémoire
+"""
+import argparse
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+from fichiers import ecrire_atomique, fichier_temporaire
+from instantane import charger_instantane, ecrire_instantane, empreinte_instantane, est_instantane, morceaux_instantane
+from profilage import Profileur
+
+URL_VENTES = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSC4KusfFzvOsr8WJRgozzsCxrELW4G4PopUkiDbvrrV2lg0S19-zeryp02MC9WYSVBuzGCUtn8ucZW/pub?output=csv'
+DOSSIER_CACHE = Path(os.environ.get('VENTES_CACHE_DIR', '.cache'))
+TTL_CACHE = float(os.environ.get('VENTES_CACHE_TTL', 600))
+DELAI_RESEAU = 30
+LIGNES_GROUPE = 128 * 1024     # lignes par groupe des copies Parquet
+
+# Schéma typé du tableau des ventes
+SCHEMA_VENTES = {
+    'produit': 'category',
+    'region': 'category',
+    'prix': 'float32',
+    'qte': 'int32',
+    'date': 'datetime64[ns]',   # facultative, voir periodes.py
+}
+
+
+def parquet_disponible():
+    """Indique si pyarrow est installé pour lire et écrire du Parquet."""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def source_par_defaut():
+    """URL de la source de données, éventuellement surchargée par VENTES_SOURCE."""
+    return os.environ.get('VENTES_SOURCE', URL_VENTES)
+
+
+def _est_distante(source):
+    return str(source).startswith(('http://', 'https://'))
+
+
+def _chemins_cache(url, dossier):
+    cle = hashlib.sha256(url.encode()).hexdigest()[:16]
+    return dossier / f"{cle}.csv", dossier / f"{cle}.json"
+
+
+def _chemin_parquet(chemin_csv):
+    return chemin_csv.with_suffix('.parquet')
+
+
+def _chemin_instantane(chemin_csv):
+    return chemin_csv.with_suffix('.instantane')
+
+
+def instantane_actif():
+    """Indique si le cache doit être lu depuis un instantané (VENTES_INSTANTANE)."""
+    return os.environ.get('VENTES_INSTANTANE', '') not in ('', '0')
+
+
+def typer_donnees(df):
+    """Applique `SCHEMA_VENTES` aux colonnes présentes du DataFrame."""
+    return df.astype({colonne: type_ for colonne, type_ in SCHEMA_VENTES.items() if colonne in df.columns})
+
+
+def _position_ligne(fichier, numero):
+    """Position en octets du début de la ligne `numero` (0 pour la première)."""
+    position = 0
+    while numero:
+        bloc = fichier.read(1 << 20)
+        if not bloc:
+            return position
+        fins = bloc.count(b'\n')
+        if fins < numero:
+            numero -= fins
+            position += len(bloc)
+            continue
+        fin = -1
+        for _ in range(numero):
+            fin = bloc.index(b'\n', fin + 1)
+        return position + fin + 1
+    return position
+
+
+def lire_csv(chemin, colonnes=None, a_partir_de=0):
+    """Lit un CSV de ventes avec le schéma typé et seulement les colonnes demandées.
+
+    Avec `a_partir_de`, les premières lignes de données ne sont pas
+    analysées : le fichier est parcouru par blocs jusqu'au saut de ligne
+    voulu (les champs du CSV ne contiennent pas de saut de ligne), puis
+    lu à partir de cette position. L'index conserve la numérotation des
+    lignes de la source.
+    """
+    if not a_partir_de:
+        return typer_donnees(pd.read_csv(chemin, usecols=colonnes))
+    with open(chemin, 'rb') as fichier:
+        entete = pd.read_csv(io.BytesIO(fichier.readline()), nrows=0).columns
+        fichier.seek(0)
+        fichier.seek(_position_ligne(fichier, a_partir_de + 1))
+        df = typer_donnees(pd.read_csv(fichier, names=list(entete), header=None, usecols=colonnes))
+    df.index = pd.RangeIndex(a_partir_de, a_partir_de + len(df))
+    return df
+
+
+def convertir_parquet(source, destination):
+    """Écrit le tableau des ventes (DataFrame ou chemin CSV) en Parquet typé.
+
+    Les lignes sont rangées par groupes de `LIGNES_GROUPE` : une lecture
+    à partir d'une ligne donnée ne décompresse que les groupes suivants.
+    """
+    df = source if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+    destination = Path(destination)
+    with fichier_temporaire(destination) as temporaire:
+        typer_donnees(df).to_parquet(temporaire, engine='pyarrow', compression='zstd', index=False,
+                                     row_group_size=LIGNES_GROUPE)
+    return destination
+
+
+def lire_parquet(chemin, colonnes=None, a_partir_de=0):
+    """Lit un fichier Parquet de ventes en ne chargeant que les colonnes demandées.
+
+    Avec `a_partir_de`, seuls les groupes de lignes qui suivent la position
+    (d'après les nombres de lignes des métadonnées) sont lus.
+    """
+    if not a_partir_de:
+        return pd.read_parquet(chemin, engine='pyarrow', columns=colonnes)
+    import pyarrow.parquet as pq
+
+    fichier = pq.ParquetFile(chemin)
+    groupes, premiere = [], None
+    debut = 0
+    for groupe in range(fichier.metadata.num_row_groups):
+        fin = debut + fichier.metadata.row_group(groupe).num_rows
+        if fin > a_partir_de:
+            groupes.append(groupe)
+            premiere = debut if premiere is None else premiere
+        debut = fin
+    table = fichier.read_row_groups(groupes, columns=colonnes)
+    if premiere is not None:
+        table = table.slice(a_partir_de - premiere)
+    df = table.to_pandas()
+    df.index = pd.RangeIndex(a_partir_de, a_partir_de + len(df))
+    return df
+
+
+def _somme_controle(chemin):
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(1 << 20), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _lire_metadonnees(chemin_csv, chemin_meta):
+    """Métadonnées du cache, ou None si la copie est absente ou corrompue.
+
+    La somme de contrôle n'est recalculée que si la taille ou la date de
+    modification du CSV ne sont plus celles enregistrées.
+    """
+    if not (chemin_csv.exists() and chemin_meta.exists()):
+        return None
+    try:
+        meta = json.loads(chemin_meta.read_text())
+    except (OSError, ValueError):
+        return None
+    stat = chemin_csv.stat()
+    if (meta.get('taille'), meta.get('mtime_ns')) == (stat.st_size, stat.st_mtime_ns):
+        return meta
+    if meta.get('sha256') != _somme_controle(chemin_csv):
+        return None
+    meta.update(taille=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    ecrire_atomique(chemin_meta, json.dumps(meta, indent=2).encode())
+    return meta
+
+
+def rafraichir_cache(url=None, dossier=None, ttl=None, forcer=False):
+    """Met à jour le cache local d'une source CSV distante.
+
+    Retourne le chemin du CSV en cache et ses métadonnées. Le champ
+    `statut` des métadonnées vaut 'cache' (copie récente, aucun accès
+    réseau), 'revalide' (304 Not Modified), 'inchange' (téléchargé mais
+    somme de contrôle identique), 'telecharge' ou 'hors_ligne'.
+    """
+    url = url or source_par_defaut()
+    dossier = Path(dossier) if dossier is not None else DOSSIER_CACHE
+    ttl = TTL_CACHE if ttl is None else ttl
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin_csv, chemin_meta = _chemins_cache(url, dossier)
+
+    meta = _lire_metadonnees(chemin_csv, chemin_meta)
+    maintenant = time.time()
+    if meta is not None and not forcer and maintenant - meta['verifie_le'] < ttl:
+        return chemin_csv, dict(meta, statut='cache')
+
+    requete = urllib.request.Request(url)
+    if meta is not None and not forcer:
+        if meta.get('etag'):
+            requete.add_header('If-None-Match', meta['etag'])
+        if meta.get('last_modified'):
+            requete.add_header('If-Modified-Since', meta['last_modified'])
+
+    try:
+        # Copié par blocs dans un fichier temporaire : la mémoire ne dépend pas
+        # de la taille du CSV ; la copie précédente reste en place en cas d'échec
+        with urllib.request.urlopen(requete, timeout=DELAI_RESEAU) as reponse, \
+                fichier_temporaire(chemin_csv) as temporaire, open(temporaire, 'wb') as fichier:
+            empreinte, taille = hashlib.sha256(), 0
+            for bloc in iter(lambda: reponse.read(1 << 20), b''):
+                empreinte.update(bloc)
+                fichier.write(bloc)
+                taille += len(bloc)
+            entetes = reponse.headers
+    except urllib.error.HTTPError as erreur:
+        if erreur.code == 304 and meta is not None:
+            meta['verifie_le'] = maintenant
+            ecrire_atomique(chemin_meta, json.dumps(meta, indent=2).encode())
+            return chemin_csv, dict(meta, statut='revalide')
+        if meta is None:
+            raise
+        print(f"⚠️ Source indisponible ({erreur}), utilisation du cache du {time.ctime(meta['telecharge_le'])}")
+        return chemin_csv, dict(meta, statut='hors_ligne')
+    except (urllib.error.URLError, OSError) as erreur:
+        if meta is None:
+            raise
+        print(f"⚠️ Source injoignable ({erreur}), utilisation du cache du {time.ctime(meta['telecharge_le'])}")
+        return chemin_csv, dict(meta, statut='hors_ligne')
+
+    somme = empreinte.hexdigest()
+    statut = 'inchange' if meta is not None and meta['sha256'] == somme else 'telecharge'
+    if statut == 'telecharge':
+        _chemin_parquet(chemin_csv).unlink(missing_ok=True)
+    meta = {
+        'url': url,
+        'sha256': somme,
+        'taille': taille,
+        'mtime_ns': chemin_csv.stat().st_mtime_ns,
+        'etag': entetes.get('ETag'),
+        'last_modified': entetes.get('Last-Modified'),
+        'telecharge_le': maintenant if statut == 'telecharge' else meta['telecharge_le'],
+        'verifie_le': maintenant,
+    }
+    ecrire_atomique(chemin_meta, json.dumps(meta, indent=2).encode())
+    return chemin_csv, dict(meta, statut=statut)
+
+
+def charger_donnees(source=None, dossier_cache=None, ttl=None, forcer=False, colonnes=None, a_partir_de=0,
+                    profil=None):
+    """Charge le tableau des ventes, depuis le cache local si la source n'a pas changé.
+
+    `colonnes` limite la lecture aux colonnes utiles (voir
+    `moteur_sql.colonnes_requises`) ; la copie Parquet du cache est
+    utilisée quand pyarrow est disponible, ou l'instantané projeté en
+    mémoire avec VENTES_INSTANTANE. `a_partir_de` ne charge que les lignes
+    suivant celles déjà traitées (voir `etat_incremental`). Avec `profil`
+    (`profilage.Profileur`), le téléchargement (ou la revalidation du
+    cache) et la lecture sont mesurés comme deux sous-étapes.
+    """
+    profil = profil if profil is not None else Profileur(actif=False)
+    source = source or source_par_defaut()
+    colonnes = list(colonnes) if colonnes is not None else None
+    if not _est_distante(source):
+        with profil.etape('lecture'):
+            if est_instantane(source):
+                return charger_instantane(source, colonnes, a_partir_de)
+            if str(source).endswith('.parquet'):
+                return lire_parquet(source, colonnes, a_partir_de)
+            return lire_csv(source, colonnes, a_partir_de)
+
+    with profil.etape('telechargement'):
+        chemin_csv, meta = rafraichir_cache(source, dossier_cache, ttl, forcer)
+    with profil.etape('lecture'):
+        if instantane_actif():
+            # Réécrit à chaque nouveau téléchargement, puis projeté en mémoire
+            chemin_instantane = _chemin_instantane(chemin_csv)
+            if empreinte_instantane(chemin_instantane) != meta['sha256']:
+                ecrire_instantane(_lire_cache(chemin_csv), chemin_instantane, empreinte=meta['sha256'])
+            return charger_instantane(chemin_instantane, colonnes, a_partir_de)
+        return _lire_cache(chemin_csv, colonnes, a_partir_de)
+
+
+def _lire_cache(chemin_csv, colonnes=None, a_partir_de=0):
+    if not parquet_disponible():
+        return lire_csv(chemin_csv, colonnes, a_partir_de)
+    chemin_parquet = _chemin_parquet(chemin_csv)
+    if not chemin_parquet.exists():
+        convertir_parquet(chemin_csv, chemin_parquet)
+    return lire_parquet(chemin_parquet, colonnes, a_partir_de)
+
+
+def lire_par_morceaux(source=None, taille=1_000_000, colonnes=None, dossier_cache=None, ttl=None):
+    """Lit le tableau des ventes par morceaux de `taille` lignes.
+
+    Générateur de DataFrames typés, pour agréger des sources plus grandes
+    que la mémoire (voir `moteur_sql.executer_requetes_par_morceaux`).
+    """
+    source = source or source_par_defaut()
+    colonnes = list(colonnes) if colonnes is not None else None
+    if _est_distante(source):
+        source, meta = rafraichir_cache(source, dossier_cache, ttl)
+        if instantane_actif() and empreinte_instantane(_chemin_instantane(source)) == meta['sha256']:
+            source = _chemin_instantane(source)
+        elif parquet_disponible() and _chemin_parquet(source).exists():
+            source = _chemin_parquet(source)
+
+    if est_instantane(source):
+        yield from morceaux_instantane(source, taille, colonnes)
+        return
+
+    if str(source).endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for lot in pq.ParquetFile(source).iter_batches(batch_size=taille, columns=colonnes):
+            yield lot.to_pandas()
+        return
+
+    with pd.read_csv(source, usecols=colonnes, chunksize=taille) as lecteur:
+        for morceau in lecteur:
+            yield typer_donnees(morceau)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convertit le tableau des ventes en Parquet typé")
+    parser.add_argument('destination', help="fichier .parquet à écrire")
+    parser.add_argument('--source', help="URL ou CSV source (par défaut VENTES_SOURCE ou la feuille publiée)")
+    args = parser.parse_args()
+    chemin = convertir_parquet(charger_donnees(args.source), args.destination)
+    print(f"✅ {chemin} écrit ({chemin.stat().st_size:,} octets)")
@@ -0,0 +1,105 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from api import ApiVentes
+from moteur_sql import ErreurSQL
+from requetes import requetes_parametrees, requetes_sql
+from serve import creer_serveur
+
+
+@pytest.fixture
+def api():
+    donnees = pd.DataFrame({
+        'produit': pd.Categorical(['001', '1e3', 'P2', 'P2']),
+        'region': pd.Categorical(['Nord', 'Sud', '001', 'Nord']),
+        'prix': [1.0, 2.0, 3.0, 4.0],
+        'qte': [1, 2, 3, 4],
+    })
+    return ApiVentes(donnees, {**requetes_sql, **requetes_parametrees})
+
+
+def resultat(corps):
+    return json.loads(corps)['resultat']['data']
+
+
+@pytest.fixture
+def serveur(api, tmp_path):
+    (tmp_path / 'index.html').write_text("<p>ventes</p>")
+    (tmp_path / '.manifest.json').write_text("{}")
+    httpd = creer_serveur(tmp_path, port=0, threads=2, hote='127.0.0.1', api=api)
+    fil = threading.Thread(target=httpd.serve_forever, daemon=True)
+    fil.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def statut(url):
+    try:
+        with urllib.request.urlopen(url, timeout=10) as reponse:
+            return reponse.status
+    except urllib.error.HTTPError as erreur:
+        return erreur.code
+
+
+def test_libelles_numeriques_restent_du_texte(api):
+    assert resultat(api.executer('produits_par_region', {'region': '001'})) == [['P2', 3, 9.0]]
+    assert resultat(api.executer('regions_par_produit', {'produit': '1e3'})) == [['Sud', 2, 4.0]]
+
+
+def test_parametre_compare_a_un_nombre(api):
+    corps = json.loads(api.executer('produits_ca_minimum', {'minimum': '10'}))
+    assert corps['parametres'] == {'minimum': 10}
+    assert corps['resultat']['data'] == [['P2', 25.0]]
+    assert resultat(api.executer_sql("SELECT produit FROM ventes WHERE qte > :q LIMIT 5", {'q': '2.5'})) \
+        == [['P2'], ['P2']]
+    with pytest.raises(ErreurSQL):
+        api.executer('produits_ca_minimum', {'minimum': 'abc'})
+
+
+def test_cache_par_plan(api):
+    api.executer_sql("SELECT region, SUM(qte) AS q FROM ventes GROUP BY region")
+    api.executer_sql("select region,  SUM(qte) AS q\n FROM ventes GROUP BY region ")
+    assert api._calculer.cache_info().hits == 1
+
+    # Les espaces d'un littéral font partie de la requête
+    api.executer_sql("SELECT produit FROM ventes WHERE produit = 'P 2' LIMIT 5")
+    api.executer_sql("SELECT produit FROM ventes WHERE produit = 'P  2' LIMIT 5")
+    assert api._calculer.cache_info().hits == 1
+
+
+def test_fichiers_caches_non_servis(serveur):
+    assert statut(f"{serveur}/index.html") == 200
+    assert statut(f"{serveur}/.manifest.json") == 404
+    assert statut(f"{serveur}/%2Emanifest.json") == 404
+
+
+@pytest.mark.parametrize('chemin, attendu', [
+    ("/api/requetes", 200),
+    ("/api/requetes/produits_par_region?region=Nord", 200),
+    ("/api/requetes/inconnue", 404),
+    ("/api/inconnu", 404),
+    ("/api/requetes/produits_par_region", 400),
+    ("/api/requetes/produits_ca_minimum?minimum=abc", 400),
+    ("/api/sql", 400),
+    ("/api/sql?q=SELECT+*+FROM+ventes", 400),
+    ("/api/sql?q=SELECT+inconnue+FROM+ventes+LIMIT+5", 400),
+    ("/api/sql?q=SELECT+region+FROM+ventes+WHERE+region+%2B+1+%3E+2+LIMIT+5", 400),
+    ("/api/classement?dimension=produit&n=3", 200),
+    ("/api/classement?dimension=date", 400),
+    ("/api/classement?n=-1", 400),
+])
+def test_statuts_http(serveur, chemin, attendu):
+    assert statut(serveur + chemin) == attendu
+
+
+def test_erreur_en_json(serveur):
+    with pytest.raises(urllib.error.HTTPError) as erreur:
+        urllib.request.urlopen(f"{serveur}/api/requetes/inconnue", timeout=10)
+    assert erreur.value.headers['Content-Type'].startswith('application/json')
+    assert json.loads(erreur.value.read()) == {'erreur': "Requête inconnue: inconnue"}
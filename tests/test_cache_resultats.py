@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from cache_resultats import CacheResultats
+from moteur_sql import colonnes_requises, executer_requetes
+from requetes import requetes_parametrees, requetes_sql
+
+
+@pytest.fixture
+def ventes():
+    return pd.DataFrame({
+        'produit': pd.Categorical(['P1', 'P2', 'P1', 'P3']),
+        'region': pd.Categorical(['Nord', 'Sud', 'Est', 'Nord']),
+        'prix': [10.0, 20.0, 10.0, 5.0],
+        'qte': [2, 1, 4, 3],
+    })
+
+
+class Compteur:
+    """Exécuteur qui compte les requêtes réellement calculées."""
+
+    def __init__(self):
+        self.calculees = []
+
+    def __call__(self, requetes, df, parametres=None):
+        self.calculees.extend(requetes)
+        return executer_requetes(requetes, df, parametres)
+
+
+def test_invalide_quand_les_donnees_changent(ventes):
+    cache, executer = CacheResultats(), Compteur()
+    cache.executer_requetes(requetes_sql, ventes, executer=executer)
+    assert cache.executer_requetes(requetes_sql, ventes.copy(), executer=executer).keys() == requetes_sql.keys()
+    assert len(executer.calculees) == len(requetes_sql)
+
+    modifiees = ventes.assign(prix=ventes['prix'].where(ventes['produit'] != 'P3', 6.0))
+    executer.calculees.clear()
+    resultats = cache.executer_requetes(requetes_sql, modifiees, executer=executer)
+    assert sorted(executer.calculees) == sorted(nom for nom, requete_sql in requetes_sql.items()
+                                                if 'prix' in colonnes_requises([requete_sql]))
+    assert resultats['ca_total']['chiffre_affaires_total'].iloc[0] == 98.0
+
+
+def test_seules_les_colonnes_lues_comptent(ventes):
+    cache, executer = CacheResultats(), Compteur()
+    requetes = {'qte_par_region': "SELECT region, SUM(qte) AS q FROM ventes GROUP BY region",
+                'ca_total': requetes_sql['ca_total']}
+    cache.executer_requetes(requetes, ventes, executer=executer)
+    executer.calculees.clear()
+    cache.executer_requetes(requetes, ventes.assign(prix=ventes['prix'] * 2), executer=executer)
+    assert executer.calculees == ['ca_total']
+
+
+def test_parametres_et_disque(ventes, tmp_path):
+    executer = Compteur()
+    requetes = {'produits_par_region': requetes_parametrees['produits_par_region']}
+    nord = CacheResultats(dossier=tmp_path).executer_requetes(requetes, ventes, {'region': 'Nord'}, executer=executer)
+    sud = CacheResultats(dossier=tmp_path).executer_requetes(requetes, ventes, {'region': 'Sud'}, executer=executer)
+    assert list(nord['produits_par_region']['produit']) == ['P1', 'P3']
+    assert list(sud['produits_par_region']['produit']) == ['P2']
+
+    # Nouvelle instance : le résultat est relu sur disque
+    CacheResultats(dossier=tmp_path).executer_requetes(requetes, ventes, {'region': 'Nord'}, executer=executer)
+    assert len(executer.calculees) == 2
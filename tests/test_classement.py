@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from classement import classer, indices_meilleurs
+
+
+def table(valeurs):
+    return pd.DataFrame({'produit': [f"P{i}" for i in range(len(valeurs))], 'ca': valeurs})
+
+
+@pytest.mark.parametrize('valeurs', [
+    [3.0, 1.0, 3.0, 2.0, 3.0, 0.5],
+    [np.nan, 2.0, np.nan, 2.0, 1.0],
+    [np.nan, np.nan, np.nan],
+    [],
+])
+@pytest.mark.parametrize('n', [0, 1, 2, 3, 10])
+def test_indices_meilleurs_comme_nlargest(valeurs, n):
+    attendu = table(valeurs).nlargest(n, 'ca')
+    assert list(indices_meilleurs(valeurs, n)) == list(attendu.index)
+
+
+def test_indices_meilleurs_aleatoires_avec_ex_aequo():
+    rng = np.random.default_rng(0)
+    valeurs = rng.integers(0, 20, 500).astype(float)
+    valeurs[rng.random(500) < 0.1] = np.nan
+    for n in (1, 5, 50, 480, 600):
+        assert list(indices_meilleurs(valeurs, n)) == list(table(valeurs).nlargest(n, 'ca').index)
+
+
+def test_classer_plusieurs_classements():
+    df = table([5.0, 9.0, 7.0, 9.0])
+    classements = classer(df, {'top2': ('ca', 2), 'meilleur': ('ca', 1)})
+    pd.testing.assert_frame_equal(classements['top2'], df.nlargest(2, 'ca'))
+    pd.testing.assert_frame_equal(classements['meilleur'], df.nlargest(1, 'ca'))
+
+
+def test_classement_par_morceaux_sur_totaux_fusionnes():
+    # Chaque produit est réparti sur plusieurs morceaux : seul son total compte
+    from cube import CubeVentes
+    from moteur_sql import executer_requetes_par_morceaux
+    from requetes import requetes_sql
+
+    rng = np.random.default_rng(3)
+    ventes = pd.DataFrame({
+        'produit': rng.choice([f"P{i}" for i in range(40)], 2_000),
+        'region': rng.choice(['Nord', 'Sud'], 2_000),
+        'prix': rng.uniform(1, 50, 2_000),
+        'qte': rng.integers(1, 10, 2_000),
+    })
+    morceaux = (ventes.iloc[debut:debut + 300] for debut in range(0, len(ventes), 300))
+    cube = CubeVentes.construire(morceaux, executer=executer_requetes_par_morceaux)
+    top = classer(cube.executer(requetes_sql['ventes_par_produit']), {'top': ('chiffre_affaires', 5)})['top']
+    totaux = ventes.assign(ca=ventes['prix'] * ventes['qte']).groupby('produit')['ca'].sum()
+    assert list(top['produit'].astype(str)) == list(totaux.nlargest(5).index)
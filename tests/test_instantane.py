@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from instantane import (
+    charger_instantane, ecrire_instantane, empreinte_instantane, est_instantane, morceaux_instantane,
+)
+
+
+@pytest.fixture
+def ventes():
+    return pd.DataFrame({
+        'produit': pd.Categorical(['P2', 'P1', 'P2', 'P3', 'P1']),
+        'region': ['Nord', 'Sud', 'Sud', 'Est', 'Nord'],
+        'prix': [10.5, 20.0, 10.5, 7.25, 20.0],
+        'qte': np.array([2, 1, 4, 3, 5], dtype='int32'),
+    })
+
+
+def test_aller_retour(ventes, tmp_path):
+    ecrire_instantane(ventes, tmp_path, empreinte='abc')
+    assert est_instantane(tmp_path) and empreinte_instantane(tmp_path) == 'abc'
+
+    relu = charger_instantane(tmp_path)
+    # Les tableaux relus sont des np.memmap : on compare valeurs et types
+    attendu = ventes.astype({'region': 'category'})
+    assert relu.dtypes.equals(attendu.dtypes)
+    for nom in attendu.columns:
+        assert list(relu[nom]) == list(attendu[nom])
+    assert not relu['prix'].to_numpy().flags.writeable
+
+
+def test_colonnes_et_plages(ventes, tmp_path):
+    ecrire_instantane(ventes, tmp_path)
+    partiel = charger_instantane(tmp_path, ['produit', 'qte'], a_partir_de=1, jusqu_a=3)
+    assert list(partiel.columns) == ['produit', 'qte'] and list(partiel.index) == [1, 2]
+    assert list(partiel['produit']) == ['P1', 'P2']
+    assert sum(len(morceau) for morceau in morceaux_instantane(tmp_path, taille=2)) == len(ventes)
+    with pytest.raises(KeyError):
+        charger_instantane(tmp_path, ['inconnue'])
+
+
+def test_reecriture_remplace_les_colonnes(ventes, tmp_path):
+    ecrire_instantane(ventes, tmp_path)
+    ecrire_instantane(ventes.iloc[:2], tmp_path, empreinte='def')
+    assert len(list(tmp_path.glob('*.npy'))) == len(ventes.columns)
+    assert len(charger_instantane(tmp_path)) == 2 and empreinte_instantane(tmp_path) == 'def'
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import CubeVentes
+from etat_incremental import executer_requetes_incremental
+from moteur_sql import (
+    ErreurSQL,
+    executer_requete_sql,
+    executer_requetes,
+    executer_requetes_par_morceaux,
+)
+from parallele import executer_requetes_parallele
+from requetes import requetes_parametrees, requetes_sql
+
+
+@pytest.fixture(scope='module')
+def ventes():
+    rng = np.random.default_rng(42)
+    taille = 3_000
+    produits = [f"P{i}" for i in range(1, 31)]
+    return pd.DataFrame({
+        'produit': pd.Categorical(rng.choice(produits, taille), categories=produits),
+        'region': pd.Categorical(rng.choice(['Nord', 'Sud', 'Est', 'Ouest'], taille)),
+        'prix': rng.uniform(5, 100, taille).round(2),
+        'qte': rng.integers(1, 20, taille),
+    })
+
+
+def comparer(resultat, attendu):
+    """Égalité aux arrondis près, sans tenir compte des types de clés (catégorie, texte)."""
+    normaliser = lambda df: df.reset_index(drop=True).astype(
+        {colonne: str for colonne in df.columns if not pd.api.types.is_numeric_dtype(df[colonne])})
+    pd.testing.assert_frame_equal(normaliser(resultat), normaliser(attendu), check_dtype=False)
+
+
+def ventes_par(ventes, cle):
+    return (ventes.assign(ca=ventes['prix'] * ventes['qte'])
+            .groupby(cle, observed=True)
+            .agg(quantite_vendue=('qte', 'sum'), chiffre_affaires=('ca', 'sum'))
+            .reset_index())
+
+
+def test_ca_total(ventes):
+    resultat = executer_requete_sql(requetes_sql['ca_total'], ventes)
+    assert resultat['chiffre_affaires_total'].iloc[0] == pytest.approx((ventes['prix'] * ventes['qte']).sum())
+
+
+@pytest.mark.parametrize('cle', ['produit', 'region'])
+def test_ventes_par_cle_comme_pandas(ventes, cle):
+    resultat = executer_requete_sql(requetes_sql[f'ventes_par_{cle}'], ventes)
+    comparer(resultat, ventes_par(ventes, cle).sort_values('chiffre_affaires', ascending=False))
+
+
+def test_where_in_having_limit(ventes):
+    resultat = executer_requete_sql("""
+        SELECT produit, COUNT(*) AS n, AVG(prix) AS prix_moyen, MAX(qte) AS qte_max
+        FROM ventes
+        WHERE region IN ('Nord', 'Sud') AND qte >= 5
+        GROUP BY produit
+        HAVING n > 10
+        ORDER BY n DESC, produit
+        LIMIT 5
+    """, ventes)
+    lignes = ventes[ventes['region'].isin(['Nord', 'Sud']) & (ventes['qte'] >= 5)]
+    attendu = (lignes.groupby('produit', observed=True)
+               .agg(n=('qte', 'size'), prix_moyen=('prix', 'mean'), qte_max=('qte', 'max'))
+               .reset_index())
+    attendu = attendu[attendu['n'] > 10].astype({'produit': str}).sort_values(['n', 'produit'], ascending=[False, True])
+    comparer(resultat, attendu.head(5))
+
+
+def test_requete_non_agregee(ventes):
+    resultat = executer_requete_sql("SELECT produit, prix * qte AS ca FROM ventes WHERE qte > 18 ORDER BY ca DESC LIMIT 10", ventes)
+    lignes = ventes[ventes['qte'] > 18]
+    attendu = pd.DataFrame({'produit': lignes['produit'], 'ca': lignes['prix'] * lignes['qte']})
+    comparer(resultat, attendu.sort_values('ca', ascending=False, kind='stable').head(10))
+
+
+def test_parametres(ventes):
+    resultat = executer_requete_sql(requetes_parametrees['produits_par_region'], ventes, {'region': 'Nord'})
+    attendu = ventes_par(ventes[ventes['region'] == 'Nord'], 'produit')
+    comparer(resultat, attendu.sort_values('chiffre_affaires', ascending=False))
+
+
+def test_order_by_numero_de_colonne(ventes):
+    par_nom = executer_requete_sql("SELECT region, SUM(qte) AS q FROM ventes GROUP BY region ORDER BY q DESC", ventes)
+    par_numero = executer_requete_sql("SELECT region, SUM(qte) AS q FROM ventes GROUP BY region ORDER BY 2 DESC", ventes)
+    comparer(par_numero, par_nom)
+    assert list(executer_requete_sql("SELECT region FROM ventes GROUP BY region ORDER BY 1", ventes)['region']) \
+        == sorted(ventes['region'].unique())
+
+
+@pytest.mark.parametrize('requete_sql', [
+    "SELECT region FROM ventes ORDER BY 3",
+    "SELECT region FROM ventes ORDER BY 1.5",
+    "SELECT region FROM ventes ORDER BY 'region'",
+    "SELECT * FROM ventes ORDER BY 1",
+    "SELECT produit FROM ventes WHERE SUM(qte) > 1",
+    "SELECT produit, SUM(qte) AS q FROM ventes",
+    "SELECT inconnue FROM ventes",
+])
+def test_requetes_invalides(ventes, requete_sql):
+    with pytest.raises(ErreurSQL):
+        executer_requete_sql(requete_sql, ventes)
+
+
+def test_lot_comme_requetes_isolees(ventes):
+    resultats = executer_requetes(requetes_sql, ventes)
+    for nom, requete_sql in requetes_sql.items():
+        comparer(resultats[nom], executer_requete_sql(requete_sql, ventes))
+
+
+def test_flux_comme_table_complete(ventes):
+    morceaux = (ventes.iloc[debut:debut + 700] for debut in range(0, len(ventes), 700))
+    resultats = executer_requetes_par_morceaux(requetes_sql, morceaux)
+    for nom, attendu in executer_requetes(requetes_sql, ventes).items():
+        comparer(resultats[nom], attendu)
+
+
+def test_parallele_comme_serie(ventes):
+    resultats = executer_requetes_parallele(requetes_sql, ventes, workers=2, seuil=0)
+    for nom, attendu in executer_requetes(requetes_sql, ventes).items():
+        comparer(resultats[nom], attendu)
+
+
+def test_parallele_avec_parametres(ventes):
+    parametres = {'region': 'Nord', 'produit': 'P3', 'minimum': 20_000}
+    resultats = executer_requetes_parallele(requetes_parametrees, ventes, parametres, workers=2, seuil=0)
+    for nom, attendu in executer_requetes(requetes_parametrees, ventes, parametres).items():
+        comparer(resultats[nom], attendu)
+
+
+def test_cube_comme_lignes(ventes):
+    cube = CubeVentes.construire(ventes)
+    for requete_sql in requetes_sql.values():
+        comparer(cube.executer(requete_sql), executer_requete_sql(requete_sql, ventes))
+    comparer(cube.executer(requetes_parametrees['regions_par_produit'], {'produit': 'P3'}),
+             executer_requete_sql(requetes_parametrees['regions_par_produit'], ventes, {'produit': 'P3'}))
+
+
+def test_incremental_comme_table_complete(ventes, tmp_path):
+    chemin = tmp_path / 'etat.pkl'
+    source = {'lignes': ventes.iloc[:2_000]}
+    charger = lambda debut: source['lignes'].iloc[debut:]
+
+    _, mise_a_jour = executer_requetes_incremental(requetes_sql, charger, chemin)
+    assert mise_a_jour['mode'] == 'complet'
+
+    source['lignes'] = ventes
+    resultats, mise_a_jour = executer_requetes_incremental(requetes_sql, charger, chemin)
+    assert (mise_a_jour['mode'], mise_a_jour['lignes_traitees']) == ('incremental', 1_000)
+    for nom, attendu in executer_requetes(requetes_sql, ventes).items():
+        comparer(resultats[nom], attendu)
+
+    # Source réécrite : l'ancre ne correspond plus, tout est recalculé
+    source['lignes'] = ventes.iloc[::-1].reset_index(drop=True)
+    resultats, mise_a_jour = executer_requetes_incremental(requetes_sql, charger, chemin)
+    assert mise_a_jour['mode'] == 'complet'
+    comparer(resultats['ca_total'], executer_requetes(requetes_sql, ventes)['ca_total'])
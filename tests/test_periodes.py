@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import periodes
+from moteur_sql import executer_requete_sql
+from periodes import charger_cumuls, ecrire_periodes, partitions_utiles
+from requetes import requetes_sql, requetes_temporelles
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(7)
+    taille = 900
+    return pd.DataFrame({
+        'produit': rng.choice(['P1', 'P2', 'P3'], taille),
+        'region': rng.choice(['Nord', 'Sud'], taille),
+        'prix': rng.uniform(1, 50, taille).round(2),
+        'qte': rng.integers(1, 10, taille),
+        'date': pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24, taille), unit='h'),
+    })
+
+
+@pytest.fixture
+def dossier(ventes, tmp_path):
+    assert set(ecrire_periodes(ventes, tmp_path).values()) == {'ecrite'}
+    return tmp_path
+
+
+def test_partitions_utiles(dossier):
+    assert partitions_utiles(dossier) == ['2026-01', '2026-02', '2026-03']
+    assert partitions_utiles(dossier, pd.Timestamp('2026-02-10'), pd.Timestamp('2026-02-20')) == ['2026-02']
+    assert partitions_utiles(dossier, pd.Timestamp('2026-01-31'), pd.Timestamp('2026-02-01')) == ['2026-01', '2026-02']
+    assert partitions_utiles(dossier, pd.Timestamp('2027-01-01')) == []
+
+
+def test_cumuls_ne_lisent_que_les_mois_utiles(ventes, dossier, monkeypatch):
+    lus = []
+    charger = periodes.charger_instantane
+    monkeypatch.setattr(periodes, 'charger_instantane', lambda chemin, *args: lus.append(chemin.parent.name) or charger(chemin, *args))
+
+    cube = charger_cumuls(dossier, '2026-02-10', '2026-02-20')
+    assert lus == ['2026-02']
+    jours = ventes[(ventes['date'] >= '2026-02-10') & (ventes['date'] < '2026-02-21')].assign(jour=ventes['date'].dt.normalize())
+    attendu = executer_requete_sql(requetes_temporelles['jour'], jours)
+    resultat = cube.executer(requetes_temporelles['jour'])
+    assert list(resultat['jour']) == list(attendu['jour'])
+    assert list(resultat['chiffre_affaires']) == pytest.approx(list(attendu['chiffre_affaires']))
+
+
+def test_derniers_jours(ventes, dossier):
+    cube = charger_cumuls(dossier, derniers_jours=7)
+    dernier = ventes['date'].max().normalize()
+    recentes = ventes[ventes['date'] >= dernier - pd.Timedelta(days=6)]
+    total = cube.executer(requetes_sql['ca_total'])['chiffre_affaires_total'].iloc[0]
+    assert total == pytest.approx((recentes['prix'] * recentes['qte']).sum())
+    assert charger_cumuls(dossier, '2027-01-01') is None
+
+
+def test_mois_inchanges_non_reecrits(ventes, dossier):
+    mars = ventes[ventes['date'] >= '2026-03-01']
+    assert ecrire_periodes(mars, dossier) == {'2026-03': 'inchangee'}
+    assert partitions_utiles(dossier) == ['2026-01', '2026-02', '2026-03']
+
+
+def test_derniers_jours_exclut_les_bornes(dossier):
+    with pytest.raises(ValueError):
+        charger_cumuls(dossier, debut='2026-02-01', derniers_jours=7)
+    with pytest.raises(ValueError):
+        periodes.intervalle(dossier, fin='2026-02-01', derniers_jours=7)
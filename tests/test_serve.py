@@ -0,0 +1,66 @@
+import gzip
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+from serve import creer_serveur, precompresser
+
+
+@pytest.fixture
+def serveur(tmp_path):
+    httpd = creer_serveur(tmp_path, port=0, threads=2, hote='127.0.0.1')
+    httpd.RequestHandlerClass.timeout = 1
+    fil = threading.Thread(target=httpd.serve_forever, daemon=True)
+    fil.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def obtenir(httpd, chemin, **entetes):
+    connexion = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=10)
+    connexion.request('GET', chemin, headers=entetes)
+    reponse = connexion.getresponse()
+    corps = reponse.read()
+    connexion.close()
+    return reponse, corps
+
+
+def test_variantes_precompressees_seulement(serveur, tmp_path):
+    page = tmp_path / 'page.html'
+    page.write_text("<p>ventes</p>" * 1000)
+    precompresser(tmp_path)
+    reponse, corps = obtenir(serveur, '/page.html', **{'Accept-Encoding': 'gzip'})
+    assert reponse.getheader('Content-Encoding') == 'gzip' and gzip.decompress(corps) == page.read_bytes()
+
+    # Page réécrite : servie brute le temps que sa variante soit refaite en arrière-plan
+    page.write_text("<p>nouvelles ventes</p>" * 1000)
+    reponse, corps = obtenir(serveur, '/page.html', **{'Accept-Encoding': 'gzip'})
+    assert reponse.getheader('Content-Encoding') is None and corps == page.read_bytes()
+    for _ in range(100):
+        if (tmp_path / 'page.html.gz').stat().st_mtime_ns >= page.stat().st_mtime_ns:
+            break
+        time.sleep(0.05)
+    reponse, corps = obtenir(serveur, '/page.html', **{'Accept-Encoding': 'gzip'})
+    assert reponse.getheader('Content-Encoding') == 'gzip' and gzip.decompress(corps) == page.read_bytes()
+
+
+def test_connexion_inactive_fermee(serveur):
+    with socket.create_connection(serveur.server_address, timeout=10) as client:
+        debut = time.perf_counter()
+        assert client.recv(1) == b''
+        assert time.perf_counter() - debut < 5
+
+
+def test_envoi_lent_non_interrompu(serveur, tmp_path):
+    (tmp_path / 'gros.bin').write_bytes(bytes(range(256)) * 32_768)
+    with socket.create_connection(serveur.server_address, timeout=10) as client:
+        client.sendall(b"GET /gros.bin HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        time.sleep(2)
+        recu = bytearray()
+        while bloc := client.recv(1 << 16):
+            recu += bloc
+    assert recu.endswith(bytes(range(256))) and len(recu.partition(b'\r\n\r\n')[2]) == 256 * 32_768
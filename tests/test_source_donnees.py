@@ -0,0 +1,106 @@
+import hashlib
+import http.server
+import threading
+
+import pandas as pd
+import pytest
+
+import source_donnees
+from source_donnees import charger_donnees, lire_csv, lire_parquet, rafraichir_cache
+
+CSV = "produit,region,prix,qte\nP1,Nord,10.5,2\nP2,Sud,20.0,1\nP1,Est,10.5,4\n"
+
+
+class SourceCsv(http.server.BaseHTTPRequestHandler):
+    """Publie `contenu` avec un ETag et répond 304 aux requêtes conditionnelles."""
+
+    contenu = CSV.encode()
+    requetes = []
+
+    def do_GET(self):
+        etag = f'"{hashlib.sha256(self.contenu).hexdigest()[:16]}"'
+        type(self).requetes.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(self.contenu)))
+        self.end_headers()
+        self.wfile.write(self.contenu)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serveur():
+    SourceCsv.contenu, SourceCsv.requetes = CSV.encode(), []
+    httpd = http.server.HTTPServer(('127.0.0.1', 0), SourceCsv)
+    fil = threading.Thread(target=httpd.serve_forever, daemon=True)
+    fil.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(serveur):
+    return f"http://127.0.0.1:{serveur.server_address[1]}/ventes.csv"
+
+
+def test_statuts_du_cache(serveur, tmp_path):
+    chemin, meta = rafraichir_cache(url(serveur), tmp_path, ttl=600)
+    assert meta['statut'] == 'telecharge'
+    assert chemin.read_text() == CSV and meta['taille'] == len(CSV)
+
+    # Copie récente : aucun accès réseau
+    assert rafraichir_cache(url(serveur), tmp_path, ttl=600)[1]['statut'] == 'cache'
+    assert len(SourceCsv.requetes) == 1
+
+    # TTL écoulé : revalidation conditionnelle par ETag
+    assert rafraichir_cache(url(serveur), tmp_path, ttl=0)[1]['statut'] == 'revalide'
+    assert SourceCsv.requetes[-1] == meta['etag']
+
+    SourceCsv.contenu = (CSV + "P3,Ouest,5.0,3\n").encode()
+    chemin, meta = rafraichir_cache(url(serveur), tmp_path, ttl=0)
+    assert meta['statut'] == 'telecharge' and chemin.read_bytes() == SourceCsv.contenu
+
+    port = serveur.server_address[1]
+    serveur.shutdown()
+    serveur.server_close()
+    chemin, meta = rafraichir_cache(f"http://127.0.0.1:{port}/ventes.csv", tmp_path, ttl=0)
+    assert meta['statut'] == 'hors_ligne' and chemin.read_bytes().endswith(b"P3,Ouest,5.0,3\n")
+
+
+def test_copie_alteree_retelechargee(serveur, tmp_path):
+    chemin, _ = rafraichir_cache(url(serveur), tmp_path, ttl=600)
+    chemin.write_text(CSV.replace('10.5', '99.9'))
+    assert rafraichir_cache(url(serveur), tmp_path, ttl=600)[1]['statut'] == 'telecharge'
+    assert chemin.read_text() == CSV
+
+
+def test_cache_recent_sans_recalcul_de_somme(serveur, tmp_path, monkeypatch):
+    rafraichir_cache(url(serveur), tmp_path, ttl=600)
+    monkeypatch.setattr(source_donnees, '_somme_controle', lambda chemin: pytest.fail("CSV relu"))
+    assert rafraichir_cache(url(serveur), tmp_path, ttl=600)[1]['statut'] == 'cache'
+
+
+def test_charger_donnees_distante_typee(serveur, tmp_path):
+    donnees = charger_donnees(url(serveur), dossier_cache=tmp_path, colonnes=['produit', 'qte'])
+    assert list(donnees.columns) == ['produit', 'qte']
+    assert isinstance(donnees['produit'].dtype, pd.CategoricalDtype) and donnees['qte'].dtype == 'int32'
+
+
+@pytest.mark.parametrize('a_partir_de', [0, 1, 3, 5])
+def test_lecture_a_partir_de(tmp_path, a_partir_de):
+    chemin = tmp_path / 'ventes.csv'
+    chemin.write_text(CSV)
+    complet = lire_csv(chemin)
+    partiel = lire_csv(chemin, ['qte'], a_partir_de)
+    assert list(partiel.index) == list(range(a_partir_de, max(a_partir_de, 3)))
+    assert list(partiel['qte']) == list(complet['qte'].iloc[a_partir_de:])
+
+    source_donnees.convertir_parquet(chemin, tmp_path / 'ventes.parquet')
+    assert list(lire_parquet(tmp_path / 'ventes.parquet', ['qte'], a_partir_de)['qte']) == list(partiel['qte'])